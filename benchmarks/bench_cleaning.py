@@ -0,0 +1,100 @@
+"""
+财务数据清洗性能对比：逐列 to_numeric 的旧实现 vs 整块转换的 FinancialDataCleaner
+
+用法:
+    python -m benchmarks.bench_cleaning [报表parquet文件路径]
+
+未指定文件时，优先使用本地缓存中记录的东方财富资产负债表（tmp/cache），
+缓存不存在时生成一张同等宽度的模拟报表
+"""
+
+import sys
+import timeit
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from data_sources.cache import DEFAULT_CACHE_DIR
+from data_sources.cleaning import FinancialDataCleaner
+
+
+def legacy_clean_financial_data(df: pd.DataFrame) -> pd.DataFrame:
+    """AkShareClient._clean_financial_data 的原始实现"""
+    if df is None or df.empty:
+        return df
+
+    df = df.dropna(how="all")
+    for col in df.columns:
+        if df[col].dtype == "object":
+            try:
+                df[col] = pd.to_numeric(df[col])
+            except (TypeError, ValueError):
+                pass
+
+    date_columns = ["报告日期", "公告日期", "期间"]
+    for col in date_columns:
+        if col in df.columns:
+            try:
+                df[col] = pd.to_datetime(df[col])
+            except (TypeError, ValueError):
+                pass
+    return df
+
+
+def synthetic_statement(n_rows: int = 80, n_cols: int = 300, seed: int = 0) -> pd.DataFrame:
+    """生成与 stock_balance_sheet_by_report_em 形状相近的报表：字符串列 + 大量object类型的数值列"""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2005-03-31", periods=n_rows, freq="3M")[::-1]
+    data = {
+        "SECUCODE": ["600000.SH"] * n_rows,
+        "SECURITY_CODE": ["600000"] * n_rows,
+        "SECURITY_NAME_ABBR": ["浦发银行"] * n_rows,
+        "REPORT_DATE": dates.strftime("%Y-%m-%d 00:00:00"),
+        "REPORT_TYPE": np.resize(["一季报", "年报", "三季报", "中报"], n_rows),
+        "CURRENCY": ["CNY"] * n_rows,
+    }
+    for i in range(n_cols):
+        col = rng.normal(1e9, 5e8, n_rows).astype(object)
+        if i % 4 == 0:
+            col[:] = None
+        elif i % 4 == 1:
+            col[rng.random(n_rows) < 0.3] = None
+        data[f"ITEM_{i}"] = col
+    return pd.DataFrame(data)
+
+
+def load_frame(path: str = None) -> pd.DataFrame:
+    if path:
+        return pd.read_parquet(path)
+    recorded = sorted(Path(DEFAULT_CACHE_DIR).glob("stock_balance_sheet_by_report_em/*.parquet"))
+    if recorded:
+        print(f"使用记录的报表: {recorded[0]}")
+        return pd.read_parquet(recorded[0])
+    print("未找到记录的报表，使用模拟报表")
+    return synthetic_statement()
+
+
+def main(path: str = None, number: int = 20) -> None:
+    warnings.simplefilter("ignore")
+    df = load_frame(path)
+    # 缓存中的数值列可能已是float，统一还原为接口返回时的object类型
+    raw = df.astype({col: object for col in df.columns if df[col].dtype != object})
+    print(f"报表规模: {raw.shape[0]}行 x {raw.shape[1]}列")
+
+    expected = legacy_clean_financial_data(raw.copy())
+    cleaner = FinancialDataCleaner()
+    actual = cleaner.clean(raw.copy(), "bench")
+    pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+
+    legacy = timeit.timeit(lambda: legacy_clean_financial_data(raw.copy()), number=number) / number
+    cold = timeit.timeit(lambda: FinancialDataCleaner().clean(raw.copy(), "bench"), number=number) / number
+    warm = timeit.timeit(lambda: cleaner.clean(raw.copy(), "bench"), number=number) / number
+    print(f"旧实现(逐列转换):     {legacy * 1000:8.2f} ms")
+    print(f"新实现(首次推断列类型): {cold * 1000:8.2f} ms  ({legacy / cold:.1f}x)")
+    print(f"新实现(复用列类型):   {warm * 1000:8.2f} ms  ({legacy / warm:.1f}x)")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -0,0 +1,183 @@
+"""
+数据层离线基准测试
+用ReplayBackend回放录制的akshare数据并注入网络延迟，测量缓存和并发对以下流程的影响：
+AkShareClient.get_all_financial_data、HkAkShareClient.get_fin_data、报表清洗、港股长表转宽表，
+以及多个会话并发取数时调度器按站点限速的排队情况
+
+用法:
+    python -m benchmarks.bench_data_layer [fixture目录] [--latency 秒] [--number 次数]
+
+未指定fixture目录时在临时目录中用模拟数据录制一份，运行结束后删除；指定的目录为空时先用模拟数据录制到该目录
+（见 benchmarks.fixtures）
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+import timeit
+import warnings
+from typing import Callable, Dict, List, Optional
+
+import pandas as pd
+
+from benchmarks.fixtures import A_SYMBOLS, HK_SYMBOLS, has_fixtures, record_fixtures
+from data_sources.akshare_client import STATEMENT_ENDPOINTS, AkShareClient
+from data_sources.cache import DataCache
+from data_sources.cleaning import FinancialDataCleaner
+from data_sources.compaction import compact_frames
+from data_sources.hk_akshare_client import HK_STATEMENTS, HkAkShareClient
+from data_sources.news import NewsStore
+from data_sources.pivot import StatementPivoter
+from data_sources.quote_snapshot import QuoteSnapshot
+from data_sources.ratios import compute_ratios
+from data_sources.replay import ReplayBackend
+from data_sources.scheduler import AkShareScheduler, AsyncClient
+from data_sources.valuation import ValuationStore
+from data_sources.warehouse import FundamentalsWarehouse
+
+
+def measure(fn: Callable[[], object], number: int) -> float:
+    """平均耗时（秒）"""
+    return timeit.timeit(fn, number=number) / number
+
+
+def make_clients(backend: ReplayBackend, workdir: Optional[str] = None, scheduler: Optional[AkShareScheduler] = None):
+    """构造回放客户端，workdir为空时不使用缓存和仓库，scheduler为空时不限速"""
+    scheduler = scheduler or AkShareScheduler(limits={})
+    # 估值序列和新闻存储不设刷新间隔，每次都访问上游
+    options = dict(
+        use_cache=False,
+        use_warehouse=False,
+        valuations=ValuationStore(persist=False, refresh_interval=0),
+        news=NewsStore(refresh_interval=0),
+    )
+    if workdir:
+        options = dict(
+            cache=DataCache(f"{workdir}/cache"),
+            warehouse=FundamentalsWarehouse(f"{workdir}/warehouse"),
+            valuations=ValuationStore(f"{workdir}/valuation"),
+            news=NewsStore(),
+        )
+    # 行情快照预先加载，避免把全市场行情的首次下载计入单只股票的耗时
+    quotes = QuoteSnapshot(fetcher=backend.stock_zh_a_spot_em)
+    quotes.refresh()
+    hk_options = {
+        key: value for key, value in options.items() if key in ("use_cache", "use_warehouse", "cache", "warehouse")
+    }
+    return (
+        AkShareClient(quotes=quotes, backend=backend, scheduler=scheduler, **options),
+        HkAkShareClient(backend=backend, scheduler=scheduler, **hk_options),
+    )
+
+
+def bench_clients(backend: ReplayBackend, number: int) -> List[tuple]:
+    rows = []
+    a_symbol, hk_symbol = A_SYMBOLS[0], HK_SYMBOLS[0]
+
+    a_client, hk_client = make_clients(backend)
+    rows.append(
+        (
+            "get_all_financial_data 串行/无缓存",
+            measure(lambda: a_client.get_all_financial_data(a_symbol, concurrent=False), number),
+        )
+    )
+    rows.append(
+        ("get_all_financial_data 并发/无缓存", measure(lambda: a_client.get_all_financial_data(a_symbol), number))
+    )
+    rows.append(("get_fin_data 并发/无缓存", measure(lambda: hk_client.get_fin_data(hk_symbol), number)))
+
+    with tempfile.TemporaryDirectory() as workdir:
+        a_client, hk_client = make_clients(backend, workdir)
+        # 第一次调用写入缓存和仓库，之后均为命中
+        cold = measure(lambda: (a_client.get_all_financial_data(a_symbol), hk_client.get_fin_data(hk_symbol)), 1)
+        rows.append(("A股+港股 首次(写缓存/仓库)", cold))
+        rows.append(
+            ("get_all_financial_data 并发/缓存命中", measure(lambda: a_client.get_all_financial_data(a_symbol), number))
+        )
+        rows.append(("get_fin_data 并发/缓存命中", measure(lambda: hk_client.get_fin_data(hk_symbol), number)))
+    return rows
+
+
+def bench_scheduler(backend: ReplayBackend, sessions: int = 4) -> List[tuple]:
+    """多个会话同时获取同一只股票的数据，相同的上游请求合并，并按默认的站点限速配置调度"""
+    scheduler = AkShareScheduler()
+    a_symbol = A_SYMBOLS[0]
+
+    async def run():
+        clients = [AsyncClient(make_clients(backend, scheduler=scheduler)[0], scheduler) for _ in range(sessions)]
+        await asyncio.gather(*(client.get_all_financial_data(a_symbol) for client in clients))
+
+    start = time.perf_counter()
+    asyncio.run(run())
+    elapsed = time.perf_counter() - start
+    scheduler.shutdown()
+    for host, stats in scheduler.stats().items():
+        wait = f"平均等待{stats['avg_wait'] * 1000:.0f} ms, 最长等待{stats['max_wait'] * 1000:.0f} ms"
+        print(f"站点 {host}: 调用{stats['calls']}次, 合并{stats['coalesced']}次, {wait}")
+    return [(f"{sessions}个会话并发/站点限速", elapsed)]
+
+
+def bench_transforms(backend: ReplayBackend, number: int) -> List[tuple]:
+    """清洗与转宽表只用回放数据计时，不注入延迟"""
+    offline = ReplayBackend(backend.fixture_dir)
+    a_symbol, hk_symbol = A_SYMBOLS[0], HK_SYMBOLS[0]
+    statements = {endpoint: getattr(offline, endpoint)(symbol=a_symbol) for endpoint in STATEMENT_ENDPOINTS.values()}
+    hk_frames: Dict[str, pd.DataFrame] = {
+        statement: offline.stock_financial_hk_report_em(stock=hk_symbol, symbol=statement)
+        for statement in HK_STATEMENTS
+    }
+
+    def clean():
+        # 每轮使用新的清洗器，包含列类型推断的开销
+        cleaner = FinancialDataCleaner()
+        for endpoint, df in statements.items():
+            cleaner.clean(df, endpoint)
+
+    cleaner = FinancialDataCleaner()
+    cleaned = {endpoint: cleaner.clean(df, endpoint) for endpoint, df in statements.items()}
+    _, report = compact_frames(cleaned)
+    print(f"三大报表内存占用: {report}")
+
+    by_statement = {statement: cleaned[endpoint] for statement, endpoint in STATEMENT_ENDPOINTS.items()}
+
+    return [
+        ("三大报表清洗", measure(clean, number)),
+        ("三大报表财务比率", measure(lambda: compute_ratios(by_statement), number)),
+        ("港股三表转宽表", measure(lambda: StatementPivoter().pivot_many(hk_frames), number)),
+        ("三大报表列类型压缩", measure(lambda: compact_frames(cleaned), number)),
+    ]
+
+
+def main(fixture_dir: Optional[str] = None, latency: float = 0.2, number: int = 5) -> None:
+    warnings.simplefilter("ignore")
+    if fixture_dir is None:
+        # 不在工作区中留下录制文件
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            record_fixtures(tmp_dir)
+            run(tmp_dir, latency, number)
+        return
+    if not has_fixtures(fixture_dir):
+        print(f"{fixture_dir} 中没有录制数据，使用模拟数据录制")
+        record_fixtures(fixture_dir)
+    run(fixture_dir, latency, number)
+
+
+def run(fixture_dir: str, latency: float, number: int) -> None:
+    backend = ReplayBackend(fixture_dir, latency=latency)
+    print(f"fixture: {fixture_dir}, 注入延迟: {latency * 1000:.0f} ms/次, 每项运行 {number} 次")
+    start = time.perf_counter()
+    rows = bench_clients(backend, number) + bench_scheduler(backend) + bench_transforms(backend, number)
+    for name, seconds in rows:
+        print(f"{name:<32}{seconds * 1000:10.2f} ms")
+    print(f"接口调用次数: {dict(sorted(backend.calls.items()))}")
+    print(f"总耗时: {time.perf_counter() - start:.1f} s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="数据层离线基准测试")
+    parser.add_argument("fixture_dir", nargs="?", default=None, help="fixture目录，默认在临时目录中用模拟数据录制")
+    parser.add_argument("--latency", type=float, default=0.2, help="每次akshare调用注入的延迟（秒）")
+    parser.add_argument("--number", type=int, default=5, help="每项重复次数")
+    args = parser.parse_args()
+    main(args.fixture_dir, args.latency, args.number)
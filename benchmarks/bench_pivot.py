@@ -0,0 +1,84 @@
+"""
+港股报表长表转宽表性能对比：pd.pivot_table 的旧实现 vs StatementPivoter
+
+用法:
+    python -m benchmarks.bench_pivot [资产负债表parquet] [利润表parquet] [现金流量表parquet]
+
+未指定文件时，优先使用本地缓存中记录的 stock_financial_hk_report_em 输出（tmp/cache），
+缓存不存在时生成同等规模的模拟长表
+"""
+
+import sys
+import timeit
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from data_sources.cache import DEFAULT_CACHE_DIR
+from data_sources.pivot import StatementPivoter
+
+STATEMENTS = ["资产负债表", "利润表", "现金流量表"]
+
+
+def legacy_trans_table(df: pd.DataFrame) -> pd.DataFrame:
+    """hk_akshare_client.trans_table 的原始实现（列名按科目名还原，便于比对数值）"""
+    return (
+        pd.pivot_table(df, index=["REPORT_DATE"], columns=["STD_ITEM_NAME"], values="AMOUNT")
+        .sort_index(ascending=False)
+        .reset_index()
+    )
+
+
+def synthetic_report(n_dates: int = 40, n_items: int = 120, seed: int = 0) -> pd.DataFrame:
+    """生成与 stock_financial_hk_report_em 相近的长表，每个报告期随机缺失部分科目"""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range("2005-06-30", periods=n_dates, freq="6M").strftime("%Y-%m-%d 00:00:00")
+    items = [f"科目{i:03d}" for i in range(n_items)]
+    date_col = np.repeat(dates, n_items)
+    item_col = np.tile(items, n_dates)
+    keep = rng.random(date_col.size) > 0.15
+    return pd.DataFrame(
+        {
+            "SECUCODE": "00020.HK",
+            "SECURITY_CODE": "00020",
+            "REPORT_DATE": date_col[keep],
+            "STD_ITEM_CODE": np.tile(np.arange(n_items), n_dates)[keep],
+            "STD_ITEM_NAME": item_col[keep],
+            "AMOUNT": rng.normal(1e9, 5e8, date_col.size)[keep],
+        }
+    )
+
+
+def load_frames(paths=None) -> dict:
+    if paths:
+        return {name: pd.read_parquet(path) for name, path in zip(STATEMENTS, paths)}
+    recorded = sorted(Path(DEFAULT_CACHE_DIR).glob("stock_financial_hk_report_em/*.parquet"))
+    if recorded:
+        print(f"使用记录的报表: {[str(p) for p in recorded[:3]]}")
+        return {name: pd.read_parquet(path) for name, path in zip(STATEMENTS, recorded)}
+    print("未找到记录的报表，使用模拟长表")
+    return {name: synthetic_report(seed=i) for i, name in enumerate(STATEMENTS)}
+
+
+def main(paths=None, number: int = 50) -> None:
+    frames = load_frames(paths)
+    print("长表规模: " + ", ".join(f"{name} {len(df)}行" for name, df in frames.items()))
+
+    pivoter = StatementPivoter()
+    pivots = pivoter.pivot_many(frames)
+    for name, df in frames.items():
+        expected = legacy_trans_table(df)
+        actual = pivots[name][expected.columns]
+        pd.testing.assert_frame_equal(actual, expected, check_names=False, check_column_type=False)
+
+    legacy = timeit.timeit(lambda: [legacy_trans_table(df) for df in frames.values()], number=number) / number
+    single = timeit.timeit(lambda: [pivoter.pivot(df, name) for name, df in frames.items()], number=number) / number
+    batch = timeit.timeit(lambda: pivoter.pivot_many(frames), number=number) / number
+    print(f"pivot_table(逐表):        {legacy * 1000:8.2f} ms")
+    print(f"StatementPivoter(逐表):   {single * 1000:8.2f} ms  ({legacy / single:.1f}x)")
+    print(f"StatementPivoter(三表合并): {batch * 1000:8.2f} ms  ({legacy / batch:.1f}x)")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:4] or None)
@@ -0,0 +1,95 @@
+"""
+同业横向筛选基准测试
+用模拟数据源生成一个行业板块的可比公司报表，分别测量仓库为空（需要逐家下载报表）与仓库已是最新时
+PeerScreener.screen 的耗时，以及比率矩阵计算排名、百分位与z分数本身的耗时
+
+用法:
+    python -m benchmarks.bench_screening [--peers 公司数] [--latency 秒] [--number 次数]
+"""
+
+import argparse
+import tempfile
+import time
+import timeit
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.fixtures import SyntheticAkShare
+from data_sources.akshare_client import AkShareClient
+from data_sources.quote_snapshot import QuoteSnapshot
+from data_sources.scheduler import AkShareScheduler
+from data_sources.screening import DEFAULT_METRICS, PeerScreen, PeerScreener
+from data_sources.warehouse import FundamentalsWarehouse
+
+INDUSTRY = "模拟行业"
+ID_COLUMNS = ["SECUCODE", "SECURITY_CODE", "SECURITY_NAME_ABBR", "REPORT_DATE", "REPORT_TYPE", "CURRENCY"]
+
+
+class PeerSyntheticAkShare(SyntheticAkShare):
+    """行业板块返回n家公司，每家公司的报表数值加入不同的扰动，每次调用注入固定延迟"""
+
+    def __init__(self, n_peers: int, latency: float = 0.0):
+        self.codes = [f"{code:06d}" for code in range(600000, 600000 + n_peers)]
+        self.latency = latency
+
+    def _peer(self, df: pd.DataFrame, symbol: str) -> pd.DataFrame:
+        time.sleep(self.latency)
+        rng = np.random.default_rng(int(symbol[-6:]))
+        values = df.drop(columns=ID_COLUMNS).to_numpy(dtype="float64")
+        noise = rng.lognormal(0, 0.3, values.shape)
+        return pd.concat([df[ID_COLUMNS], pd.DataFrame(values * noise, columns=df.columns.drop(ID_COLUMNS))], axis=1)
+
+    def stock_balance_sheet_by_report_em(self, symbol: str) -> pd.DataFrame:
+        return self._peer(super().stock_balance_sheet_by_report_em(symbol), symbol)
+
+    def stock_profit_sheet_by_report_em(self, symbol: str) -> pd.DataFrame:
+        return self._peer(super().stock_profit_sheet_by_report_em(symbol), symbol)
+
+    def stock_cash_flow_sheet_by_report_em(self, symbol: str) -> pd.DataFrame:
+        return self._peer(super().stock_cash_flow_sheet_by_report_em(symbol), symbol)
+
+    def stock_board_industry_cons_em(self, symbol: str) -> pd.DataFrame:
+        time.sleep(self.latency)
+        return pd.DataFrame({"序号": range(1, len(self.codes) + 1), "代码": self.codes, "名称": self.codes})
+
+
+def main(peers: int = 50, latency: float = 0.1, number: int = 5) -> None:
+    warnings.simplefilter("ignore")
+    backend = PeerSyntheticAkShare(peers, latency)
+    with tempfile.TemporaryDirectory() as workdir:
+        client = AkShareClient(
+            use_cache=False,
+            warehouse=FundamentalsWarehouse(f"{workdir}/warehouse"),
+            quotes=QuoteSnapshot(fetcher=lambda: pd.DataFrame()),
+            backend=backend,
+            scheduler=AkShareScheduler(limits={}),
+        )
+        screener = PeerScreener(client)
+
+        start = time.perf_counter()
+        screen = screener.screen(industry=INDUSTRY)
+        cold = time.perf_counter() - start
+        warm = timeit.timeit(lambda: screener.screen(industry=INDUSTRY), number=number) / number
+
+        values = screen.values
+        symbols, dates = screen.symbols, screen.report_dates
+        stats = timeit.timeit(
+            lambda: PeerScreen.from_values(symbols, symbols, dates, DEFAULT_METRICS, values), number=number * 10
+        )
+
+    print(f"\n同业横向筛选 ({len(screen.symbols)}家公司 × {len(screen.metrics)}个指标, 注入延迟 {latency}s)")
+    print(f"{'场景':<24}{'耗时(ms)':>12}")
+    print(f"{'仓库为空':<24}{cold * 1000:>12.1f}")
+    print(f"{'仓库已是最新':<24}{warm * 1000:>12.1f}")
+    print(f"{'排名/百分位/z分数':<24}{stats / (number * 10) * 1000:>12.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="同业横向筛选基准测试")
+    parser.add_argument("--peers", type=int, default=50, help="可比公司数量")
+    parser.add_argument("--latency", type=float, default=0.1, help="每次akshare调用注入的延迟（秒）")
+    parser.add_argument("--number", type=int, default=5, help="重复次数")
+    args = parser.parse_args()
+    main(args.peers, args.latency, args.number)
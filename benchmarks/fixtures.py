@@ -0,0 +1,196 @@
+"""
+数据层基准测试用的akshare fixture
+没有网络、也没有用真实接口录制过fixture时，用模拟数据源驱动客户端录制一份形状相近的fixture
+
+用法:
+    python -m benchmarks.fixtures [fixture目录]          # 用模拟数据录制
+    python -m benchmarks.fixtures [fixture目录] --live   # 用真实akshare接口录制
+"""
+
+import sys
+from pathlib import Path
+from typing import Any, List
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_cleaning import synthetic_statement
+from benchmarks.bench_pivot import synthetic_report
+from data_sources.akshare_client import AkShareClient
+from data_sources.hk_akshare_client import HK_STATEMENTS, HkAkShareClient
+from data_sources.news import NewsStore
+from data_sources.replay import RecordingBackend
+from data_sources.schema import EM_FIELD_LABELS
+
+DEFAULT_FIXTURE_DIR = "tmp/fixtures/akshare"
+A_SYMBOLS = ["SH600000"]
+HK_SYMBOLS = ["00020"]
+
+
+class SyntheticAkShare:
+    """生成与akshare接口返回形状相近的模拟数据"""
+
+    @staticmethod
+    def _statement(dataset: str, n_cols: int, seed: int) -> pd.DataFrame:
+        """模拟报表的前若干列使用真实的东方财富字段代码，其余为字段清单之外的列"""
+        df = synthetic_statement(n_cols=n_cols, seed=seed)
+        codes = [code for code in EM_FIELD_LABELS[dataset] if code not in df.columns]
+        return df.rename(columns={f"ITEM_{i}": code for i, code in enumerate(codes)})
+
+    def stock_balance_sheet_by_report_em(self, symbol: str) -> pd.DataFrame:
+        return self._statement("balance_sheet", n_cols=300, seed=1)
+
+    def stock_profit_sheet_by_report_em(self, symbol: str) -> pd.DataFrame:
+        return self._statement("income_statement", n_cols=150, seed=2)
+
+    def stock_cash_flow_sheet_by_report_em(self, symbol: str) -> pd.DataFrame:
+        return self._statement("cash_flow", n_cols=200, seed=3)
+
+    def stock_financial_abstract_ths(self, symbol: str) -> pd.DataFrame:
+        years = [str(year) for year in range(2024, 2004, -1)]
+        rng = np.random.default_rng(4)
+        return pd.DataFrame(
+            {
+                "报告期": years,
+                "净利润": [f"{v:.2f}亿" for v in rng.uniform(10, 100, len(years))],
+                "营业总收入": [f"{v:.2f}亿" for v in rng.uniform(100, 1000, len(years))],
+                "销售毛利率": [f"{v:.2f}%" for v in rng.uniform(10, 40, len(years))],
+                "净资产收益率": [f"{v:.2f}%" for v in rng.uniform(5, 20, len(years))],
+                "资产负债率": [f"{v:.2f}%" for v in rng.uniform(40, 90, len(years))],
+            }
+        )
+
+    def stock_individual_info_em(self, symbol: str) -> pd.DataFrame:
+        return pd.DataFrame(
+            {
+                "item": ["股票代码", "股票简称", "总股本", "流通股", "总市值", "行业", "上市时间"],
+                "value": [symbol, "模拟股份", 2.9e10, 2.9e10, 2.9e11, "银行", 19991110],
+            }
+        )
+
+    def stock_value_em(self, symbol: str) -> pd.DataFrame:
+        dates = pd.bdate_range("2018-01-02", "2025-07-31")
+        rng = np.random.default_rng(5)
+        close = 10 * np.exp(np.cumsum(rng.normal(0, 0.01, len(dates))))
+        return pd.DataFrame(
+            {
+                "数据日期": dates.strftime("%Y-%m-%d"),
+                "当日收盘价": close,
+                "当日涨跌幅": rng.normal(0, 1, len(dates)),
+                "总市值": close * 2.9e10,
+                "流通市值": close * 2.9e10,
+                "总股本": 2.9e10,
+                "流通股本": 2.9e10,
+                "PE(TTM)": close / 1.8,
+                "PE(静)": close / 1.7,
+                "市净率": close / 20,
+                "PEG值": rng.uniform(0.5, 2, len(dates)),
+                "市现率": close / 3,
+                "市销率": close / 5,
+            }
+        )
+
+    def stock_news_em(self, symbol: str) -> pd.DataFrame:
+        times = pd.date_range("2025-07-01 09:00", periods=100, freq="37min")[::-1]
+        # 每条新闻被三家来源转载，正文末尾附带不同的来源说明
+        stories = np.arange(len(times)) // 3
+        sources = [f"模拟来源{i % 3}" for i in range(len(times))]
+        bodies = [
+            "".join(f"第{story}号模拟新闻第{n}段：公司公告了经营情况与未来规划。" for n in range(10))
+            for story in stories
+        ]
+        return pd.DataFrame(
+            {
+                "关键词": symbol,
+                "新闻标题": [f"模拟新闻标题{story}" for story in stories],
+                "新闻内容": [f"{body}（来源：{source}）" for body, source in zip(bodies, sources)],
+                "发布时间": times.strftime("%Y-%m-%d %H:%M:%S"),
+                "文章来源": sources,
+                "新闻链接": [f"http://example.com/{i}" for i in range(len(times))],
+            }
+        )
+
+    def stock_info_global_sina(self) -> pd.DataFrame:
+        times = pd.date_range("2025-07-01 09:00", periods=20, freq="5min")[::-1]
+        return pd.DataFrame({"时间": times.strftime("%Y-%m-%d %H:%M:%S"), "内容": [f"快讯{i}" for i in range(20)]})
+
+    def stock_zh_a_spot_em(self) -> pd.DataFrame:
+        rng = np.random.default_rng(6)
+        codes = [f"{code:06d}" for code in range(600000, 605500)]
+        return pd.DataFrame(
+            {
+                "序号": np.arange(1, len(codes) + 1),
+                "代码": codes,
+                "名称": [f"股票{code}" for code in codes],
+                "最新价": rng.uniform(2, 200, len(codes)),
+                "涨跌幅": rng.normal(0, 2, len(codes)),
+                "成交量": rng.uniform(1e4, 1e7, len(codes)),
+                "成交额": rng.uniform(1e7, 1e10, len(codes)),
+                "市盈率-动态": rng.uniform(5, 80, len(codes)),
+                "市净率": rng.uniform(0.5, 10, len(codes)),
+                "总市值": rng.uniform(1e9, 1e12, len(codes)),
+            }
+        )
+
+    def stock_financial_hk_report_em(self, stock: str, symbol: str) -> pd.DataFrame:
+        return synthetic_report(seed=list(HK_STATEMENTS).index(symbol))
+
+    def stock_financial_hk_analysis_indicator_em(self, symbol: str) -> pd.DataFrame:
+        dates = pd.date_range("2015-12-31", periods=10, freq="12M")[::-1]
+        rng = np.random.default_rng(7)
+        return pd.DataFrame(
+            {
+                "SECUCODE": f"{symbol}.HK",
+                "REPORT_DATE": dates.strftime("%Y-%m-%d 00:00:00"),
+                "OPERATE_INCOME": rng.uniform(1e9, 1e10, len(dates)),
+                "HOLDER_PROFIT": rng.uniform(1e8, 1e9, len(dates)),
+                "ROE_AVG": rng.uniform(5, 20, len(dates)),
+                "DEBT_ASSET_RATIO": rng.uniform(30, 70, len(dates)),
+            }
+        )
+
+
+def record_fixtures(
+    fixture_dir: str = DEFAULT_FIXTURE_DIR,
+    source: Any = None,
+    a_symbols: List[str] = A_SYMBOLS,
+    hk_symbols: List[str] = HK_SYMBOLS,
+) -> Path:
+    """
+    驱动客户端完整跑一遍数据获取流程，录制其中的所有akshare调用
+
+    Args:
+        fixture_dir: fixture保存目录
+        source: 被录制的接口来源，为空时使用模拟数据
+        a_symbols: A股代码列表
+        hk_symbols: 港股代码列表
+
+    Returns:
+        Path: fixture目录
+    """
+    backend = RecordingBackend(fixture_dir, source=source or SyntheticAkShare())
+    # 不经过缓存和仓库，保证每个接口都真正被调用一次
+    a_client = AkShareClient(
+        use_cache=False, use_warehouse=False, backend=backend, use_valuation_store=False, news=NewsStore()
+    )
+    hk_client = HkAkShareClient(use_cache=False, use_warehouse=False, backend=backend)
+    for symbol in a_symbols:
+        a_client.get_all_financial_data(symbol)
+    for stock_code in hk_symbols:
+        hk_client.get_fin_data(stock_code)
+    return Path(fixture_dir)
+
+
+def has_fixtures(fixture_dir: str) -> bool:
+    """fixture目录中是否已有录制数据"""
+    return any(Path(fixture_dir).glob("*/*.json"))
+
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    if "--live" in sys.argv:
+        import akshare
+
+        print(f"录制完成: {record_fixtures(*args[:1], source=akshare)}")
+    else:
+        print(f"录制完成: {record_fixtures(*args[:1])}")
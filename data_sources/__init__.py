@@ -4,12 +4,52 @@
 """
 
 from .akshare_client import AkShareClient
+from .artifacts import ArtifactStore, get_artifact_store
+from .cache import DataCache
+from .compaction import compact_frame, expand_frame
+from .formatting import convert_large_numbers
 from .hk_akshare_client import HkAkShareClient
+from .llm_cache import LLMCache, get_llm_cache
+from .news import NewsStore, get_news_store
+from .ratios import compute_ratios
+from .prompt_data import count_tokens, format_prompt_data
+from .quote_snapshot import QuoteSnapshot, get_quote_snapshot
+from .scheduler import AkShareScheduler, AsyncClient, get_scheduler
+from .schema import SchemaRegistry, get_schema_registry
+from .screening import PeerScreen, PeerScreener
+from .valuation import ValuationStore, get_valuation_store
+from .warehouse import FundamentalsWarehouse, get_warehouse
 
 # from .search_client import SearchClient
 
 __all__ = [
     "AkShareClient",
+    "ArtifactStore",
+    "get_artifact_store",
+    "DataCache",
     "HkAkShareClient",
+    "LLMCache",
+    "get_llm_cache",
+    "convert_large_numbers",
+    "compact_frame",
+    "expand_frame",
+    "compute_ratios",
+    "count_tokens",
+    "format_prompt_data",
+    "QuoteSnapshot",
+    "get_quote_snapshot",
+    "FundamentalsWarehouse",
+    "get_warehouse",
+    "ValuationStore",
+    "get_valuation_store",
+    "NewsStore",
+    "get_news_store",
+    "AkShareScheduler",
+    "AsyncClient",
+    "get_scheduler",
+    "PeerScreen",
+    "PeerScreener",
+    "SchemaRegistry",
+    "get_schema_registry",
     #    "SearchClient",
 ]
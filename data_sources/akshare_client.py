@@ -1,13 +1,231 @@
-import akshare as ak
 import pandas as pd
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 from datetime import datetime
+from functools import partial
 from loguru import logger
 
-
-class AkShareClient:
+from .base import BaseAkShareClient
+from .cache import DataCache
+from .cleaning import clean_financial_data
+from .executor import DEFAULT_MAX_WORKERS, DEFAULT_TIMEOUT, fan_out
+from .compaction import compact_frames
+from .formatting import convert_large_numbers
+from .news import NewsStore, get_news_store
+from .ratios import ITEM_FIELDS, compute_ratios
+from .quote_snapshot import QuoteSnapshot, get_quote_snapshot
+from .scheduler import AkShareScheduler
+from .schema import Projection, get_schema_registry
+from .valuation import DATE_COLUMN as VALUATION_DATE_COLUMN
+from .valuation import ValuationStore, get_valuation_store
+from .warehouse import FundamentalsWarehouse
+
+# 报表类型到东方财富报表接口的映射
+STATEMENT_ENDPOINTS = {
+    "balance_sheet": "stock_balance_sheet_by_report_em",
+    "income_statement": "stock_profit_sheet_by_report_em",
+    "cash_flow": "stock_cash_flow_sheet_by_report_em",
+}
+STATEMENT_NAMES = {
+    "balance_sheet": "资产负债表",
+    "income_statement": "利润表",
+    "cash_flow": "现金流量表",
+}
+# 每类新闻传给下游的最新条数
+NEWS_TOP_K = 10
+# 计算财务比率需要的报表字段，字段投影时总是保留
+RATIO_INPUTS = {
+    statement: list(dict.fromkeys(col for cols in ITEM_FIELDS[statement].values() for col in cols))
+    for statement in STATEMENT_ENDPOINTS
+}
+
+
+class AkShareClient(BaseAkShareClient):
     """AkShare数据客户端"""
 
+    MARKET = "A"
+    # 仓库数据集: (akshare接口, 报告期列, 报告类型列)
+    WAREHOUSE_DATASETS = {
+        **{statement: (endpoint, "REPORT_DATE", "REPORT_TYPE") for statement, endpoint in STATEMENT_ENDPOINTS.items()},
+        "indicator": ("stock_financial_abstract_ths", "报告期", None),
+    }
+
+    def __init__(
+        self,
+        cache: Optional[DataCache] = None,
+        use_cache: bool = True,
+        quotes: Optional[QuoteSnapshot] = None,
+        warehouse: Optional[FundamentalsWarehouse] = None,
+        use_warehouse: bool = True,
+        backend: Optional[Any] = None,
+        valuations: Optional[ValuationStore] = None,
+        use_valuation_store: bool = True,
+        news: Optional[NewsStore] = None,
+        projection: Optional[Projection] = "full",
+        scheduler: Optional[AkShareScheduler] = None,
+    ):
+        """
+        Args:
+            cache: 数据缓存，为空时使用默认目录下的Parquet缓存
+            use_cache: 是否启用缓存
+            quotes: 实时行情快照，为空时使用进程内按后端共享的快照
+            warehouse: 本地财务数据仓库，为空时使用进程内共享的仓库
+            use_warehouse: 是否通过仓库读取报表与财务指标
+            backend: akshare接口来源（如录制/回放后端），为空时由环境变量决定
+            valuations: 估值序列存储，为空时使用进程内共享的存储
+            use_valuation_store: 是否持久化估值序列，为False时每个客户端只在内存中保存
+            news: 增量新闻存储，为空时使用进程内共享的存储
+            projection: 报表与财务指标的字段投影 ("core", "full", 自定义投影名称或字段列表)，为None时保留全部列；
+                字段清单按一般企业整理，投影字段大多没有数据时（银行、保险、证券公司）保留全部列
+            scheduler: 按上游站点限速的调度器，为空时使用进程内共享的调度器
+        """
+        super().__init__(
+            cache=cache,
+            use_cache=use_cache,
+            warehouse=warehouse,
+            use_warehouse=use_warehouse,
+            backend=backend,
+            scheduler=scheduler,
+        )
+        # 指定了后端时行情快照也从该后端获取，同一后端的客户端共享一份快照
+        self.quotes = quotes or get_quote_snapshot(backend)
+        if valuations is None:
+            valuations = get_valuation_store() if use_valuation_store else ValuationStore(persist=False)
+        self.valuations = valuations
+        self.news = news or get_news_store()
+        self.schema = get_schema_registry()
+        self.projection = projection
+
+    def load_dataset(self, dataset: str, symbol: str) -> Optional[pd.DataFrame]:
+        """
+        通过本地仓库获取报表或财务指标的原始数据
+
+        Args:
+            dataset: 数据集 ("balance_sheet", "income_statement", "cash_flow", "indicator")
+            symbol: 接口所需格式的股票代码 (报表为 SH600000，财务指标为 600000)
+
+        Returns:
+            DataFrame: 接口返回格式的原始数据
+        """
+        endpoint, date_column, type_column = self.WAREHOUSE_DATASETS[dataset]
+        # 仓库只在可能已发布新报告时调用fetcher，此时跳过缓存，避免读到有效期内的旧数据后又标记为最新
+        fetcher = partial(self._fetch, endpoint, symbol, refresh=True, symbol=symbol)
+        return self._read_through(self.MARKET, dataset, symbol, fetcher, date_column, type_column)
+
+    def _dataset_endpoint(self, dataset: str) -> str:
+        return self.WAREHOUSE_DATASETS[dataset][0]
+
+    def get_statement_by_periods(
+        self, statement: str, symbol: str, periods: Optional[List[str]] = None
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        获取多个报告期的报表数据，整张报表只下载一次，在本地按REPORT_TYPE拆分
+
+        Args:
+            statement: 报表类型 ("balance_sheet", "income_statement", "cash_flow")
+            symbol: 股票代码 (如: SH600000)
+            periods: 报告期类型列表，为空时返回所有报告期
+
+        Returns:
+            dict: 报告期到报表数据的映射，未获取到数据的报告期不包含在内
+        """
+        name = STATEMENT_NAMES[statement]
+        try:
+            logger.info(f"获取{name}数据: {symbol}, 期间: {periods or '全部'}")
+            # 获取后立即按字段投影裁剪，后续清洗、拆分和序列化只处理投影内的列
+            df = self.schema.project(
+                self.load_dataset(statement, symbol), statement, self.projection, keep=RATIO_INPUTS[statement]
+            )
+            if df is None or df.empty:
+                logger.warning(f"未获取到{name}数据: {symbol}")
+                return {}
+
+            df = self._clean_financial_data(df, STATEMENT_ENDPOINTS[statement])
+            groups = dict(tuple(df.groupby("REPORT_TYPE", sort=False)))
+            result = {period: groups[period] for period in (periods or groups) if period in groups}
+            for period in set(periods or []) - set(result):
+                logger.warning(f"未获取到{name}数据: {symbol}, 期间: {period}")
+            logger.info(
+                f"成功获取{name}数据: {symbol}, " + ", ".join(f"{k}共{len(v)}条记录" for k, v in result.items())
+            )
+            return result
+
+        except Exception as e:
+            logger.error(f"获取{name}失败: {symbol}, 错误: {str(e)}")
+            return {}
+
+    def get_financial_statements(self, symbol: str, periods: List[str]) -> Dict[str, pd.DataFrame]:
+        """
+        获取三大报表的多个报告期数据，每张报表只下载一次
+
+        Args:
+            symbol: 股票代码
+            periods: 报告期类型列表
+
+        Returns:
+            dict: 以 "{报表类型}_{报告期}" 为键的报表数据
+        """
+        by_statement = {
+            statement: self.get_statement_by_periods(statement, symbol, periods) for statement in STATEMENT_ENDPOINTS
+        }
+        return self._merge_statements(by_statement, periods)
+
+    @staticmethod
+    def _merge_statements(
+        by_statement: Dict[str, Dict[str, pd.DataFrame]], periods: List[str]
+    ) -> Dict[str, pd.DataFrame]:
+        # 按 报告期 -> 报表 的顺序展开，与逐期获取时的键顺序保持一致
+        result = {}
+        for period in periods:
+            for statement, frames in by_statement.items():
+                if frames and period in frames:
+                    result[f"{statement}_{period}"] = frames[period]
+        return result
+
+    @staticmethod
+    def _ratios_by_period(
+        by_statement: Dict[str, Dict[str, pd.DataFrame]], periods: List[str]
+    ) -> Dict[str, pd.DataFrame]:
+        # 各报告期的报表合并后一起计算，中报的期初余额可以取到上年年报
+        statements = {
+            statement: pd.concat(frames.values(), ignore_index=True)
+            for statement, frames in by_statement.items()
+            if frames
+        }
+        ratios = compute_ratios(statements)
+        if ratios.empty:
+            return {}
+        return {
+            f"financial_ratios_{period}": ratios[ratios["REPORT_TYPE"] == period].reset_index(drop=True)
+            for period in periods
+            if (ratios["REPORT_TYPE"] == period).any()
+        }
+
+    def get_financial_ratios(self, symbol: str, periods: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
+        """
+        由三大报表计算财务比率（毛利率、ROE、流动比率、周转天数、同比增速等，见 ratios.RATIO_GROUPS）
+
+        Args:
+            symbol: 股票代码 (如: SH600000)
+            periods: 报告期类型列表，为空时返回所有报告期
+
+        Returns:
+            DataFrame: 每个报告期一行的比率表，按报告期降序
+        """
+        try:
+            statements = {}
+            for statement in STATEMENT_ENDPOINTS:
+                frames = self.get_statement_by_periods(statement, symbol)
+                if frames:
+                    statements[statement] = pd.concat(frames.values(), ignore_index=True)
+            ratios = compute_ratios(statements, periods)
+            if ratios.empty:
+                logger.warning(f"未能计算财务比率: {symbol}")
+                return None
+            return ratios
+        except Exception as e:
+            logger.error(f"计算财务比率失败: {symbol}, 错误: {str(e)}")
+            return None
+
     def get_balance_sheet(self, symbol: str, period: str = "年报") -> Optional[pd.DataFrame]:
         """
         获取资产负债表
@@ -19,21 +237,7 @@ class AkShareClient:
         Returns:
             DataFrame: 资产负债表数据
         """
-        try:
-            logger.info(f"获取资产负债表数据: {symbol}, 期间: {period}")
-            df = ak.stock_balance_sheet_by_report_em(symbol=symbol)
-            df = df[df["REPORT_TYPE"] == period]
-            if df is not None and not df.empty:
-                # 数据清洗和标准化
-                logger.info(f"成功获取资产负债表数据: {symbol}, 共{len(df)}条记录")
-                return df
-            else:
-                logger.warning(f"未获取到资产负债表数据: {symbol}")
-                return None
-
-        except Exception as e:
-            logger.error(f"获取资产负债表失败: {symbol}, 错误: {str(e)}")
-            return None
+        return self.get_statement_by_periods("balance_sheet", symbol, [period]).get(period)
 
     def get_income_statement(self, symbol: str, period: str = "年报") -> Optional[pd.DataFrame]:
         """
@@ -46,21 +250,7 @@ class AkShareClient:
         Returns:
             DataFrame: 利润表数据
         """
-        try:
-            logger.info(f"获取利润表数据: {symbol}, 期间: {period}")
-            df = ak.stock_profit_sheet_by_report_em(symbol=symbol)
-            df = df[df["REPORT_TYPE"] == period]
-            if df is not None and not df.empty:
-                df = self._clean_financial_data(df)
-                logger.info(f"成功获取利润表数据: {symbol}, 共{len(df)}条记录")
-                return df
-            else:
-                logger.warning(f"未获取到利润表数据: {symbol}")
-                return None
-
-        except Exception as e:
-            logger.error(f"获取利润表失败: {symbol}, 错误: {str(e)}")
-            return None
+        return self.get_statement_by_periods("income_statement", symbol, [period]).get(period)
 
     def get_cash_flow(self, symbol: str, period: str = "年报") -> Optional[pd.DataFrame]:
         """
@@ -73,22 +263,7 @@ class AkShareClient:
         Returns:
             DataFrame: 现金流量表数据
         """
-        try:
-            logger.info(f"获取现金流量表数据: {symbol}, 期间: {period}")
-            df = ak.stock_cash_flow_sheet_by_report_em(symbol=symbol)
-
-            if df is not None and not df.empty:
-                df = self._clean_financial_data(df)
-                df = df[df["REPORT_TYPE"] == period]
-                logger.info(f"成功获取现金流量表数据: {symbol}, 共{len(df)}条记录")
-                return df
-            else:
-                logger.warning(f"未获取到现金流量表数据: {symbol}")
-                return None
-
-        except Exception as e:
-            logger.error(f"获取现金流量表失败: {symbol}, 错误: {str(e)}")
-            return None
+        return self.get_statement_by_periods("cash_flow", symbol, [period]).get(period)
 
     def get_stock_info(self, symbol: str) -> Optional[Dict]:
         """
@@ -105,16 +280,15 @@ class AkShareClient:
 
             # 获取股票基本信息
             symbol = symbol.replace("SH", "").replace("SZ", "")
-            stock_info = ak.stock_individual_info_em(symbol=symbol)
+            stock_info = self._fetch("stock_individual_info_em", symbol, symbol=symbol)
 
-            # 获取实时行情
-            realtime_data = ak.stock_zh_a_spot_em()
-            stock_realtime = realtime_data[realtime_data["代码"] == symbol]
+            # 从共享的全市场行情快照中获取实时行情
+            stock_realtime = self.quotes.get(symbol)
 
             result = {
                 "symbol": symbol,
                 "basic_info": stock_info.to_dict() if stock_info is not None else {},
-                "realtime_data": stock_realtime.to_dict("records")[0] if not stock_realtime.empty else {},
+                "realtime_data": stock_realtime or {},
                 "update_time": datetime.now().isoformat(),
             }
             logger.info(f"成功获取股票基本信息: {symbol}")
@@ -124,34 +298,57 @@ class AkShareClient:
             logger.error(f"获取股票基本信息失败: {symbol}, 错误: {str(e)}")
             return None
 
-    def get_stock_value(self, symbol: str) -> Optional[Dict]:
+    def get_industry_constituents(self, industry: str) -> Optional[pd.DataFrame]:
+        """
+        获取东方财富行业板块成分股
+
+        Args:
+            industry: 行业板块名称 (如: 银行)
+
+        Returns:
+            DataFrame: 成分股列表，包含 代码、名称 等列
+        """
+        try:
+            logger.info(f"获取行业板块成分股: {industry}")
+            df = self._fetch("stock_board_industry_cons_em", industry, symbol=industry)
+            if df is None or df.empty:
+                logger.warning(f"未获取到行业板块成分股: {industry}")
+                return None
+            logger.info(f"成功获取行业板块成分股: {industry}, 共{len(df)}只")
+            return df
+        except Exception as e:
+            logger.error(f"获取行业板块成分股失败: {industry}, 错误: {str(e)}")
+            return None
+
+    def get_stock_value(self, symbol: str, date: Optional[str] = None) -> Optional[Dict]:
         """
         获取股票估值信息
 
         Args:
             symbol: 股票代码
+            date: 估值日期，取该日或之前最近一个交易日的数据，为空时为最新交易日
 
         Returns:
-            dict: 股票估值信息
+            dict: 股票估值信息，包含当日估值和PE/PB的历史分位数
         """
         try:
             logger.info("获取估值信息")
 
-            # 获取股票估值信息
+            # 获取股票估值信息，完整历史保存在估值序列中，只增量追加新的交易日
             symbol = symbol.replace("SH", "").replace("SZ", "").replace("sh", "").replace("sz", "")
-            stock_value = ak.stock_value_em(symbol=symbol)
-            # latest_date = stock_value['数据日期'].max()
-
-            # 日期格式修改
-            stock_value["数据日期"] = pd.to_datetime(stock_value["数据日期"].astype(str)).dt.date
-            target_date = pd.to_datetime("2025-06-30").date()
-            date_mask = stock_value["数据日期"] == target_date
-            stock_value = stock_value[date_mask]
+            self.valuations.load(symbol, partial(self.ak.stock_value_em, symbol=symbol))
+            summary = self.valuations.summary(symbol, date)
+            if summary is None:
+                logger.warning(f"未获取到估值信息: {symbol}, 日期: {date or '最新'}")
+                return None
 
-            logger.info(f"stock_value:{stock_value}")
+            latest = summary["latest"]
+            latest[VALUATION_DATE_COLUMN] = latest[VALUATION_DATE_COLUMN].date()
+            logger.info(f"stock_value:{latest}")
             result = {
                 "symbol": symbol,
-                "stock_value": stock_value.to_dict() if stock_value is not None else {},
+                "stock_value": {k: {0: v} for k, v in latest.items()},
+                "percentiles": summary["percentiles"],
             }
             logger.info(f"成功获取估值信息:{symbol}")
             return result
@@ -173,10 +370,10 @@ class AkShareClient:
         try:
             logger.info(f"获取财务指标数据: {symbol}")
             symbol = symbol.replace("SH", "").replace("SZ", "")
-            df = ak.stock_financial_abstract_ths(symbol=symbol)
+            df = self.schema.project(self.load_dataset("indicator", symbol), "indicator", self.projection)
 
             if df is not None and not df.empty:
-                df = self._clean_financial_data(df)
+                df = self._clean_financial_data(df, "stock_financial_abstract_ths")
                 logger.info(f"成功获取财务指标数据: {symbol}, 共{len(df)}条记录")
                 return df.sort_values(by="报告期", ascending=False)
             else:
@@ -187,27 +384,25 @@ class AkShareClient:
             logger.error(f"获取财务指标失败: {symbol}, 错误: {str(e)}")
             return None
 
-    def get_stock_news_em(self, symbol: str) -> Optional[pd.DataFrame]:
+    def get_stock_news_em(self, symbol: str, top_k: Optional[int] = None) -> Optional[pd.DataFrame]:
         """
         获取东方财富指定个股的新闻资讯数据
         https://so.eastmoney.com/news/s?keyword=603777
-        
+
         Args:
             symbol (str): 股票代码，如 "603777"
-            
+            top_k (int): 返回最新的条数，为空时返回全部
+
         Returns:
             pd.DataFrame: 个股新闻数据，包含关键词、新闻标题、新闻内容等字段
         """
-        try:
-            logger.info(f"获取个股新闻数据: {symbol}")
-            
+
+        def fetcher():
             # 调用东方财富个股新闻接口
-            df = ak.stock_news_em(symbol=symbol)
-            
+            df = self._fetch("stock_news_em", symbol, symbol=symbol)
             if df is None or df.empty:
-                logger.warning(f"未获取到个股新闻数据: {symbol}")
                 return None
-                
+
             # 数据清洗和标准化
             df = df.rename(columns={
                 '关键词': 'symbol',
@@ -217,63 +412,123 @@ class AkShareClient:
                 '文章来源': 'source',
                 '新闻链接': 'url'
             })
-            
+
             # 转换时间格式
             df['publish_time'] = pd.to_datetime(df['publish_time'])
-            
-            # 按发布时间降序排列
-            df = df.sort_values('publish_time', ascending=False).reset_index(drop=True)
-            
+            return df
+
+        try:
+            logger.info(f"获取个股新闻数据: {symbol}")
+
+            # 新闻存储只接收比已入库更新的新闻并剔除近似重复，按发布时间降序返回
+            df = self.news.get(f"stock_news_em/{symbol}", fetcher, top_k)
+
+            if df.empty:
+                logger.warning(f"未获取到个股新闻数据: {symbol}")
+                return None
+
             logger.info(f"成功获取个股新闻数据: {symbol}, 共{len(df)}条记录")
             return df
-            
+
         except Exception as e:
             logger.error(f"获取个股新闻失败: {symbol}, 错误: {str(e)}")
             return None
 
-    def get_global_stock_news(self) -> Optional[pd.DataFrame]:
+    def get_global_stock_news(self, top_k: Optional[int] = None) -> Optional[pd.DataFrame]:
         """
         获取新浪财经全球财经快讯
         https://finance.sina.com.cn/7x24
-        
+
+        Args:
+            top_k (int): 返回最新的条数，为空时返回全部
+
         Returns:
             pd.DataFrame | None: 全球财经快讯数据，包含时间和内容字段
         """
-        try:
-            logger.info("正在获取新浪财经全球财经快讯...")
-            df = ak.stock_info_global_sina()
-            
+
+        def fetcher():
+            df = self._fetch("stock_info_global_sina", "global")
             if df is None or df.empty:
-                logger.warning("未获取到全球财经快讯数据")
                 return None
-                
+
             # 数据清洗与标准化
             df = df.rename(columns={
                 '时间': 'publish_time',
                 '内容': 'content'
             })
-            
+
             # 转换时间格式
             df['publish_time'] = pd.to_datetime(df['publish_time'])
-            
-            # 按时间降序排列
-            df = df.sort_values('publish_time', ascending=False).reset_index(drop=True)
-            
+            return df
+
+        try:
+            logger.info("正在获取新浪财经全球财经快讯...")
+            df = self.news.get("stock_info_global_sina", fetcher, top_k)
+
+            if df.empty:
+                logger.warning("未获取到全球财经快讯数据")
+                return None
+
             logger.info(f"成功获取全球财经快讯，共{len(df)}条记录")
             return df
-            
+
         except Exception as e:
             logger.error(f"获取全球财经快讯失败: {str(e)}")
             return None
 
+    @staticmethod
+    def _stock_info_frame(stock_info: Dict) -> pd.DataFrame:
+        """
+        基本信息与实时行情展开为一行
+
+        Args:
+            stock_info: get_stock_info 的返回值
+
+        Returns:
+            DataFrame: 一行基本信息
+        """
+        basic_info = stock_info["basic_info"]
+        # stock_individual_info_em 返回 item/value 两列，展开为一行
+        row = dict(zip(basic_info.get("item", {}).values(), basic_info.get("value", {}).values()))
+        row.update(stock_info["realtime_data"])
+        return pd.DataFrame([row])
+
+    @staticmethod
+    def _stock_value_frame(stock_value_info: Dict) -> pd.DataFrame:
+        """
+        估值信息展开为一行：当日估值，加上PE/PB在各回看期内的历史分位数
+
+        Args:
+            stock_value_info: get_stock_value 的返回值
 
-    def get_all_financial_data(self, symbol: str, periods: List[str] = None) -> Dict[str, pd.DataFrame]:  # type: ignore
+        Returns:
+            DataFrame: 一行估值数据，分位数列名如 "PE(TTM)3年分位(%)"
+        """
+        row = {k: v[0] for k, v in stock_value_info["stock_value"].items()}
+        for column, by_years in stock_value_info.get("percentiles", {}).items():
+            for years, percentile in by_years.items():
+                row[f"{column}{years}分位(%)"] = percentile
+        return pd.DataFrame([row])
+
+    def get_all_financial_data(
+        self,
+        symbol: str,
+        periods: List[str] = None,  # type: ignore
+        concurrent: bool = True,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        timeout: float = DEFAULT_TIMEOUT,
+        format_numbers: bool = False,
+    ) -> Dict[str, pd.DataFrame]:
         """
         获取所有财务数据
 
         Args:
             symbol: 股票代码
             periods: 报告期列表
+            concurrent: 是否并发请求各数据接口
+            max_workers: 并发模式下的最大线程数
+            timeout: 并发模式下单个数据接口的超时时间（秒）
+            format_numbers: 是否将大额数值转换为 亿/万 为单位的字符串
 
         Returns:
             dict: 包含所有财务数据的字典
@@ -281,49 +536,43 @@ class AkShareClient:
         if periods is None:
             periods = ["年报", "中报"]
 
-        result = {}
-
-        for period in periods:
-            logger.info(f"获取 {symbol} 的 {period} 数据")
-
-            # 获取三大报表
-            balance_sheet = self.get_balance_sheet(symbol, period)
-            income_statement = self.get_income_statement(symbol, period)
-            cash_flow = self.get_cash_flow(symbol, period)
-
-            if balance_sheet is not None:
-                result[f"balance_sheet_{period}"] = balance_sheet
-            if income_statement is not None:
-                result[f"income_statement_{period}"] = income_statement
-            if cash_flow is not None:
-                result[f"cash_flow_{period}"] = cash_flow
+        # 各数据集相互独立，先统一组织成任务再按顺序组装结果
+        # 三大报表每张只下载一次，多个报告期在本地拆分
+        logger.info(f"获取 {symbol} 的 {'、'.join(periods)} 数据")
+        tasks = {
+            statement: partial(self.get_statement_by_periods, statement, symbol, periods)
+            for statement in STATEMENT_ENDPOINTS
+        }
 
         # 获取财务指标
-        financial_indicators = self.get_financial_indicators(symbol)
-        if financial_indicators is not None:
-            result["financial_indicators"] = financial_indicators
-
+        tasks["financial_indicators"] = partial(self.get_financial_indicators, symbol)
         # 获取股票基本信息
-        stock_info = self.get_stock_info(symbol)
-        if stock_info is not None:
-            result["stock_info"] = stock_info
-
+        tasks["stock_info"] = partial(self.get_stock_info, symbol)
         # 获取估值信息
-        stock_value_info = self.get_stock_value(symbol)
-        if stock_value_info is not None:
-            result["stock_value_info"] = stock_value_info
-
-        # 获取新闻数据
-        # if include_news:
-            # 获取全球财经快讯
-        global_news = self.get_global_stock_news()
-        if global_news is not None:
-            result["global_news"] = global_news.head(10).to_dict(orient="records")
-            
+        tasks["stock_value_info"] = partial(self.get_stock_value, symbol)
+        # 获取全球财经快讯
+        tasks["global_news"] = partial(self.get_global_stock_news, NEWS_TOP_K)
         # 获取个股新闻
-        stock_news = self.get_stock_news_em(symbol.replace("SH", "").replace("SZ", ""))
-        if stock_news is not None:
-            result["stock_news"] = stock_news.head(10).to_dict(orient="records")
+        tasks["stock_news"] = partial(
+            self.get_stock_news_em, symbol.replace("SH", "").replace("SZ", ""), NEWS_TOP_K
+        )
+
+        if concurrent:
+            fetched = fan_out(tasks, max_workers=max_workers, timeout=timeout)
+        else:
+            fetched = {name: fn() for name, fn in tasks.items()}
+
+        by_statement = {k: fetched.pop(k) for k in STATEMENT_ENDPOINTS}
+        result = self._merge_statements(by_statement, periods)
+        result.update(self._ratios_by_period(by_statement, periods))
+        for name, value in fetched.items():
+            if value is None:
+                continue
+            if name == "stock_value_info":
+                value = self._stock_value_frame(value)
+            elif name == "stock_info":
+                value = self._stock_info_frame(value)
+            result[name] = value
 
         logger.info(f"成功获取 {symbol} 的所有财务数据，包含 {len(result)} 个数据集")
 
@@ -331,37 +580,107 @@ class AkShareClient:
         clean_result = {}
         for k, v in result.items():
             if isinstance(v, pd.DataFrame) and not v.empty:
-                clean_result[k] = v.head(3).dropna(axis=1, how="all").fillna(-999).to_dict(orient="records")
+                # 报表类数据保留最近3期，新闻保留去重后的全部条目（最多NEWS_TOP_K条）
+                if k not in ("global_news", "stock_news"):
+                    v = v.head(3)
+                v = v.dropna(axis=1, how="all").fillna(-999)
+                if format_numbers:
+                    v = convert_large_numbers(v)
+                clean_result[k] = v.to_dict(orient="records")
 
         return clean_result
 
-    def _clean_financial_data(self, df: pd.DataFrame) -> pd.DataFrame:
+    def get_all_financial_data_batch(
+        self,
+        symbols: List[str],
+        periods: List[str] = None,  # type: ignore
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        timeout: float = DEFAULT_TIMEOUT,
+        compact: bool = True,
+    ) -> Dict[str, pd.DataFrame]:
         """
-        清洗财务数据
+        批量获取多只股票的财务数据
+
+        所有股票的请求放入同一个有界线程池并发执行，全球快讯、实时行情等全市场数据只获取一次
+
         Args:
-            df: 原始数据
+            symbols: 股票代码列表 (如: ["SH600000", "SZ000001"])
+            periods: 报告期列表
+            max_workers: 最大并发数
+            timeout: 单个数据接口的超时时间（秒）
+            compact: 是否压缩列类型以减少内存占用，序列化前需用 expand_frame 还原
 
         Returns:
-            DataFrame: 清洗后的数据
+            dict: 每类数据一个DataFrame，通过symbol列区分股票
         """
-        if df is None or df.empty:
-            return df
+        if periods is None:
+            periods = ["年报", "中报"]
+        symbols = list(dict.fromkeys(symbols))
+        logger.info(f"批量获取 {len(symbols)} 只股票的 {'、'.join(periods)} 数据")
+
+        tasks = {("", "global_news"): partial(self.get_global_stock_news, NEWS_TOP_K)}
+        for symbol in symbols:
+            for statement in STATEMENT_ENDPOINTS:
+                tasks[(symbol, statement)] = partial(self.get_statement_by_periods, statement, symbol, periods)
+            tasks[(symbol, "financial_indicators")] = partial(self.get_financial_indicators, symbol)
+            tasks[(symbol, "stock_info")] = partial(self.get_stock_info, symbol)
+            tasks[(symbol, "stock_value_info")] = partial(self.get_stock_value, symbol)
+            tasks[(symbol, "stock_news")] = partial(
+                self.get_stock_news_em, symbol.replace("SH", "").replace("SZ", ""), NEWS_TOP_K
+            )
+        fetched = fan_out(tasks, max_workers=max_workers, timeout=timeout)
+
+        frames: Dict[str, List[pd.DataFrame]] = {}
+
+        def add(name: str, symbol: str, df: Optional[pd.DataFrame]) -> None:
+            if df is not None and not df.empty:
+                frames.setdefault(name, []).append(df.assign(symbol=symbol))
+
+        for symbol in symbols:
+            by_statement = {statement: fetched[(symbol, statement)] for statement in STATEMENT_ENDPOINTS}
+            for name, df in self._merge_statements(by_statement, periods).items():
+                add(name, symbol, df)
+            for name, df in self._ratios_by_period(by_statement, periods).items():
+                add(name, symbol, df)
+            add("financial_indicators", symbol, fetched[(symbol, "financial_indicators")])
+
+            stock_info = fetched[(symbol, "stock_info")]
+            if stock_info is not None:
+                add("stock_info", symbol, self._stock_info_frame(stock_info))
+
+            stock_value_info = fetched[(symbol, "stock_value_info")]
+            if stock_value_info is not None:
+                add("stock_value_info", symbol, self._stock_value_frame(stock_value_info))
+
+            stock_news = fetched[(symbol, "stock_news")]
+            if stock_news is not None:
+                add("stock_news", symbol, stock_news)
 
-        # 删除空行
-        df = df.dropna(how="all")
+        result = {}
+        for name, dfs in frames.items():
+            df = pd.concat(dfs, ignore_index=True)
+            result[name] = df[["symbol"] + [col for col in df.columns if col != "symbol"]]
+        global_news = fetched[("", "global_news")]
+        if global_news is not None:
+            result["global_news"] = global_news
+
+        if compact:
+            result, _ = compact_frames(result)
+        logger.info(f"成功批量获取 {len(symbols)} 只股票的财务数据，包含 {len(result)} 个数据集")
+        return result
 
-        # 数据类型转换
-        for col in df.columns:
-            if df[col].dtype == "object":
-                df[col] = pd.to_numeric(df[col], errors="ignore")  # type: ignore
+    def _clean_financial_data(self, df: pd.DataFrame, endpoint: Optional[str] = None) -> pd.DataFrame:
+        """
+        清洗财务数据
+        Args:
+            df: 原始数据
+            endpoint: 数据来源的akshare接口名，用于复用该接口已推断的列类型
 
-        # 日期列处理
-        date_columns = ["报告日期", "公告日期", "期间"]
-        for col in date_columns:
-            if col in df.columns:
-                df[col] = pd.to_datetime(df[col], errors="ignore")  # type: ignore
+        Returns:
+            DataFrame: 清洗后的数据
+        """
+        return clean_financial_data(df, endpoint)
 
-        return df
 
 if __name__ == "__main__":
     client = AkShareClient()
@@ -0,0 +1,242 @@
+"""
+会话级中间结果存储
+MCP工具之间通过按会话（研究流程的thread_id）隔离的内存存储传递取数结果、分析结论与估值建议，
+取代固定路径的 tmp/data.json、tmp/analysis_result.md 等文件：并发的分析互不覆盖，DataFrame 直接在工具之间传递，
+不再经过JSON文件序列化和重新解析。
+结果同时落盘到 tmp/sessions/<会话>/ 便于排查和进程重启后读取，长时间未访问的会话从内存中清理。
+多进程部署时落盘目录由各工作进程共享：请求没有按会话固定到同一进程时（SESSION_AFFINITY=0），读取前比较落盘文件的
+修改时间，其他进程写入的新结果会替换内存中的旧结果
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+from loguru import logger
+
+from .files import atomic_write
+
+# 落盘目录，设为空字符串时只保存在内存中
+DEFAULT_ARTIFACT_DIR = os.getenv("SESSION_ARTIFACT_DIR", "tmp/sessions")
+# 会话在内存中的保留时间（秒），从最近一次访问起算
+DEFAULT_SESSION_TTL = float(os.getenv("SESSION_ARTIFACT_TTL", str(6 * 3600)))
+# 未指定会话时使用的会话
+DEFAULT_SESSION = "default"
+# 落盘文件的扩展名，依次对应 DataFrame、字符串与其他对象
+SUFFIXES = (".parquet", ".md", ".json")
+
+_SAFE_SESSION = re.compile(r"^[A-Za-z0-9_.-]{1,64}$")
+
+
+def session_dirname(session: str) -> str:
+    """会话对应的目录名，包含特殊字符的会话使用哈希"""
+    if _SAFE_SESSION.match(session) and session not in (".", ".."):
+        return session
+    return hashlib.sha1(session.encode("utf-8")).hexdigest()
+
+
+def _jsonable(value: Any) -> Any:
+    """DataFrame转为记录列表，用于落盘"""
+    if isinstance(value, pd.DataFrame):
+        return value.to_dict(orient="records")
+    if isinstance(value, dict):
+        return {k: _jsonable(v) for k, v in value.items()}
+    return value
+
+
+class _Session:
+    def __init__(self):
+        self.artifacts: Dict[str, Any] = {}
+        # 结果对应的落盘文件版本，用于发现其他进程写入的新结果
+        self.versions: Dict[str, Tuple[int, int]] = {}
+        self.accessed = time.monotonic()
+
+
+class ArtifactStore:
+    """按会话隔离的中间结果存储"""
+
+    def __init__(
+        self,
+        spill_dir: Optional[str] = DEFAULT_ARTIFACT_DIR,
+        ttl: float = DEFAULT_SESSION_TTL,
+        affinity: Optional[bool] = None,
+    ):
+        """
+        Args:
+            spill_dir: 落盘目录，为空时只保存在内存中
+            ttl: 会话在内存中的保留时间（秒），过期后仍可从落盘文件读取
+            affinity: 同一会话的请求是否总由本进程处理，为False时每次读取都检查落盘文件是否被其他进程更新；
+                为空时读取环境变量 SESSION_AFFINITY（为0时为False，默认为True）
+        """
+        self.spill_dir = Path(spill_dir) if spill_dir else None
+        self.ttl = ttl
+        self.affinity = os.getenv("SESSION_AFFINITY", "1") != "0" if affinity is None else affinity
+        self._sessions: Dict[str, _Session] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, session: str, name: str, value: Any = None) -> Optional[Path]:
+        if self.spill_dir is None:
+            return None
+        directory = self.spill_dir / session_dirname(session)
+        if value is None:
+            # 读取时按扩展名查找
+            return next((path for suffix in SUFFIXES if (path := directory / f"{name}{suffix}").is_file()), None)
+        if isinstance(value, pd.DataFrame):
+            suffix = SUFFIXES[0]
+        elif isinstance(value, str):
+            suffix = SUFFIXES[1]
+        else:
+            suffix = SUFFIXES[2]
+        return directory / f"{name}{suffix}"
+
+    @staticmethod
+    def _version(path: Optional[Path]) -> Optional[Tuple[int, int]]:
+        """落盘文件的版本：每次写入都替换为新文件，inode与修改时间可以区分先后两次写入，文件不存在时为None"""
+        try:
+            stat = path.stat() if path is not None else None
+        except OSError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns) if stat is not None else None
+
+    def _evict(self) -> None:
+        """清理过期会话，调用方持有锁"""
+        now = time.monotonic()
+        expired = [key for key, session in self._sessions.items() if now - session.accessed > self.ttl]
+        for key in expired:
+            del self._sessions[key]
+        if expired:
+            logger.info(f"清理过期会话: {len(expired)}个")
+
+    def put(self, session: str, name: str, value: Any) -> None:
+        """
+        保存中间结果
+
+        Args:
+            session: 会话标识
+            name: 结果名称 (如: "data", "analysis_result")
+            value: 结果，DataFrame、字符串或可JSON序列化的对象
+        """
+        with self._lock:
+            self._evict()
+            entry = self._sessions.setdefault(session, _Session())
+            entry.artifacts[name] = value
+            entry.versions.pop(name, None)
+            entry.accessed = time.monotonic()
+
+        path = self._path(session, name, value)
+        if path is None:
+            return
+
+        def write(tmp_path: Path) -> None:
+            if isinstance(value, pd.DataFrame):
+                value.to_parquet(tmp_path, index=False)
+            elif isinstance(value, str):
+                tmp_path.write_text(value, encoding="utf-8")
+            else:
+                tmp_path.write_text(json.dumps(_jsonable(value), ensure_ascii=False, indent=4, default=str), "utf-8")
+
+        try:
+            # 先写临时文件再替换，其他进程不会读到写了一半的文件
+            atomic_write(path, write)
+            for suffix in SUFFIXES:
+                if suffix != path.suffix:
+                    path.with_suffix(suffix).unlink(missing_ok=True)
+        except Exception as e:
+            logger.warning(f"中间结果落盘失败: {session}/{name}, 错误: {str(e)}")
+            return
+        with self._lock:
+            entry = self._sessions.get(session)
+            if entry is not None and entry.artifacts.get(name) is value:
+                entry.versions[name] = self._version(path)
+
+    def get(self, session: str, name: str, default: Any = None) -> Any:
+        """
+        读取中间结果，内存中没有时从落盘文件读取
+
+        Args:
+            session: 会话标识
+            name: 结果名称
+            default: 不存在时的返回值
+
+        Returns:
+            Any: 保存的结果，与其他调用方共享，不应原地修改
+        """
+        path = None if self.affinity else self._path(session, name)
+        version = self._version(path)
+        with self._lock:
+            entry = self._sessions.get(session)
+            if entry is not None:
+                entry.accessed = time.monotonic()
+                # 会话固定在本进程、本进程写入后尚未落盘、或落盘文件未被其他进程更新时，内存中的结果即为最新
+                fresh = self.affinity or version is None or entry.versions.get(name) in (None, version)
+                if name in entry.artifacts and fresh:
+                    return entry.artifacts[name]
+
+        path = path or self._path(session, name)
+        if path is None:
+            return default
+        version = self._version(path)
+        try:
+            if path.suffix == ".parquet":
+                value = pd.read_parquet(path)
+            elif path.suffix == ".md":
+                value = path.read_text(encoding="utf-8")
+            else:
+                value = json.loads(path.read_text(encoding="utf-8"))
+        except Exception as e:
+            logger.warning(f"读取落盘的中间结果失败: {path}, 错误: {str(e)}")
+            return default
+        with self._lock:
+            entry = self._sessions.setdefault(session, _Session())
+            if name in entry.artifacts and entry.versions.get(name) is None:
+                # 读取期间本进程写入了新结果
+                return entry.artifacts[name]
+            entry.artifacts[name] = value
+            entry.versions[name] = version
+        return value
+
+    def names(self, session: str) -> List[str]:
+        """会话中已保存的结果名称"""
+        with self._lock:
+            entry = self._sessions.get(session)
+            return list(entry.artifacts) if entry is not None else []
+
+    def drop(self, session: str) -> None:
+        """从内存中移除会话，落盘文件保留"""
+        with self._lock:
+            self._sessions.pop(session, None)
+
+
+_store: Optional[ArtifactStore] = None
+_store_lock = threading.Lock()
+
+
+def get_artifact_store() -> ArtifactStore:
+    """获取进程内共享的中间结果存储"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ArtifactStore()
+        return _store
+
+
+def configure_artifact_store(**kwargs) -> ArtifactStore:
+    """
+    按给定配置重建进程内共享的中间结果存储，在进程开始处理请求前调用（如多进程部署的工作进程启动时）
+
+    Args:
+        **kwargs: 透传给 ArtifactStore 的参数 (如: affinity)
+
+    Returns:
+        ArtifactStore: 新的共享存储
+    """
+    global _store
+    with _store_lock:
+        _store = ArtifactStore(**kwargs)
+        return _store
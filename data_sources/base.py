@@ -0,0 +1,122 @@
+"""
+akshare客户端基类
+统一封装akshare接口调用与本地缓存
+"""
+
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from .cache import DataCache
+from .replay import get_default_backend
+from .scheduler import AkShareScheduler, get_scheduler
+from .warehouse import FundamentalsWarehouse, get_warehouse
+
+
+class BaseAkShareClient:
+    """带本地缓存的akshare客户端基类"""
+
+    # 仓库中的市场 ("A", "HK")
+    MARKET = ""
+    # 仓库数据集，由子类定义
+    WAREHOUSE_DATASETS: Dict[str, Any] = {}
+
+    def __init__(
+        self,
+        cache: Optional[DataCache] = None,
+        use_cache: bool = True,
+        warehouse: Optional[FundamentalsWarehouse] = None,
+        use_warehouse: bool = True,
+        backend: Optional[Any] = None,
+        scheduler: Optional[AkShareScheduler] = None,
+    ):
+        """
+        Args:
+            cache: 数据缓存，为空时使用默认目录下的Parquet缓存
+            use_cache: 是否启用缓存
+            warehouse: 本地财务数据仓库，为空时使用进程内共享的仓库
+            use_warehouse: 是否通过仓库读取报表与财务指标
+            backend: akshare接口来源（如录制/回放后端），为空时由环境变量决定，默认为akshare模块
+            scheduler: 按上游站点限速的调度器，为空时使用进程内共享的调度器
+        """
+        self.cache = (cache or DataCache()) if use_cache else None
+        self.warehouse = (warehouse or get_warehouse()) if use_warehouse else None
+        # 所有akshare调用都经过调度器，与进程内其他客户端共享各站点的限速
+        self.scheduler = scheduler or get_scheduler()
+        self.ak = self.scheduler.wrap(backend if backend is not None else get_default_backend())
+
+    def _fetch(self, endpoint: str, key: str, refresh: bool = False, **kwargs) -> Optional[pd.DataFrame]:
+        """
+        调用akshare接口，优先读取本地缓存
+
+        Args:
+            endpoint: akshare接口名
+            key: 缓存键，通常为股票代码
+            refresh: 是否跳过缓存直接访问上游（如仓库判断可能已发布新报告时），结果仍写入缓存
+            **kwargs: 透传给akshare接口的参数
+
+        Returns:
+            DataFrame: 接口返回的原始数据
+        """
+
+        def fetcher():
+            return getattr(self.ak, endpoint)(**kwargs)
+
+        if self.cache is None:
+            return fetcher()
+        return self.cache.get_or_fetch(endpoint, key, fetcher, refresh=refresh)
+
+    def _dataset_endpoint(self, dataset: str) -> str:
+        """仓库数据集对应的akshare接口名，由子类实现"""
+        raise NotImplementedError
+
+    def _read_through(
+        self,
+        market: str,
+        dataset: str,
+        symbol: str,
+        fetcher: Callable[[], Optional[pd.DataFrame]],
+        date_column: str = "REPORT_DATE",
+        type_column: Optional[str] = "REPORT_TYPE",
+    ) -> Optional[pd.DataFrame]:
+        """
+        通过本地仓库读取报表类数据，仓库不可用时直接调用fetcher
+
+        Args:
+            market: 市场 ("A", "HK")
+            dataset: 数据集
+            symbol: 仓库中的股票代码
+            fetcher: 获取上游原始数据的函数
+            date_column: 原始数据中的报告期列
+            type_column: 原始数据中的报告类型列
+
+        Returns:
+            DataFrame: 接口返回格式的原始数据
+        """
+        if self.warehouse is None:
+            return fetcher()
+        return self.warehouse.get(market, dataset, symbol, fetcher, date_column, type_column)
+
+    def invalidate_cache(self, symbol: Optional[str] = None, endpoint: Optional[str] = None) -> int:
+        """
+        清除缓存，同时删除仓库中对应的数据，下次读取时重新访问上游
+
+        Args:
+            symbol: 股票代码，为空时清除所有股票
+            endpoint: akshare接口名，为空时清除所有接口
+
+        Returns:
+            int: 删除的缓存与仓库文件数
+        """
+        removed = 0
+        if self.cache is not None:
+            removed += self.cache.invalidate(endpoint=endpoint, symbol=symbol)
+        if self.warehouse is not None:
+            datasets: List[str] = [
+                dataset
+                for dataset in self.WAREHOUSE_DATASETS
+                if endpoint is None or self._dataset_endpoint(dataset) == endpoint
+            ]
+            if datasets:
+                removed += self.warehouse.invalidate(self.MARKET, datasets, symbol)
+        return removed
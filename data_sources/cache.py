@@ -0,0 +1,171 @@
+"""
+本地数据缓存
+以 (endpoint, symbol) 为键，将akshare接口返回的原始DataFrame以Parquet格式落盘，
+按接口设置不同的有效期（TTL）
+"""
+
+import os
+import re
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+import pandas as pd
+from loguru import logger
+from pyarrow import ArrowException
+
+from .files import atomic_write, read_frame_json, write_frame_json
+
+DEFAULT_CACHE_DIR = os.getenv("AKSHARE_CACHE_DIR", "tmp/cache")
+
+DAY = 24 * 3600
+
+# 各接口的缓存有效期（秒）：报表类数据一年只更新几次，行情类数据需要很快过期
+DEFAULT_TTLS: Dict[str, int] = {
+    "stock_balance_sheet_by_report_em": 7 * DAY,
+    "stock_profit_sheet_by_report_em": 7 * DAY,
+    "stock_cash_flow_sheet_by_report_em": 7 * DAY,
+    "stock_financial_abstract_ths": 1 * DAY,
+    "stock_individual_info_em": 1 * DAY,
+    "stock_board_industry_cons_em": 1 * DAY,
+    "stock_zh_a_spot_em": 60,
+    "stock_news_em": 10 * 60,
+    "stock_info_global_sina": 5 * 60,
+    "stock_financial_hk_report_em": 7 * DAY,
+    "stock_financial_hk_analysis_indicator_em": 1 * DAY,
+}
+DEFAULT_TTL = 3600
+
+
+class DataCache:
+    """基于Parquet文件的akshare数据缓存"""
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        ttls: Optional[Dict[str, int]] = None,
+        default_ttl: int = DEFAULT_TTL,
+    ):
+        """
+        Args:
+            cache_dir: 缓存目录，默认读取环境变量 AKSHARE_CACHE_DIR
+            ttls: 按接口覆盖默认有效期（秒）
+            default_ttl: 未配置接口的有效期（秒）
+        """
+        self.cache_dir = Path(cache_dir or DEFAULT_CACHE_DIR)
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.default_ttl = default_ttl
+
+    def ttl(self, endpoint: str) -> int:
+        return self.ttls.get(endpoint, self.default_ttl)
+
+    def _path(self, endpoint: str, symbol: str) -> Path:
+        # 股票代码等键值只保留安全字符，避免生成非法路径
+        name = re.sub(r"[^\w.\-]", "_", symbol or "_") or "_"
+        return self.cache_dir / endpoint / f"{name}.parquet"
+
+    def _candidates(self, endpoint: str, symbol: str):
+        path = self._path(endpoint, symbol)
+        return [(path, pd.read_parquet), (path.with_suffix(".json"), read_frame_json)]
+
+    def get(self, endpoint: str, symbol: str) -> Optional[pd.DataFrame]:
+        """
+        读取缓存
+
+        Args:
+            endpoint: akshare接口名
+            symbol: 股票代码
+
+        Returns:
+            DataFrame: 未过期的缓存数据，不存在或已过期时返回None
+        """
+        for path, reader in self._candidates(endpoint, symbol):
+            try:
+                age = time.time() - path.stat().st_mtime
+            except FileNotFoundError:
+                continue
+            if age > self.ttl(endpoint):
+                return None
+            try:
+                return reader(path)
+            except Exception as e:
+                logger.warning(f"读取缓存失败: {path}, 错误: {str(e)}")
+                return None
+        return None
+
+    def set(self, endpoint: str, symbol: str, df: pd.DataFrame) -> None:
+        """写入缓存，先写临时文件再原子替换，避免并发读到半个文件"""
+        path = self._path(endpoint, symbol)
+
+        def write(tmp_path: Path) -> Optional[Path]:
+            try:
+                df.to_parquet(tmp_path)
+            except (TypeError, ValueError, ArrowException):
+                # 混合类型的object列（如个股信息的value列）无法转为Parquet，退回JSON保存；
+                # 不使用pickle，缓存目录中的文件被替换时读取也不会执行任意代码
+                write_frame_json(df, tmp_path)
+                return path.with_suffix(".json")
+            return None
+
+        try:
+            path = atomic_write(path, write)
+            # 删除另一种格式的旧文件，避免读取到过期数据
+            for stale in (path.with_suffix(".parquet"), path.with_suffix(".json")):
+                if stale != path:
+                    stale.unlink(missing_ok=True)
+        except Exception as e:
+            logger.warning(f"写入缓存失败: {path}, 错误: {str(e)}")
+
+    def get_or_fetch(
+        self, endpoint: str, symbol: str, fetcher: Callable[[], Optional[pd.DataFrame]], refresh: bool = False
+    ) -> Optional[pd.DataFrame]:
+        """
+        优先读取缓存，未命中时调用fetcher获取数据并写入缓存
+
+        Args:
+            endpoint: akshare接口名
+            symbol: 股票代码
+            fetcher: 实际获取数据的函数
+            refresh: 是否跳过缓存直接调用fetcher，结果仍写入缓存
+
+        Returns:
+            DataFrame: 数据
+        """
+        df = None if refresh else self.get(endpoint, symbol)
+        if df is not None:
+            logger.debug(f"命中缓存: {endpoint}, {symbol}")
+            return df
+        df = fetcher()
+        if isinstance(df, pd.DataFrame) and not df.empty:
+            self.set(endpoint, symbol, df)
+        return df
+
+    def invalidate(self, endpoint: Optional[str] = None, symbol: Optional[str] = None) -> int:
+        """
+        删除缓存
+
+        Args:
+            endpoint: 接口名，为空时匹配所有接口
+            symbol: 股票代码，为空时匹配所有股票；同时删除以 "代码_" 开头的子键
+
+        Returns:
+            int: 删除的缓存文件数
+        """
+        if not self.cache_dir.exists():
+            return 0
+        endpoints = [endpoint] if endpoint else [p.name for p in self.cache_dir.iterdir() if p.is_dir()]
+        prefix = self._path("", symbol).stem if symbol is not None else None
+        removed = 0
+        for ep in endpoints:
+            directory = self.cache_dir / ep
+            if not directory.is_dir():
+                continue
+            for path in directory.iterdir():
+                if path.suffix not in (".parquet", ".json"):
+                    continue
+                # 同一股票的多个子键（如港股 "00020_利润表"）以 "代码_" 为前缀
+                if symbol is None or path.stem == prefix or path.stem.startswith(f"{prefix}_"):
+                    path.unlink(missing_ok=True)
+                    removed += 1
+        logger.info(f"清除缓存: endpoint={endpoint}, symbol={symbol}, 共{removed}个文件")
+        return removed
@@ -0,0 +1,142 @@
+"""
+财务数据清洗
+一次性推断数值列并整块转换类型，推断结果按接口缓存，重复调用时跳过推断；
+转换时逐列核对缓存的结果，与当前数据不符的列保持原样
+"""
+
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set
+
+import numpy as np
+import pandas as pd
+
+DATE_COLUMNS = ["报告日期", "公告日期", "期间"]
+
+
+@dataclass
+class FrameSchema:
+    """单个接口的列类型推断结果"""
+
+    numeric: Set[str] = field(default_factory=set)
+    non_numeric: Set[str] = field(default_factory=set)
+
+
+def _to_numeric_block(values: np.ndarray) -> np.ndarray:
+    """将二维object数组整块转为float64，无法转换的值为NaN"""
+    flat = pd.to_numeric(pd.Series(values.ravel(order="F")), errors="coerce").to_numpy(dtype="float64")
+    return flat.reshape(values.shape, order="F")
+
+
+class FinancialDataCleaner:
+    """财务数据清洗器"""
+
+    def __init__(self):
+        self._schemas: Dict[str, FrameSchema] = {}
+        self._lock = threading.Lock()
+
+    def infer_schema(self, df: pd.DataFrame, columns: List[str]) -> FrameSchema:
+        """
+        推断object列中哪些是数值列
+
+        所有非空值都能转为数值的列视为数值列；全为空的列无法判断，不计入结果
+
+        Args:
+            df: 原始数据
+            columns: 待推断的列
+
+        Returns:
+            FrameSchema: 推断结果
+        """
+        schema = FrameSchema()
+        if not columns:
+            return schema
+        values = df[columns].to_numpy(dtype=object)
+        present = ~pd.isna(values)
+        decided = present.any(axis=0)
+        if not decided.any():
+            return schema
+        converted = _to_numeric_block(values[:, decided])
+        numeric_mask = (~np.isnan(converted) | ~present[:, decided]).all(axis=0)
+        for col, is_numeric in zip(np.asarray(columns, dtype=object)[decided], numeric_mask):
+            (schema.numeric if is_numeric else schema.non_numeric).add(col)
+        return schema
+
+    def _schema_for(self, df: pd.DataFrame, object_columns: List[str], endpoint: Optional[str]) -> Set[str]:
+        if endpoint is None:
+            return set(object_columns) - self.infer_schema(df, object_columns).non_numeric
+
+        with self._lock:
+            schema = self._schemas.setdefault(endpoint, FrameSchema())
+            unknown = [col for col in object_columns if col not in schema.numeric and col not in schema.non_numeric]
+        if unknown:
+            inferred = self.infer_schema(df, unknown)
+            with self._lock:
+                schema.numeric |= inferred.numeric
+                schema.non_numeric |= inferred.non_numeric
+        # 尚无法判断的全空列按数值列处理，与逐列 to_numeric 的结果一致
+        return set(object_columns) - schema.non_numeric
+
+    def clean(self, df: pd.DataFrame, endpoint: Optional[str] = None) -> pd.DataFrame:
+        """
+        清洗财务数据
+
+        Args:
+            df: 原始数据
+            endpoint: 数据来源的akshare接口名，用于缓存列类型推断结果；为空时每次重新推断
+
+        Returns:
+            DataFrame: 清洗后的数据
+        """
+        if df is None or df.empty:
+            return df
+
+        # 删除空行
+        df = df.dropna(how="all")
+
+        # 数据类型转换：所有数值列一次性整块转换
+        object_columns = [col for col, dtype in df.dtypes.items() if dtype == object]
+        numeric = self._schema_for(df, object_columns, endpoint)
+        numeric_columns = [col for col in object_columns if col in numeric]
+        if numeric_columns:
+            values = df[numeric_columns].to_numpy(dtype=object)
+            block = _to_numeric_block(values)
+            # 缓存的推断结果来自同一接口的其他股票：本次有非空值无法转换的列保持原样，不强制置为NaN
+            lost = (np.isnan(block) & ~pd.isna(values)).any(axis=0)
+            if lost.any():
+                numeric_columns = [col for col, is_lost in zip(numeric_columns, lost) if not is_lost]
+                block = block[:, ~lost]
+        if numeric_columns:
+            converted = pd.DataFrame(block, index=df.index, columns=numeric_columns)
+            # 不含空值的整数列保持为int64
+            integral = ~np.isnan(block).any(axis=0) & (block == np.floor(block)).all(axis=0)
+            int_columns = [col for col, is_int in zip(numeric_columns, integral) if is_int]
+            if int_columns:
+                converted[int_columns] = converted[int_columns].astype("int64")
+            df = pd.concat([df.drop(columns=numeric_columns), converted], axis=1)[df.columns]
+
+        # 日期列处理
+        for col in DATE_COLUMNS:
+            if col in df.columns:
+                try:
+                    df[col] = pd.to_datetime(df[col])
+                except (TypeError, ValueError):
+                    pass
+
+        return df
+
+    def clear(self, endpoint: Optional[str] = None) -> None:
+        """清除缓存的列类型推断结果"""
+        with self._lock:
+            if endpoint is None:
+                self._schemas.clear()
+            else:
+                self._schemas.pop(endpoint, None)
+
+
+_default_cleaner = FinancialDataCleaner()
+
+
+def clean_financial_data(df: pd.DataFrame, endpoint: Optional[str] = None) -> pd.DataFrame:
+    """使用进程内共享的清洗器清洗财务数据"""
+    return _default_cleaner.clean(df, endpoint)
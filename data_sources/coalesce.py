@@ -0,0 +1,162 @@
+"""
+请求合并与重试
+SingleFlight 让并发的相同请求共享同一次上游调用及其结果，热门股票被多个会话同时分析时上游只被请求一次；
+retry 对网络抖动、上游限流等暂时性错误按指数退避加随机抖动重试
+"""
+
+import json
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import pandas as pd
+import requests
+from loguru import logger
+
+# 视为暂时性错误的异常，上游限流时akshare常因返回非JSON页面而抛出JSONDecodeError
+TRANSIENT_ERRORS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+    requests.exceptions.JSONDecodeError,
+    ConnectionError,
+    TimeoutError,
+)
+# 可以重试的HTTP状态码
+TRANSIENT_STATUS = {429, 500, 502, 503, 504}
+
+
+def call_key(name: str, args: Tuple, kwargs: Dict) -> str:
+    """由接口名和参数计算请求的合并键"""
+    return json.dumps([name, list(args), sorted(kwargs.items())], ensure_ascii=False, default=str)
+
+
+def is_transient(error: BaseException) -> bool:
+    """是否为值得重试的暂时性错误"""
+    if isinstance(error, requests.exceptions.HTTPError):
+        return error.response is not None and error.response.status_code in TRANSIENT_STATUS
+    return isinstance(error, TRANSIENT_ERRORS)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """重试策略"""
+
+    attempts: int = int(os.getenv("AKSHARE_RETRY_ATTEMPTS", "3"))
+    base_delay: float = float(os.getenv("AKSHARE_RETRY_BASE_DELAY", "0.5"))
+    max_delay: float = 8.0
+
+    def delay(self, attempt: int) -> float:
+        """
+        第attempt次失败后的等待时间
+
+        采用full jitter：在 [0, min(max_delay, base_delay * 2^attempt)] 中均匀取值，避免失败的请求同时重试
+
+        Args:
+            attempt: 已失败的次数，从0开始
+
+        Returns:
+            float: 等待秒数
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+
+def retry(
+    fn: Callable[[], Any],
+    policy: RetryPolicy,
+    name: str = "",
+    on_retry: Optional[Callable[[BaseException], None]] = None,
+) -> Any:
+    """
+    执行fn，遇到暂时性错误时按策略重试
+
+    Args:
+        fn: 无参函数
+        policy: 重试策略
+        name: 日志中的请求名称
+        on_retry: 每次重试前的回调，参数为本次的异常
+
+    Returns:
+        Any: fn的返回值，重试用尽后抛出最后一次的异常
+    """
+    for attempt in range(policy.attempts):
+        try:
+            return fn()
+        except Exception as e:
+            if attempt + 1 >= policy.attempts or not is_transient(e):
+                raise
+            delay = policy.delay(attempt)
+            logger.warning(f"请求失败，{delay:.2f}s后第{attempt + 1}次重试: {name}, 错误: {str(e)}")
+            if on_retry is not None:
+                on_retry(e)
+            time.sleep(delay)
+
+
+class _Flight:
+    """一次进行中的请求"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.followers = 0
+
+
+def _private(result: Any) -> Any:
+    """DataFrame结果返回副本"""
+    return result.copy() if isinstance(result, pd.DataFrame) else result
+
+
+class SingleFlight:
+    """合并并发的相同请求"""
+
+    def __init__(self):
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        执行fn，同一key已有请求进行中时等待其结果
+
+        Args:
+            key: 请求的合并键
+            fn: 无参函数
+
+        Returns:
+            tuple: (结果, 是否共享了其他调用方的请求)；多个调用方共享时DataFrame结果各自返回副本，可以放心修改
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                flight.followers += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return _private(flight.result), True
+
+        try:
+            flight.result = fn()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            # 请求结束即移除，之后的调用重新请求上游，由缓存层负责复用结果
+            with self._lock:
+                del self._flights[key]
+                shared = flight.followers > 0
+            flight.done.set()
+        # 有共享方时发起方也拿副本，保证共享方复制的原始结果不会被修改
+        return (_private(flight.result) if shared else flight.result), False
+
+    def in_flight(self) -> int:
+        """进行中的请求数"""
+        with self._lock:
+            return len(self._flights)
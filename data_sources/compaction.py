@@ -0,0 +1,198 @@
+"""
+DataFrame内存压缩
+多公司、多年度的报表数据常驻内存时，将float64降为float32、重复字符串转为category、日期转为int32天数，
+序列化或交给下游计算前再用 expand_frame 还原为常规类型
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+from pandas.api.types import is_datetime64_any_dtype, is_integer_dtype
+
+# 以字符串形式保存日期的常见列
+DATE_COLUMNS = ["REPORT_DATE", "NOTICE_DATE", "UPDATE_DATE", "报告日期", "公告日期", "数据日期"]
+
+# 降为float32后允许的最大相对误差，float32约有7位有效数字
+DEFAULT_RTOL = 1e-6
+# 不同取值占比不超过该值的字符串列转为category
+DEFAULT_CATEGORY_RATIO = 0.5
+
+# 记录已转为天数的日期列，expand_frame 据此还原
+DAY_COLUMNS_ATTR = "day_columns"
+_EPOCH = np.datetime64("1970-01-01", "D")
+
+
+@dataclass
+class CompactionReport:
+    """压缩前后的内存占用（字节）"""
+
+    before: int
+    after: int
+
+    @property
+    def ratio(self) -> float:
+        return self.before / self.after if self.after else 1.0
+
+    def __str__(self) -> str:
+        return f"{self.before / 1024:.1f} KB -> {self.after / 1024:.1f} KB ({self.ratio:.1f}x)"
+
+
+def memory_footprint(df: pd.DataFrame) -> int:
+    """DataFrame占用的内存（字节），包括object列中字符串本身"""
+    return int(df.memory_usage(deep=True).sum())
+
+
+def _downcast_floats(block: np.ndarray, rtol: float) -> np.ndarray:
+    """
+    float64矩阵整体转为float32，返回各列是否可以降精度
+
+    溢出或相对误差超过rtol的列不能降精度，NaN不参与比较
+    """
+    with np.errstate(over="ignore", invalid="ignore"):
+        narrowed = block.astype("float32")
+        error = np.abs(narrowed.astype("float64") - block)
+        within = (error <= rtol * np.abs(block)) | ~np.isfinite(block)
+    overflow = np.isinf(narrowed) & np.isfinite(block)
+    return within.all(axis=0) & ~overflow.any(axis=0)
+
+
+def _is_date_only(values: pd.Series) -> bool:
+    """日期时间列是否只含日期（时间部分均为0点），带时间的列转为天数会丢失信息"""
+    present = values.dropna()
+    return bool((present == present.dt.normalize()).all())
+
+
+def _to_days(values: pd.Series) -> pd.Series:
+    days = values.to_numpy(dtype="datetime64[D]")
+    missing = np.isnat(days)
+    numbers = (days - _EPOCH).astype("int64")
+    if missing.any():
+        # 含缺失值时使用可空的Int32
+        days = pd.array(np.where(missing, 0, numbers).astype("int32"), dtype="Int32")
+        days[missing] = pd.NA
+        return pd.Series(days, index=values.index, name=values.name)
+    return pd.Series(numbers.astype("int32"), index=values.index, name=values.name)
+
+
+def compact_frame(
+    df: pd.DataFrame,
+    rtol: float = DEFAULT_RTOL,
+    category_ratio: float = DEFAULT_CATEGORY_RATIO,
+    date_columns: Optional[Iterable[str]] = None,
+) -> pd.DataFrame:
+    """
+    压缩DataFrame的列类型
+
+    Args:
+        df: 原始数据
+        rtol: float64降为float32时允许的最大相对误差，超出的列保持float64
+        category_ratio: 不同取值占比不超过该值的字符串列转为category
+        date_columns: 需要转为天数的字符串日期列，默认为 DATE_COLUMNS 中存在的列；不带时间的datetime列总会转换
+
+    Returns:
+        DataFrame: 压缩后的数据，转为天数的日期列记录在 attrs["day_columns"] 中
+    """
+    if df is None or df.empty:
+        return df
+
+    date_columns = set(DATE_COLUMNS if date_columns is None else date_columns)
+    columns: Dict[str, pd.Series] = {}
+    day_columns = list(df.attrs.get(DAY_COLUMNS_ATTR, []))
+
+    # float64列拼成一个矩阵整体判断能否降为float32
+    float_cols = [col for col, dtype in df.dtypes.items() if dtype == "float64"]
+    narrowed = pd.DataFrame(index=df.index)
+    if float_cols:
+        block = df[float_cols].to_numpy(dtype="float64")
+        narrow = _downcast_floats(block, rtol)
+        narrowed = pd.DataFrame(
+            block[:, narrow].astype("float32"), index=df.index, columns=np.asarray(float_cols, dtype=object)[narrow]
+        )
+
+    for col in df.columns:
+        if col in narrowed.columns:
+            continue
+        values = df[col]
+        if is_integer_dtype(values.dtype) and not isinstance(values.dtype, pd.api.extensions.ExtensionDtype):
+            values = pd.to_numeric(values, downcast="integer")
+        elif is_datetime64_any_dtype(values.dtype):
+            if getattr(values.dtype, "tz", None) is None and _is_date_only(values):
+                values = _to_days(values)
+                day_columns.append(col)
+        elif values.dtype == object:
+            if col in date_columns:
+                parsed = pd.to_datetime(values, errors="coerce")
+                # 只有全部非空值都能解析为不带时间的日期时才转换
+                if parsed.notna().sum() == values.notna().sum() and _is_date_only(parsed):
+                    columns[col] = _to_days(parsed)
+                    day_columns.append(col)
+                    continue
+            try:
+                if values.nunique(dropna=True) <= category_ratio * len(values):
+                    values = values.astype("category")
+            except TypeError:
+                # 含有dict/list等不可哈希元素的列保持原样
+                pass
+        columns[col] = values
+
+    result = pd.concat([narrowed, pd.DataFrame(columns, index=df.index)], axis=1)[df.columns]
+    result.attrs = {**df.attrs, DAY_COLUMNS_ATTR: list(dict.fromkeys(day_columns))}
+    return result
+
+
+def expand_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    将 compact_frame 的结果还原为常规类型：天数转回datetime，category转回object，float32转回float64
+
+    Args:
+        df: 压缩后的数据
+
+    Returns:
+        DataFrame: 还原后的数据
+    """
+    if df is None or df.empty:
+        return df
+
+    day_columns = set(df.attrs.get(DAY_COLUMNS_ATTR, []))
+    columns: Dict[str, pd.Series] = {}
+    for col in df.columns:
+        values = df[col]
+        if col in day_columns:
+            values = pd.to_datetime(values.astype("float64"), unit="D")
+        elif isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.astype(object)
+        elif values.dtype == "float32":
+            values = values.astype("float64")
+        columns[col] = values
+    result = pd.DataFrame(columns, index=df.index)
+    result.attrs = {k: v for k, v in df.attrs.items() if k != DAY_COLUMNS_ATTR}
+    return result
+
+
+def compact_frames(frames: Dict[str, pd.DataFrame], **kwargs) -> Tuple[Dict[str, pd.DataFrame], CompactionReport]:
+    """
+    压缩多个DataFrame并汇总内存占用
+
+    Args:
+        frames: 名称到数据的映射
+        **kwargs: 透传给 compact_frame 的参数
+
+    Returns:
+        tuple: (压缩后的数据, 压缩前后的内存占用)
+    """
+    before = after = 0
+    result = {}
+    for name, df in frames.items():
+        if not isinstance(df, pd.DataFrame):
+            result[name] = df
+            continue
+        compacted = compact_frame(df, **kwargs)
+        before += memory_footprint(df)
+        after += memory_footprint(compacted)
+        result[name] = compacted
+    report = CompactionReport(before=before, after=after)
+    logger.info(f"数据压缩: {report}")
+    return result, report
@@ -0,0 +1,76 @@
+"""
+并发执行工具
+将多个相互独立的数据请求放入有界线程池并发执行，单个请求超时不影响其他请求
+"""
+
+import math
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Hashable
+
+from loguru import logger
+
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_TIMEOUT = 30.0
+
+
+def fan_out(
+    tasks: Dict[Hashable, Callable[[], Any]],
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    timeout: float = DEFAULT_TIMEOUT,
+) -> Dict[Hashable, Any]:
+    """
+    并发执行多个无参任务
+
+    Args:
+        tasks: 任务名到任务函数的映射
+        max_workers: 最大并发数
+        timeout: 单个任务从开始执行起的超时时间（秒）
+
+    Returns:
+        dict: 任务名到结果的映射，顺序与tasks一致；失败或超时的任务结果为None
+    """
+    if not tasks:
+        return {}
+
+    started: Dict[Hashable, float] = {}
+
+    def run(name: Hashable, fn: Callable[[], Any]) -> Any:
+        started[name] = time.monotonic()
+        return fn()
+
+    # 所有线程都被卡住时，排队中的任务最多等待这么久
+    queue_deadline = time.monotonic() + timeout * math.ceil(len(tasks) / max_workers)
+    results: Dict[Hashable, Any] = {name: None for name in tasks}
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fan_out")
+    futures = {executor.submit(run, name, fn): name for name, fn in tasks.items()}
+    pending = set(futures)
+    try:
+        while pending:
+            now = time.monotonic()
+            deadlines = [started[futures[f]] + timeout for f in pending if futures[f] in started]
+            wait_for = max(min(deadlines + [queue_deadline]) - now, 0)
+            done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                name = futures[future]
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    logger.error(f"并发任务失败: {name}, 错误: {str(e)}")
+
+            now = time.monotonic()
+            expired = {
+                f
+                for f in pending
+                if (futures[f] in started and now - started[futures[f]] >= timeout) or now >= queue_deadline
+            }
+            for future in expired:
+                future.cancel()
+                logger.warning(f"并发任务超时: {futures[future]}, 超时时间: {timeout}s")
+            pending -= expired
+    finally:
+        # 不等待超时任务结束，避免慢接口拖住调用方
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return results
@@ -0,0 +1,45 @@
+"""
+文件读写
+缓存、报表仓库、估值数据与中间结果共用的原子写入：先写临时文件再替换目标文件，
+并发读取的线程和其他工作进程不会读到写了一半的文件；
+无法转为Parquet的DataFrame以JSON保存，不使用pickle，读取被替换的文件时不会执行任意代码
+"""
+
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Optional
+
+import pandas as pd
+
+
+def atomic_write(path: Path, write: Callable[[Path], Optional[Path]]) -> Path:
+    """
+    先写临时文件再原子替换目标文件，写入失败时删除临时文件并抛出异常
+
+    Args:
+        path: 目标文件
+        write: 将内容写入给定临时文件的函数，返回值不为空时作为实际的目标文件（如退回其他格式保存时更换后缀）
+
+    Returns:
+        Path: 实际写入的目标文件
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # 临时文件名带上进程和线程，同时写同一目标的写入方互不覆盖
+    tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        target = write(tmp_path) or path
+        os.replace(tmp_path, target)
+        return target
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def write_frame_json(df: pd.DataFrame, path: Path) -> None:
+    """以JSON保存无法转为Parquet的DataFrame（如混合类型的object列）"""
+    df.to_json(path, orient="split", force_ascii=False, date_format="iso")
+
+
+def read_frame_json(path: Path) -> pd.DataFrame:
+    """读取write_frame_json保存的DataFrame，保持原有取值不做类型推断"""
+    return pd.read_json(path, orient="split", dtype=False, convert_dates=False)
@@ -0,0 +1,99 @@
+"""
+数值格式化
+将大额数值转换为 亿/万 为单位的字符串，A股与港股数据共用
+"""
+
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_numeric_dtype
+
+
+def _format_block(numbers: np.ndarray, precision: int = 2) -> np.ndarray:
+    """
+    格式化任意形状的float数组
+
+    单位（亿/万）和格式串用np.select整块选出，最后只剩一次逐元素的字符串格式化
+
+    Args:
+        numbers: float64数组
+        precision: 小数位数
+
+    Returns:
+        ndarray: 同形状的object数组
+    """
+    flat = numbers.ravel()
+    abs_flat = np.abs(flat)
+    is_yi = abs_flat >= 1e8
+    is_wan = ~is_yi & (abs_flat >= 1e4)
+    scaled = flat / np.select([is_yi, is_wan], [1e8, 1e4], 1.0)
+    # 小于1万的整数保持原样，其余保留precision位小数
+    is_integer = ~is_yi & ~is_wan & (flat == np.floor(flat))
+    formats = np.array([f"%.{precision}f", f"%.{precision}f亿", f"%.{precision}f万", "%.0f"], dtype=object)
+    chosen = formats[np.select([is_integer, is_yi, is_wan], [3, 1, 2], 0)]
+    text = [fmt % value for fmt, value in zip(chosen.tolist(), scaled.tolist())]
+    return np.array(text, dtype=object).reshape(numbers.shape)
+
+
+def format_large_numbers(values: pd.Series, precision: int = 2) -> pd.Series:
+    """
+    将一列数值格式化为带 亿/万 单位的字符串
+
+    Args:
+        values: 数值列
+        precision: 小数位数
+
+    Returns:
+        Series: 格式化后的字符串列，无法转为数值的元素保持原样
+    """
+    numbers = pd.to_numeric(values, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    formatted = pd.Series(_format_block(numbers, precision), index=values.index, dtype=object)
+    if values.dtype == object:
+        # 非数值元素（包括None）保持原样，float类型的NaN仍格式化为"nan"
+        failed = np.isnan(numbers) & ~values.map(lambda v: isinstance(v, float)).to_numpy(dtype=bool)
+        formatted[failed] = values[failed]
+    return formatted
+
+
+def convert_large_numbers(
+    df: pd.DataFrame, columns: Optional[List[str]] = None, precision: int = 2, inplace: bool = False
+) -> Optional[pd.DataFrame]:
+    """
+    将DataFrame中的大额数值转换为 亿/万 为单位的字符串
+
+    Args:
+        df: 原始数据
+        columns: 待转换的列，为空时转换所有数值列
+        precision: 小数位数
+        inplace: 是否原地修改
+
+    Returns:
+        DataFrame: 转换后的数据，inplace为True时返回None
+    """
+    # 选择要处理的列
+    if columns is None:
+        # 自动选择所有数值型列
+        num_cols = list(df.select_dtypes(include=["int64", "float64"]).columns)
+    else:
+        # 使用指定的列
+        num_cols = [col for col in columns if col in df.columns]
+
+    # 数值列拼成一个二维数组整体格式化，其余列逐列回退处理；可空类型（Int64/Float64）的pd.NA按NaN处理
+    block_cols = [col for col in num_cols if is_numeric_dtype(df[col])]
+    if block_cols:
+        block = _format_block(df[block_cols].to_numpy(dtype="float64", na_value=np.nan), precision)
+        formatted = pd.DataFrame(block, index=df.index, columns=block_cols)
+        if inplace:
+            df[block_cols] = formatted
+        else:
+            # 整块拼接比逐列赋值快得多，宽表上尤其明显
+            df = pd.concat([df.drop(columns=block_cols), formatted], axis=1)[df.columns]
+    elif not inplace:
+        df = df.copy()
+
+    for col in num_cols:
+        if col not in block_cols:
+            df[col] = format_large_numbers(df[col], precision)
+
+    return None if inplace else df
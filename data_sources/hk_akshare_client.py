@@ -1,85 +1,105 @@
-import akshare as ak
 import pandas as pd
-from typing import Dict, List, Optional
-from datetime import datetime
+from typing import Dict, Optional
+from functools import partial
 from loguru import logger
 
-def convert_large_numbers(df, columns=None, precision=2, inplace=False):
-    # 选择要处理的列
-    if columns is None:
-        # 自动选择所有数值型列
-        num_cols = df.select_dtypes(include=['int64', 'float64']).columns
-    else:
-        # 使用指定的列
-        num_cols = [col for col in columns if col in df.columns]
-    
-    # 原地操作或创建副本
-    if not inplace:
-        df = df.copy()
-    
-    # 转换函数
-    def format_number(x):
-        try:
-            x = float(x)
-            abs_x = abs(x)
-            if abs_x >= 1e8:  # 1亿以上
-                return f"{x/1e8:.{precision}f}亿"
-            elif abs_x >= 1e4:  # 1万以上
-                return f"{x/1e4:.{precision}f}万"
-            else:
-                # 小于1万保持原样，移除多余的小数点
-                return f"{x:.0f}" if x.is_integer() else f"{x:.{precision}f}"
-        except (TypeError, ValueError):
-            return x  # 非数值类型保持原样
-    
-    # 应用转换
-    for col in num_cols:
-        df[col] = df[col].apply(format_number)
-    
-    return None if inplace else df
+from .base import BaseAkShareClient
+from .executor import DEFAULT_MAX_WORKERS, DEFAULT_TIMEOUT, fan_out
+from .formatting import convert_large_numbers
+from .pivot import pivot_statement, pivot_statements
+
+# 港股报表名到返回结果键的映射
+HK_STATEMENTS = {
+    "资产负债表": "balance_sheet",
+    "利润表": "income_statement",
+    "现金流量表": "cash_flow_statement",
+}
 
 
 def clean_df(df):
-    df = convert_large_numbers(df).head(3)
+    # 只保留最近3期；金额换算与表格排版在生成提示词时进行（见 prompt_data）
+    df = df.head(3)
     df = df.dropna(axis=1, how='any')
-    return df.to_html(index=False)
-    # return df.to_markdown(index=False)
-
-
-def trans_table(df):
-    # 创建透视表
-    pivot_df = pd.pivot_table(
-        df,
-        index=["REPORT_DATE"],
-        columns=["STD_ITEM_NAME"],
-        values="AMOUNT"  # 注意：这里使用values="AMOUNT"而非["AMOUNT"]
-    ).sort_index(ascending=False).reset_index()
-    
-    # 扁平化列名：将多级列名转换为单级列名
-    pivot_df.columns = [
-        col[0] if col[1] == '' else f"{col[1]}"  # 处理索引列和其他列
-        for col in pivot_df.columns
-    ]
-    return pivot_df
-
-
-class HkAkShareClient:
-    def get_fin_data(self, stock_code: str) -> Dict:
-        balance = ak.stock_financial_hk_report_em(stock=stock_code, symbol="资产负债表")
-        income = ak.stock_financial_hk_report_em(stock=stock_code, symbol="利润表")
-        cash_flow = ak.stock_financial_hk_report_em(stock=stock_code, symbol="现金流量表")
-
-        balance = trans_table(balance)
-        income = trans_table(income)
-        cash_flow = trans_table(cash_flow)
-
-        indicator = ak.stock_financial_hk_analysis_indicator_em(symbol=stock_code)
-        return {
-            "balance_sheet": clean_df(balance),
-            "income_statement": clean_df(income),
-            "cash_flow_statement": clean_df(cash_flow),
-            "analysis_indicator": clean_df(indicator)
-        }
+    return df.reset_index(drop=True)
+
+
+def to_html(df):
+    # 需要HTML表格时使用，大额数值换算为 亿/万
+    return convert_large_numbers(df).to_html(index=False)
+
+
+def trans_table(df, statement="default"):
+    # 长表转宽表：REPORT_DATE为行、STD_ITEM_NAME为列、AMOUNT为值
+    return pivot_statement(df, statement)
+
+
+class HkAkShareClient(BaseAkShareClient):
+    """港股AkShare数据客户端"""
+
+    MARKET = "HK"
+    # 仓库数据集: 报表名，财务指标为None
+    WAREHOUSE_DATASETS = {**{key: statement for statement, key in HK_STATEMENTS.items()}, "indicator": None}
+
+    def load_dataset(self, dataset: str, stock_code: str) -> Optional[pd.DataFrame]:
+        """
+        通过本地仓库获取报表（长表）或财务指标的原始数据
+
+        Args:
+            dataset: 数据集 ("balance_sheet", "income_statement", "cash_flow_statement", "indicator")
+            stock_code: 港股代码
+
+        Returns:
+            DataFrame: 接口返回格式的原始数据
+        """
+        statement = self.WAREHOUSE_DATASETS[dataset]
+        endpoint = self._dataset_endpoint(dataset)
+        # 仓库只在可能已发布新报告时调用fetcher，此时跳过缓存
+        if statement is None:
+            fetcher = partial(self._fetch, endpoint, stock_code, refresh=True, symbol=stock_code)
+        else:
+            key = f"{stock_code}_{statement}"
+            fetcher = partial(self._fetch, endpoint, key, refresh=True, stock=stock_code, symbol=statement)
+        return self._read_through(self.MARKET, dataset, stock_code, fetcher, "REPORT_DATE", "DATE_TYPE_CODE")
+
+    def _dataset_endpoint(self, dataset: str) -> str:
+        if self.WAREHOUSE_DATASETS[dataset] is None:
+            return "stock_financial_hk_analysis_indicator_em"
+        return "stock_financial_hk_report_em"
+
+    def get_fin_data(
+        self, stock_code: str, max_workers: int = DEFAULT_MAX_WORKERS, timeout: float = DEFAULT_TIMEOUT
+    ) -> Dict:
+        """
+        获取港股财务数据，三大报表与财务指标并发获取，单个接口失败时返回其余部分
+
+        Args:
+            stock_code: 港股代码 (如: 00020)
+            max_workers: 最大并发数
+            timeout: 单个数据接口的超时时间（秒）
+
+        Returns:
+            dict: 各报表与财务指标最近3期的DataFrame，获取失败的报表不包含在内
+        """
+        logger.info(f"获取港股财务数据: {stock_code}")
+        tasks = {dataset: partial(self.load_dataset, dataset, stock_code) for dataset in self.WAREHOUSE_DATASETS}
+        fetched = fan_out(tasks, max_workers=max_workers, timeout=timeout)
+
+        # 三张报表在同一次矩阵填充中完成转换
+        pivots = pivot_statements({key: fetched[key] for key in HK_STATEMENTS.values()})
+        tables = {key: pivots.get(key) for key in HK_STATEMENTS.values()}
+        tables["analysis_indicator"] = fetched["indicator"]
+
+        result = {}
+        for key, df in tables.items():
+            if df is None or df.empty:
+                logger.warning(f"未获取到港股数据: {stock_code}, {key}")
+                continue
+            result[key] = clean_df(df)
+        if not result:
+            raise ValueError(f"未获取到港股财务数据: {stock_code}")
+        logger.info(f"成功获取港股财务数据: {stock_code}, 包含 {len(result)} 个数据集")
+        return result
+
 
 if __name__ == "__main__":
     client = HkAkShareClient()
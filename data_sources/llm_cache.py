@@ -0,0 +1,198 @@
+"""
+大模型结果缓存
+以 (提示词模板, 序列化后的数据, idea, 模型, temperature 等生成参数) 的哈希为键，把 data_analysis、corp_valuation
+的回答保存在SQLite中。同一天重复分析同一家公司、输入完全相同时直接返回上次的回答，不再消耗token。
+条目超过有效期后失效，条目数超过上限时按最近访问时间淘汰；SQLite文件可以被多个服务进程共享
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from loguru import logger
+
+DEFAULT_LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "tmp/llm_cache.sqlite")
+# 回答的有效期（秒），为0时不使用缓存
+DEFAULT_LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(24 * 3600)))
+# 最多保留的回答数
+DEFAULT_LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "2000"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    model TEXT,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS llm_cache_accessed ON llm_cache (accessed);
+"""
+
+
+def llm_cache_key(template: str, data: Any, idea: str, model: str, temperature: float, **params) -> str:
+    """
+    计算缓存键
+
+    Args:
+        template: 提示词模板
+        data: 填入模板的数据，按键排序后序列化，字典顺序不同不影响结果
+        idea: 分析思路
+        model: 模型名称
+        temperature: 采样温度
+        **params: 其他影响回答的参数 (如: system, max_tokens)
+
+    Returns:
+        str: sha256十六进制摘要
+    """
+    payload = json.dumps(
+        [template, data, idea, model, temperature, params], ensure_ascii=False, sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """基于SQLite的大模型结果缓存"""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ttl: float = DEFAULT_LLM_CACHE_TTL,
+        max_entries: int = DEFAULT_LLM_CACHE_SIZE,
+    ):
+        """
+        Args:
+            path: SQLite文件路径，默认读取环境变量 LLM_CACHE_PATH，":memory:" 时只保存在内存中
+            ttl: 回答的有效期（秒），为0时不读写缓存
+            max_entries: 最多保留的回答数，超出时淘汰最久未访问的回答
+        """
+        self.path = path or DEFAULT_LLM_CACHE_PATH
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def _connect(self) -> sqlite3.Connection:
+        """延迟打开连接，调用方持有锁"""
+        if self._conn is None:
+            if self.path != ":memory:":
+                Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+            # WAL模式下多个进程可以同时读，写入互不阻塞读取
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        读取缓存的回答
+
+        Args:
+            key: 缓存键，见 llm_cache_key
+
+        Returns:
+            str: 有效期内的回答，不存在或已过期时返回None
+        """
+        if not self.enabled:
+            return None
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connect()
+                row = conn.execute("SELECT value, created FROM llm_cache WHERE key = ?", (key,)).fetchone()
+                if row is not None and now - row[1] > self.ttl:
+                    conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    row = None
+                if row is None:
+                    self.misses += 1
+                    return None
+                conn.execute("UPDATE llm_cache SET accessed = ? WHERE key = ?", (now, key))
+                self.hits += 1
+                return row[0]
+        except sqlite3.Error as e:
+            logger.warning(f"读取大模型结果缓存失败: {key}, 错误: {str(e)}")
+            return None
+
+    def put(self, key: str, value: str, model: Optional[str] = None) -> None:
+        """
+        保存回答，并清理过期与超出数量上限的条目
+
+        Args:
+            key: 缓存键
+            value: 模型回答
+            model: 模型名称，仅用于排查
+        """
+        if not self.enabled or not value:
+            return
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO llm_cache (key, value, model, created, accessed) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (key, value, model, now, now),
+                    )
+                    conn.execute("DELETE FROM llm_cache WHERE created < ?", (now - self.ttl,))
+                    conn.execute(
+                        "DELETE FROM llm_cache WHERE key IN "
+                        "(SELECT key FROM llm_cache ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                        (self.max_entries,),
+                    )
+                    conn.execute("COMMIT")
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+        except sqlite3.Error as e:
+            logger.warning(f"写入大模型结果缓存失败: {key}, 错误: {str(e)}")
+
+    def clear(self) -> int:
+        """清空缓存，返回删除的条目数"""
+        with self._lock:
+            return self._connect().execute("DELETE FROM llm_cache").rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        缓存统计
+
+        Returns:
+            dict: 本进程的命中数hits、未命中数misses、命中率hit_rate，以及缓存中的条目数entries
+        """
+        with self._lock:
+            entries = 0
+            if self.enabled:
+                entries = self._connect().execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": entries,
+            }
+
+
+_cache: Optional[LLMCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMCache:
+    """获取进程内共享的大模型结果缓存"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMCache()
+        return _cache
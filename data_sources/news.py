@@ -0,0 +1,229 @@
+"""
+增量新闻存储
+每个新闻源（个股新闻、全球快讯）在内存中保存一份按发布时间降序排列的新闻列表，并记录已入库的最新publish_time。
+刷新时只接收不早于该时间的新闻，用SimHash指纹剔除多家媒体转载的近似重复新闻，查询时直接返回最新的K条
+"""
+
+import hashlib
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Set
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+# 两次访问上游新闻接口的最小间隔（秒）
+DEFAULT_REFRESH_INTERVAL = float(os.getenv("NEWS_REFRESH_INTERVAL", "600"))
+# 每个新闻源在内存中保留的最大条数
+DEFAULT_MAX_ITEMS = 500
+# 汉明距离不超过该值的两条新闻视为近似重复
+DEFAULT_DISTANCE = 3
+
+FINGERPRINT_BITS = 64
+FINGERPRINT_COLUMN = "simhash"
+# 指纹分为 DEFAULT_DISTANCE + 1 段，距离不超过阈值的两个指纹至少有一段完全相同
+BANDS = DEFAULT_DISTANCE + 1
+_BAND_WIDTH = FINGERPRINT_BITS // BANDS
+_SHIFTS = np.arange(FINGERPRINT_BITS, dtype=np.uint64)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def simhash(text: str, ngram: int = 3) -> int:
+    """
+    计算文本的64位SimHash指纹
+
+    中文不分词，直接以字符n-gram作为特征
+
+    Args:
+        text: 文本
+        ngram: 特征的字符数
+
+    Returns:
+        int: 64位指纹
+    """
+    text = _WHITESPACE.sub("", text or "")
+    grams = [text[i : i + ngram] for i in range(max(len(text) - ngram + 1, 1))]
+    hashes, counts = np.unique(
+        np.fromiter(
+            (int.from_bytes(hashlib.blake2b(g.encode("utf-8"), digest_size=8).digest(), "little") for g in grams),
+            dtype=np.uint64,
+            count=len(grams),
+        ),
+        return_counts=True,
+    )
+    # 每一位按特征出现次数加权投票，多数为1的位在指纹中置1
+    ones = (((hashes[:, None] >> _SHIFTS) & np.uint64(1)) * counts[:, None]).sum(axis=0)
+    return sum(1 << int(bit) for bit in np.flatnonzero(ones * 2 > len(grams)))
+
+
+def _bands(fingerprint: int) -> List[int]:
+    mask = (1 << _BAND_WIDTH) - 1
+    return [(i << _BAND_WIDTH) | ((fingerprint >> (i * _BAND_WIDTH)) & mask) for i in range(BANDS)]
+
+
+class SimHashIndex:
+    """SimHash近似重复索引，按指纹分段分桶，只与同桶的指纹比较汉明距离"""
+
+    def __init__(self, distance: int = DEFAULT_DISTANCE):
+        self.distance = distance
+        self._buckets: Dict[int, Set[int]] = {}
+
+    def find(self, fingerprint: int) -> Optional[int]:
+        """返回索引中与fingerprint近似重复的指纹，没有时返回None"""
+        for band in _bands(fingerprint):
+            for other in self._buckets.get(band, ()):
+                if (fingerprint ^ other).bit_count() <= self.distance:
+                    return other
+        return None
+
+    def add(self, fingerprint: int) -> None:
+        for band in _bands(fingerprint):
+            self._buckets.setdefault(band, set()).add(fingerprint)
+
+
+@dataclass
+class NewsFeed:
+    """单个新闻源的内存状态"""
+
+    items: pd.DataFrame
+    index: SimHashIndex
+    watermark: Optional[pd.Timestamp] = None
+    fetched_at: Optional[float] = None
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class NewsStore:
+    """增量新闻存储"""
+
+    def __init__(
+        self,
+        refresh_interval: float = DEFAULT_REFRESH_INTERVAL,
+        max_items: int = DEFAULT_MAX_ITEMS,
+        distance: int = DEFAULT_DISTANCE,
+    ):
+        """
+        Args:
+            refresh_interval: 两次访问上游接口的最小间隔（秒），默认读取环境变量 NEWS_REFRESH_INTERVAL
+            max_items: 每个新闻源保留的最大条数
+            distance: 近似重复的汉明距离阈值，不超过 DEFAULT_DISTANCE
+        """
+        self.refresh_interval = refresh_interval
+        self.max_items = max_items
+        self.distance = min(distance, DEFAULT_DISTANCE)
+        self._feeds: Dict[str, NewsFeed] = {}
+        self._feeds_lock = threading.Lock()
+
+    def _feed(self, key: str) -> NewsFeed:
+        with self._feeds_lock:
+            if key not in self._feeds:
+                self._feeds[key] = NewsFeed(items=pd.DataFrame(), index=SimHashIndex(self.distance))
+            return self._feeds[key]
+
+    def ingest(self, key: str, df: pd.DataFrame, text_columns: Optional[List[str]] = None) -> int:
+        """
+        写入新闻，只接收不早于水位线的新闻并剔除近似重复
+
+        Args:
+            key: 新闻源标识 (如: "stock_news_em/603777")
+            df: 标准化后的新闻数据，需包含datetime类型的publish_time列
+            text_columns: 计算指纹的文本列，默认为title和content中存在的列
+
+        Returns:
+            int: 新入库的条数
+        """
+        feed = self._feed(key)
+        with feed.lock:
+            return self._ingest(feed, df, text_columns)
+
+    def _ingest(self, feed: NewsFeed, df: pd.DataFrame, text_columns: Optional[List[str]]) -> int:
+        if df is None or df.empty:
+            return 0
+        df = df.assign(publish_time=pd.to_datetime(df["publish_time"]).astype("datetime64[ns]"))
+        if feed.watermark is not None:
+            # 与水位线同一时刻发布的新闻也要接收，已入库的会作为完全重复被剔除
+            df = df[df["publish_time"] >= feed.watermark]
+        # 按时间升序处理，同一事件保留最早发布的一条
+        df = df.sort_values("publish_time", kind="stable")
+        columns = text_columns or [col for col in ("title", "content") if col in df.columns]
+        texts = df[columns].fillna("").astype(str).agg(" ".join, axis=1) if columns else pd.Series("", index=df.index)
+
+        keep, fingerprints = [], []
+        for text in texts:
+            fingerprint = simhash(text)
+            duplicate = feed.index.find(fingerprint) is not None
+            if not duplicate:
+                feed.index.add(fingerprint)
+                fingerprints.append(fingerprint)
+            keep.append(not duplicate)
+        new_items = df[keep].assign(**{FINGERPRINT_COLUMN: np.array(fingerprints, dtype=np.uint64)})
+        if new_items.empty:
+            return 0
+
+        items = pd.concat([new_items, feed.items], ignore_index=True) if not feed.items.empty else new_items
+        items = items.sort_values("publish_time", ascending=False, kind="stable").reset_index(drop=True)
+        if len(items) > self.max_items:
+            # 超出上限时丢弃最旧的新闻，并用保留下来的指纹重建索引
+            items = items.head(self.max_items)
+            feed.index = SimHashIndex(self.distance)
+            for fingerprint in items[FINGERPRINT_COLUMN].tolist():
+                feed.index.add(int(fingerprint))
+        feed.items = items
+        feed.watermark = items["publish_time"].max()
+        logger.info(f"新闻入库{len(new_items)}条，剔除近似重复{len(df) - len(new_items)}条")
+        return len(new_items)
+
+    def get(
+        self,
+        key: str,
+        fetcher: Callable[[], Optional[pd.DataFrame]],
+        top_k: Optional[int] = None,
+        text_columns: Optional[List[str]] = None,
+    ) -> pd.DataFrame:
+        """
+        获取最新的K条新闻，超过刷新间隔时先增量拉取
+
+        Args:
+            key: 新闻源标识
+            fetcher: 获取标准化新闻数据的函数
+            top_k: 返回条数，为空时返回全部
+            text_columns: 计算指纹的文本列
+
+        Returns:
+            DataFrame: 按发布时间降序排列的新闻
+        """
+        feed = self._feed(key)
+        with feed.lock:
+            if feed.fetched_at is None or time.monotonic() - feed.fetched_at >= self.refresh_interval:
+                try:
+                    self._ingest(feed, fetcher(), text_columns)
+                    feed.fetched_at = time.monotonic()
+                except Exception as e:
+                    if feed.fetched_at is None:
+                        raise
+                    # 刷新失败时仍返回已入库的新闻
+                    logger.error(f"刷新新闻失败: {key}, 错误: {str(e)}")
+            items = feed.items
+        if top_k is not None:
+            items = items.head(top_k)
+        return items.drop(columns=FINGERPRINT_COLUMN, errors="ignore").copy()
+
+    def watermark(self, key: str) -> Optional[pd.Timestamp]:
+        """新闻源已入库的最新发布时间"""
+        return self._feed(key).watermark
+
+
+_store: Optional[NewsStore] = None
+_store_lock = threading.Lock()
+
+
+def get_news_store() -> NewsStore:
+    """获取进程内共享的新闻存储"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = NewsStore()
+        return _store
@@ -0,0 +1,125 @@
+"""
+港股报表长表转宽表
+stock_financial_hk_report_em 返回 (REPORT_DATE, STD_ITEM_NAME, AMOUNT) 形式的长表，
+这里用整数编码 + NumPy矩阵填充的方式转换为宽表，替代 pd.pivot_table
+"""
+
+import threading
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+INDEX_COLUMN = "REPORT_DATE"
+ITEM_COLUMN = "STD_ITEM_NAME"
+VALUE_COLUMN = "AMOUNT"
+
+
+class StatementPivoter:
+    """报表长表转宽表，按报表缓存科目字典，保证各次输出的列顺序稳定"""
+
+    def __init__(self):
+        self._items: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def _encode_items(self, statement: str, items: pd.Series) -> Tuple[np.ndarray, List[str]]:
+        """将科目名编码为整数，新科目按首次出现的顺序追加到该报表的科目字典"""
+        # 只对去重后的少量科目名查字典，再用查找表映射回整列
+        codes, uniques = pd.factorize(items)
+        with self._lock:
+            mapping = self._items.setdefault(statement, {})
+            for item in uniques:
+                if item not in mapping:
+                    mapping[item] = len(mapping)
+            lookup = np.array([mapping[item] for item in uniques] + [-1], dtype="int64")
+            names = list(mapping)
+        return lookup[codes], names
+
+    def pivot_many(self, frames: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+        """
+        一次性转换多张报表，所有报表共用一个报告期轴，在同一个矩阵中填充
+
+        Args:
+            frames: 报表名到长表数据的映射
+
+        Returns:
+            dict: 报表名到宽表数据的映射，宽表按REPORT_DATE降序排列，第一列为REPORT_DATE
+        """
+        frames = {name: df for name, df in frames.items() if df is not None and not df.empty}
+        if not frames:
+            return {}
+
+        # 各报表的科目编码拼接到同一列轴上，用偏移量区分
+        item_codes, names, offsets = [], {}, {}
+        offset = 0
+        for statement, df in frames.items():
+            codes, names[statement] = self._encode_items(statement, df[ITEM_COLUMN])
+            item_codes.append(np.where(codes >= 0, codes + offset, -1))
+            offsets[statement] = offset
+            offset += len(names[statement])
+        item_codes = np.concatenate(item_codes)
+        n_cols = offset
+
+        dates = pd.concat([df[INDEX_COLUMN] for df in frames.values()], ignore_index=True)
+        date_codes, date_values = pd.factorize(dates, sort=True)
+        # 报告期降序排列
+        n_rows = len(date_values)
+        date_codes = np.where(date_codes >= 0, n_rows - 1 - date_codes, -1)
+        date_values = np.asarray(date_values)[::-1]
+
+        amounts = pd.to_numeric(
+            pd.concat([df[VALUE_COLUMN] for df in frames.values()], ignore_index=True), errors="coerce"
+        ).to_numpy(dtype="float64")
+        valid = (date_codes >= 0) & (item_codes >= 0)
+        cells = date_codes[valid].astype("int64") * n_cols + item_codes[valid]
+        amounts = amounts[valid]
+
+        if np.unique(cells).size == cells.size:
+            # (REPORT_DATE, STD_ITEM_NAME) 唯一时直接填充，不做聚合
+            matrix = np.full(n_rows * n_cols, np.nan)
+            matrix[cells] = amounts
+        else:
+            # 存在重复时按均值聚合，与 pivot_table 默认行为一致
+            present = ~np.isnan(amounts)
+            sums = np.bincount(cells, weights=np.where(present, amounts, 0.0), minlength=n_rows * n_cols)
+            counts = np.bincount(cells, weights=present, minlength=n_rows * n_cols)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                matrix = np.where(counts > 0, sums / counts, np.nan)
+        matrix = matrix.reshape(n_rows, n_cols)
+
+        result = {}
+        for statement, offset in offsets.items():
+            block = matrix[:, offset : offset + len(names[statement])]
+            # 去掉全空的报告期和科目
+            present = ~np.isnan(block)
+            rows, cols = present.any(axis=1), present.any(axis=0)
+            wide = pd.DataFrame(block[rows][:, cols], columns=np.asarray(names[statement], dtype=object)[cols])
+            wide.insert(0, INDEX_COLUMN, date_values[rows])
+            result[statement] = wide
+        return result
+
+    def pivot(self, df: pd.DataFrame, statement: str = "default") -> pd.DataFrame:
+        """
+        转换单张报表
+
+        Args:
+            df: 长表数据
+            statement: 报表名，用于复用该报表的科目顺序
+
+        Returns:
+            DataFrame: 宽表数据
+        """
+        return self.pivot_many({statement: df}).get(statement, pd.DataFrame(columns=[INDEX_COLUMN]))
+
+
+_default_pivoter = StatementPivoter()
+
+
+def pivot_statement(df: pd.DataFrame, statement: str = "default") -> pd.DataFrame:
+    """使用进程内共享的科目字典转换单张报表"""
+    return _default_pivoter.pivot(df, statement)
+
+
+def pivot_statements(frames: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+    """使用进程内共享的科目字典一次性转换多张报表"""
+    return _default_pivoter.pivot_many(frames)
@@ -0,0 +1,304 @@
+"""
+提示词数据序列化
+把取数结果整理为紧凑的Markdown表格交给大模型：报表与财务指标按 字段 × 报告期 转置、字段代码换成
+column_descriptions 中的中文名称、金额换算为 亿/万、-999 缺失值标记不再输出。
+用本地分词器估算token数，超出预算时先裁剪优先级低的数据集，同一数据集内先去掉非核心字段
+"""
+
+import json
+import math
+import os
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+from pandas.api.types import is_bool_dtype, is_datetime64_any_dtype, is_numeric_dtype
+
+from .formatting import format_large_numbers
+from .schema import get_schema_registry
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# 数据部分的默认token预算，为0时不裁剪
+DEFAULT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "6000"))
+TIKTOKEN_ENCODING = "cl100k_base"
+# 序列化时填充的缺失值标记
+MISSING = -999
+# 每个数据集保留的报告期数
+DEFAULT_MAX_PERIODS = 3
+# 文本单元格的最大字符数
+MAX_CELL_CHARS = 200
+
+# 数据集名称前缀 -> (标题, 字段清单数据集, 优先级)，优先级数字越小越重要，超出预算时先裁剪数字大的数据集
+SECTIONS = {
+    "financial_indicators": ("财务指标", "indicator", 1),
+    "income_statement": ("利润表", "income_statement", 2),
+    "balance_sheet": ("资产负债表", "balance_sheet", 3),
+    "cash_flow": ("现金流量表", "cash_flow", 4),
+    # 港股报表与财务指标（见 hk_akshare_client），字段已是中文名称
+    "cash_flow_statement": ("现金流量表", None, 4),
+    "analysis_indicator": ("财务指标", None, 1),
+    "stock_value_info": ("估值", None, 5),
+    "stock_info": ("基本信息", None, 6),
+    "stock_news": ("个股新闻", None, 7),
+    "global_news": ("全球快讯", None, 8),
+}
+DEFAULT_PRIORITY = 9
+
+DATE_COLUMNS = ["REPORT_DATE", "报告期"]
+GROUP_COLUMN = "symbol"
+# 报表中的标识列，公司写入标题后不再作为字段输出
+IDENTIFIER_COLUMNS = {
+    "SECUCODE",
+    "SECURITY_CODE",
+    "SECURITY_NAME_ABBR",
+    "ORG_CODE",
+    "ORG_TYPE",
+    "REPORT_TYPE",
+    "REPORT_DATE_NAME",
+    "SECURITY_TYPE_CODE",
+    "NOTICE_DATE",
+    "UPDATE_DATE",
+    "CURRENCY",
+    GROUP_COLUMN,
+}
+# 表格中不输出的列
+DROP_COLUMNS = {"url", "新闻链接", "序号"}
+
+# 列名包含这些词的数值列是日期或代码，原样输出不做金额换算
+PLAIN_COLUMN_WORDS = ("日期", "时间", "代码", "date", "time", "code")
+
+_CJK = re.compile(r"[\u2e80-\u9fff\uf900-\ufaff\uff00-\uffef]")
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding(TIKTOKEN_ENCODING)
+    except Exception as e:
+        # 分词表需要下载，离线环境下退回估算
+        logger.warning(f"加载分词器失败，使用估算的token数: {str(e)}")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """
+    计算文本的token数
+
+    安装了tiktoken时使用 cl100k_base 分词，否则按 每个中文字符1个token、其余每4个字符1个token 估算
+
+    Args:
+        text: 文本
+
+    Returns:
+        int: token数
+    """
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    cjk = len(_CJK.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+@dataclass
+class PromptSection:
+    """一张表格或一段文本，按行裁剪"""
+
+    title: str
+    header: List[str]
+    lines: List[str]
+    # 每行的重要程度，数字越小越重要，裁剪时先去掉数字大的行
+    ranks: List[int]
+    priority: int = DEFAULT_PRIORITY
+    keep: Optional[int] = None
+
+    def render(self, keep: Optional[int] = None) -> str:
+        """保留最重要的keep行（保持原有顺序）生成文本，keep为0时整段省略"""
+        keep = len(self.lines) if keep is None else keep
+        if keep <= 0:
+            return ""
+        if keep >= len(self.lines):
+            lines = self.lines
+        else:
+            kept = sorted(sorted(range(len(self.lines)), key=lambda i: self.ranks[i])[:keep])
+            lines = [self.lines[i] for i in kept] + [f"（另有{len(self.lines) - keep}项已省略）"]
+        return "\n".join([f"### {self.title}"] + self.header + lines)
+
+
+def _cells(values: pd.Series) -> List[str]:
+    """单元格文本：金额换算为 亿/万，日期去掉零点时刻，缺失值为 "-"，过长的文本截断"""
+    if is_datetime64_any_dtype(values.dtype):
+        return ["-" if pd.isna(v) else v.strftime("%Y-%m-%d %H:%M").removesuffix(" 00:00") for v in values]
+    plain = any(word in str(values.name).lower() for word in PLAIN_COLUMN_WORDS)
+    if plain and is_numeric_dtype(values.dtype) and not is_bool_dtype(values.dtype):
+        # 如 上市时间 19991110，按整数输出
+        return ["-" if pd.isna(v) else f"{v:.0f}" if float(v).is_integer() else str(v) for v in values]
+    if is_numeric_dtype(values.dtype) and not is_bool_dtype(values.dtype):
+        text = format_large_numbers(values)
+        return ["-" if pd.isna(v) else t for v, t in zip(values, text)]
+    result = []
+    for value in values:
+        if value is None or (isinstance(value, float) and np.isnan(value)):
+            result.append("-")
+        else:
+            value = re.sub(r"\s+", " ", str(value)).replace("|", "/")
+            result.append(value if len(value) <= MAX_CELL_CHARS else value[:MAX_CELL_CHARS] + "…")
+    return result
+
+
+def _clean(frame: pd.DataFrame) -> pd.DataFrame:
+    """去掉 -999 缺失值标记与全部缺失的列"""
+    frame = frame.replace([MISSING, str(MISSING)], np.nan).dropna(axis=1, how="all")
+    return frame.drop(columns=[col for col in frame.columns if col in DROP_COLUMNS])
+
+
+def _period_section(title: str, frame: pd.DataFrame, date_column: str, dataset: Optional[str], priority: int):
+    """报表类数据转置为 字段 × 报告期 的表格，核心字段优先保留"""
+    labels: Dict[str, str] = {}
+    core: set = set()
+    if dataset is not None:
+        registry = get_schema_registry()
+        labels = registry.labels(dataset)
+        core = set(registry.columns(dataset, "core"))
+    dates = frame[date_column].astype(str).str[:10].tolist()
+    header = ["| 项目 | " + " | ".join(dates) + " |", "|" + "---|" * (len(dates) + 1)]
+    lines, ranks = [], []
+    for col in frame.columns:
+        if col == date_column or col in IDENTIFIER_COLUMNS:
+            continue
+        lines.append(f"| {labels.get(col, col)} | " + " | ".join(_cells(frame[col])) + " |")
+        ranks.append(0 if col in core else 1 if col in labels else 2)
+    return PromptSection(title, header, lines, ranks, priority)
+
+
+def _row_section(title: str, frame: pd.DataFrame, priority: int) -> PromptSection:
+    """新闻等记录类数据每条一行，靠前的记录优先保留"""
+    columns = [col for col in frame.columns if col not in IDENTIFIER_COLUMNS]
+    header = ["| " + " | ".join(map(str, columns)) + " |", "|" + "---|" * len(columns)]
+    cells = [_cells(frame[col]) for col in columns]
+    lines = ["| " + " | ".join(row) + " |" for row in zip(*cells)]
+    return PromptSection(title, header, lines, list(range(len(lines))), priority)
+
+
+def _text_section(title: str, value: Any, priority: int) -> PromptSection:
+    """其他数据按行输出，靠前的行优先保留"""
+    if not isinstance(value, str):
+        value = json.dumps(value, ensure_ascii=False, default=str)
+    lines = str(value).strip().splitlines()
+    return PromptSection(title, [], lines, list(range(len(lines))), priority)
+
+
+def build_sections(
+    data: Dict[str, Any], max_periods: int = DEFAULT_MAX_PERIODS, titles: Optional[Dict[str, str]] = None
+) -> List[PromptSection]:
+    """
+    将取数结果整理为表格段落
+
+    Args:
+        data: 数据集名称到记录列表、DataFrame或其他数据的映射
+        max_periods: 报表类数据每家公司保留的报告期数
+        titles: 数据集名称到标题的映射，未给出时按 SECTIONS 生成
+
+    Returns:
+        list: 表格段落，多家公司的数据每家一段
+    """
+    sections = []
+    for key, value in data.items():
+        # 取最长的匹配前缀，cash_flow_statement 不会被当作 cash_flow 的子键
+        prefix = max((name for name in SECTIONS if key.startswith(name)), key=len, default=None)
+        title, dataset, priority = SECTIONS.get(prefix, (key, None, DEFAULT_PRIORITY))
+        if prefix is not None and key != prefix:
+            # 如 balance_sheet_年报 -> 资产负债表 年报
+            title = f"{title} {key[len(prefix):].strip('_')}"
+        title = (titles or {}).get(key, title)
+
+        if isinstance(value, list) and value and all(isinstance(v, dict) for v in value):
+            value = pd.DataFrame(value)
+        if not isinstance(value, pd.DataFrame):
+            if value:
+                sections.append(_text_section(title, value, priority))
+            continue
+        frame = _clean(value)
+        if frame.empty:
+            continue
+
+        date_column = next((col for col in DATE_COLUMNS if col in frame.columns), None)
+        groups = frame.groupby(GROUP_COLUMN, sort=False) if GROUP_COLUMN in frame.columns else [("", frame)]
+        for symbol, group in groups:
+            name = " ".join(part for part in (str(symbol), title) if part)
+            if date_column is None:
+                sections.append(_row_section(name, group, priority))
+                continue
+            group = group.sort_values(date_column, ascending=False, kind="stable").head(max_periods)
+            sections.append(_period_section(name, group.dropna(axis=1, how="all"), date_column, dataset, priority))
+    return sections
+
+
+def fit_sections(sections: List[PromptSection], budget: int) -> int:
+    """
+    按优先级裁剪段落使总token数不超过预算，结果记录在各段落的keep中
+
+    先裁剪优先级最低的段落，每个段落用二分查找保留尽可能多的行，仍然超出时再裁剪下一个段落
+
+    Args:
+        sections: 表格段落
+        budget: token预算
+
+    Returns:
+        int: 裁剪后的总token数
+    """
+    tokens = [count_tokens(section.render()) for section in sections]
+    total = sum(tokens)
+    order = sorted(range(len(sections)), key=lambda i: sections[i].priority, reverse=True)
+    for i in order:
+        if total <= budget:
+            break
+        section, others = sections[i], total - tokens[i]
+        low, high = 0, len(section.lines)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if others + count_tokens(section.render(middle)) <= budget:
+                low = middle
+            else:
+                high = middle - 1
+        section.keep = low
+        tokens[i] = count_tokens(section.render(low))
+        total = others + tokens[i]
+    return total
+
+
+def format_prompt_data(
+    data: Dict[str, Any],
+    budget: Optional[int] = None,
+    max_periods: int = DEFAULT_MAX_PERIODS,
+    titles: Optional[Dict[str, str]] = None,
+) -> str:
+    """
+    将取数结果序列化为适合放入提示词的紧凑表格
+
+    Args:
+        data: 数据集名称到记录列表、DataFrame或其他数据的映射
+        budget: token预算，为空时读取环境变量 PROMPT_TOKEN_BUDGET，为0时不裁剪
+        max_periods: 报表类数据每家公司保留的报告期数
+        titles: 数据集名称到标题的映射
+
+    Returns:
+        str: Markdown文本
+    """
+    budget = DEFAULT_TOKEN_BUDGET if budget is None else budget
+    sections = build_sections(data, max_periods, titles)
+    if budget > 0:
+        before = sum(count_tokens(section.render()) for section in sections)
+        after = fit_sections(sections, budget)
+        if after < before:
+            logger.info(f"提示词数据超出预算，裁剪: {before} -> {after} tokens (预算{budget})")
+    return "\n\n".join(filter(None, (section.render(section.keep) for section in sections)))
@@ -0,0 +1,142 @@
+"""
+全市场实时行情快照
+进程内共享一份A股实时行情表，并按股票代码建立索引。查询时快照超过刷新间隔才重新下载（由一个调用方负责，
+其余调用方继续使用旧快照），进程空闲时不访问上游；刷新持续失败、快照超过最大可用时长时不再返回行情
+"""
+
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+import pandas as pd
+from loguru import logger
+
+from .replay import get_default_backend
+from .scheduler import get_scheduler
+
+DEFAULT_REFRESH_INTERVAL = float(os.getenv("QUOTE_REFRESH_INTERVAL", "60"))
+# 快照的最大可用时长（秒），超过后查询返回None
+DEFAULT_MAX_AGE = float(os.getenv("QUOTE_MAX_AGE", "900"))
+# 刷新失败后至少间隔该时间（秒）再重试，上游故障时不会每次查询都重新下载
+RETRY_INTERVAL = 10.0
+
+
+class QuoteSnapshot:
+    """A股实时行情快照"""
+
+    def __init__(
+        self,
+        refresh_interval: float = DEFAULT_REFRESH_INTERVAL,
+        fetcher: Optional[Callable[[], pd.DataFrame]] = None,
+        max_age: float = DEFAULT_MAX_AGE,
+    ):
+        """
+        Args:
+            refresh_interval: 刷新间隔（秒），查询时快照超过该时长才重新下载，默认读取环境变量 QUOTE_REFRESH_INTERVAL
+            fetcher: 获取全市场行情的函数，默认为经过共享调度器限速的默认后端的 stock_zh_a_spot_em
+            max_age: 快照的最大可用时长（秒），默认读取环境变量 QUOTE_MAX_AGE
+        """
+        self.refresh_interval = refresh_interval
+        self.max_age = max(max_age, refresh_interval)
+        self._fetcher = fetcher or get_scheduler().wrap(get_default_backend()).stock_zh_a_spot_em
+        self._index: Dict[str, Dict] = {}
+        self._updated_at: Optional[float] = None
+        self._attempted_at: Optional[float] = None
+        self._refresh_lock = threading.Lock()
+
+    @property
+    def age(self) -> Optional[float]:
+        """快照距上次刷新的秒数，尚未加载时为None"""
+        return None if self._updated_at is None else time.monotonic() - self._updated_at
+
+    def refresh(self) -> bool:
+        """
+        下载全市场行情并重建代码索引
+
+        Returns:
+            bool: 是否刷新成功
+        """
+        with self._refresh_lock:
+            return self._refresh()
+
+    def _refresh(self) -> bool:
+        """调用方持有刷新锁"""
+        self._attempted_at = time.monotonic()
+        try:
+            df = self._fetcher()
+            if df is None or df.empty:
+                logger.warning("未获取到全市场实时行情")
+                return False
+            # 整表替换引用，读者不会看到半更新的索引
+            self._index = df.drop_duplicates("代码").set_index("代码", drop=False).to_dict("index")
+            self._updated_at = time.monotonic()
+            logger.info(f"刷新全市场实时行情快照，共{len(self._index)}只股票")
+            return True
+        except Exception as e:
+            logger.error(f"刷新全市场实时行情失败, 错误: {str(e)}")
+            return False
+
+    def _due(self) -> bool:
+        """快照超过刷新间隔，且距上次失败的刷新已超过重试间隔"""
+        age = self.age
+        if age is not None and age <= self.refresh_interval:
+            return False
+        return self._attempted_at is None or time.monotonic() - self._attempted_at >= RETRY_INTERVAL
+
+    def get(self, symbol: str) -> Optional[Dict]:
+        """
+        查询单只股票的实时行情，快照过期时先刷新
+
+        Args:
+            symbol: 股票代码 (如: 600000)
+
+        Returns:
+            dict: 行情数据，快照中不存在该股票或快照超过最大可用时长时返回None
+        """
+        if self._due():
+            age = self.age
+            if age is not None and age <= self.max_age:
+                # 旧快照仍可用：由一个调用方刷新，其余调用方不等待
+                if self._refresh_lock.acquire(blocking=False):
+                    try:
+                        if self._due():
+                            self._refresh()
+                    finally:
+                        self._refresh_lock.release()
+            else:
+                # 没有可用的快照：等待正在进行的刷新，仍未刷新时自行刷新
+                with self._refresh_lock:
+                    if self._due():
+                        self._refresh()
+
+        age = self.age
+        if age is None or age > self.max_age:
+            if age is not None:
+                logger.warning(f"行情快照已过期 {age:.0f} 秒，不返回行情: {symbol}")
+            return None
+        row = self._index.get(symbol)
+        return dict(row) if row is not None else None
+
+
+_snapshots: Dict[int, tuple] = {}
+_snapshot_lock = threading.Lock()
+
+
+def get_quote_snapshot(backend: Optional[Any] = None) -> QuoteSnapshot:
+    """
+    获取进程内共享的行情快照
+
+    Args:
+        backend: akshare接口来源，为空时使用默认后端；同一后端的客户端共享一份快照
+
+    Returns:
+        QuoteSnapshot: 行情快照
+    """
+    with _snapshot_lock:
+        key = id(backend)
+        if key not in _snapshots:
+            fetcher = None if backend is None else get_scheduler().wrap(backend).stock_zh_a_spot_em
+            # 同时保存后端的引用，后端对象不会被回收，id不会被复用
+            _snapshots[key] = (backend, QuoteSnapshot(fetcher=fetcher))
+        return _snapshots[key][1]
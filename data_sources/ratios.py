@@ -0,0 +1,379 @@
+"""
+财务比率计算
+由A股三大报表按列向量化计算盈利能力、偿债能力、运营效率、现金流与成长性指标，
+期初余额取上年末报表，同比取上年同一报告期，年报与中报统一处理。
+计算结果以紧凑的指标表交给大模型解读，不再让模型自行做四则运算
+"""
+
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# 计算所需的报表项目，同一项目有多个候选字段时取第一个非空值
+ITEM_FIELDS = {
+    "income_statement": {
+        "revenue": ["OPERATE_INCOME", "TOTAL_OPERATE_INCOME"],
+        "cost": ["OPERATE_COST"],
+        "operate_profit": ["OPERATE_PROFIT"],
+        "total_profit": ["TOTAL_PROFIT"],
+        "net_profit": ["NETPROFIT"],
+        "parent_net_profit": ["PARENT_NETPROFIT", "NETPROFIT"],
+        "interest_expense": ["FE_INTEREST_EXPENSE"],
+    },
+    "balance_sheet": {
+        "total_assets": ["TOTAL_ASSETS"],
+        "total_liabilities": ["TOTAL_LIABILITIES"],
+        "equity": ["TOTAL_EQUITY"],
+        "parent_equity": ["TOTAL_PARENT_EQUITY", "TOTAL_EQUITY"],
+        "current_assets": ["TOTAL_CURRENT_ASSETS"],
+        "current_liabilities": ["TOTAL_CURRENT_LIAB"],
+        "inventory": ["INVENTORY"],
+        "receivables": ["ACCOUNTS_RECE", "NOTE_ACCOUNTS_RECE"],
+        "payables": ["ACCOUNTS_PAYABLE", "NOTE_ACCOUNTS_PAYABLE"],
+    },
+    "cash_flow": {
+        "operating_cash_flow": ["NETCASH_OPERATE"],
+        "investing_cash_flow": ["NETCASH_INVEST"],
+        "financing_cash_flow": ["NETCASH_FINANCE"],
+        "capex": ["CONSTRUCT_LONG_ASSET"],
+        "invest_paid": ["INVEST_PAY_CASH"],
+        "borrowing": ["RECEIVE_LOAN_CASH"],
+        "debt_repaid": ["PAY_DEBT_CASH"],
+        "dividend_interest_paid": ["ASSIGN_DIVIDEND_PORFIT"],
+    },
+}
+
+# 指标分类，顺序即输出顺序
+RATIO_GROUPS = {
+    "盈利能力": ["毛利率(%)", "营业利润率(%)", "净利率(%)", "ROA(%)", "ROE(%)"],
+    "偿债能力": ["流动比率", "速动比率", "资产负债率(%)", "产权比率", "利息保障倍数"],
+    "运营效率": [
+        "存货周转率",
+        "存货周转天数",
+        "应收账款周转率",
+        "应收账款周转天数",
+        "应付账款周转天数",
+        "现金转换周期(天)",
+        "总资产周转率",
+    ],
+    "现金流": [
+        "经营活动现金流净额(亿元)",
+        "投资活动现金流净额(亿元)",
+        "筹资活动现金流净额(亿元)",
+        "自由现金流(亿元)",
+        "经营现金流/净利润",
+        "购建长期资产支付(亿元)",
+        "投资支付(亿元)",
+        "取得借款(亿元)",
+        "偿还债务(亿元)",
+        "分配股利及偿付利息(亿元)",
+    ],
+    "成长性": ["营业收入同比(%)", "归母净利润同比(%)", "经营现金流同比(%)", "总资产同比(%)"],
+}
+RATIO_COLUMNS = [name for names in RATIO_GROUPS.values() for name in names]
+
+DATE_COLUMN = "REPORT_DATE"
+TYPE_COLUMN = "REPORT_TYPE"
+GROUP_COLUMN = "symbol"
+# get_all_financial_data 结果中比率表的键前缀，如 "financial_ratios_年报"
+RATIO_KEY_PREFIX = "financial_ratios"
+# 有数值的指标占比低于该值时（如银行、保险的报表没有流动资产、存货等项目），比率表不足以单独支撑分析
+MIN_RATIO_COVERAGE = float(os.getenv("MIN_RATIO_COVERAGE", "0.5"))
+YI = 1e8
+
+# (公司, 报告期) 编码中日期占低32位
+_DAY_OFFSET = 1 << 31
+_DAY_MASK = (1 << 32) - 1
+
+
+def _divide(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """逐元素相除，分母为0或缺失时结果为NaN"""
+    out = np.full(numerator.shape, np.nan)
+    np.divide(numerator, denominator, out=out, where=np.isfinite(denominator) & (denominator != 0))
+    return out
+
+
+def _growth(current: np.ndarray, previous: np.ndarray) -> np.ndarray:
+    """同比增长率(%)，上期为负时按绝对值计算方向"""
+    return _divide(current - previous, np.abs(previous)) * 100
+
+
+def _take(values: np.ndarray, positions: np.ndarray) -> np.ndarray:
+    """按位置取值，位置为-1（未找到）时为NaN"""
+    taken = values[np.maximum(positions, 0)]
+    taken[positions < 0] = np.nan
+    return taken
+
+
+def _positions(keys: np.ndarray, targets: np.ndarray) -> np.ndarray:
+    """targets在升序且唯一的keys中的位置，不存在时为-1"""
+    if not len(keys):
+        return np.full(len(targets), -1)
+    positions = np.minimum(np.searchsorted(keys, targets), len(keys) - 1)
+    return np.where(keys[positions] == targets, positions, -1)
+
+
+def _key(codes: np.ndarray, dates: np.ndarray) -> np.ndarray:
+    """(公司编号, 日期) 编码为int64，按公司、日期升序"""
+    return (codes.astype("int64") << 32) + dates.astype("datetime64[D]").astype("int64") + _DAY_OFFSET
+
+
+def _report_dates(values: pd.Series) -> np.ndarray:
+    """报告期转为datetime64[D]，无法解析的为NaT"""
+    try:
+        return values.to_numpy().astype("datetime64[D]")
+    except (TypeError, ValueError):
+        return pd.to_datetime(values, errors="coerce").to_numpy().astype("datetime64[D]")
+
+
+def _statement_items(df: pd.DataFrame, fields: Dict[str, List[str]]) -> Tuple[np.ndarray, np.ndarray, Dict]:
+    """取出单张报表中的项目，返回各行的symbol、报告期与项目名到数值列的映射，已去掉报告期为空的行"""
+    dates = _report_dates(df[DATE_COLUMN])
+    valid = ~np.isnat(dates)
+    symbols = df[GROUP_COLUMN].astype(str).to_numpy() if GROUP_COLUMN in df.columns else np.full(len(df), "")
+
+    wanted = dict.fromkeys(col for cols in fields.values() for col in cols)
+    block = df[[col for col in wanted if col in df.columns]]
+    if (block.dtypes == object).any():
+        block = block.apply(pd.to_numeric, errors="coerce")
+    values = block.to_numpy(dtype="float64")[valid]
+    position = {col: i for i, col in enumerate(block.columns)}
+
+    items = {}
+    for item, candidates in fields.items():
+        # 按候选字段顺序取第一个非空值
+        picked = np.full(len(values), np.nan)
+        for col in candidates:
+            if col in position:
+                np.copyto(picked, values[:, position[col]], where=np.isnan(picked))
+        items[item] = picked
+    if TYPE_COLUMN in df.columns:
+        items[TYPE_COLUMN] = df[TYPE_COLUMN].to_numpy(dtype=object)[valid]
+    return symbols[valid], dates[valid], items
+
+
+def _items(statements: Dict[str, pd.DataFrame]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, Dict[str, np.ndarray]]:
+    """
+    从各报表中取出计算所需的项目，按 (symbol, 报告期) 对齐
+
+    Args:
+        statements: 报表类型到报表数据的映射，包含所有报告期
+
+    Returns:
+        tuple: (升序的 (公司, 报告期) 编码, 各行的symbol, 各行的报告期, 项目名到数值列的映射，另含REPORT_TYPE列)，
+            缺失的项目为NaN
+    """
+    parts = [
+        _statement_items(df, fields)
+        for statement, fields in ITEM_FIELDS.items()
+        if (df := statements.get(statement)) is not None and not df.empty and DATE_COLUMN in df.columns
+    ]
+    if not parts:
+        return np.array([], dtype="int64"), np.array([], dtype=object), np.array([], dtype="datetime64[D]"), {}
+
+    # 所有报表共用一套公司编号，编码后对齐只需要排序和二分查找
+    codes, uniques = pd.factorize(np.concatenate([symbols for symbols, _, _ in parts]), sort=True)
+    bounds = np.cumsum([0] + [len(symbols) for symbols, _, _ in parts])
+    part_keys = []
+    for i, (_, dates, part_items) in enumerate(parts):
+        # 同一报告期重复出现时保留第一行
+        keys, first = np.unique(_key(codes[bounds[i] : bounds[i + 1]], dates), return_index=True)
+        part_keys.append((keys, {item: values[first] for item, values in part_items.items()}))
+    keys = np.unique(np.concatenate([part for part, _ in part_keys]))
+
+    items: Dict[str, np.ndarray] = {}
+    report_types = np.full(len(keys), None, dtype=object)
+    for part, part_items in part_keys:
+        positions = _positions(part, keys)
+        for item, values in part_items.items():
+            if item == TYPE_COLUMN:
+                # 报告类型取第一张含有该报告期的报表
+                fill = (positions >= 0) & pd.isna(report_types)
+                report_types[fill] = values[positions[fill]]
+            else:
+                items[item] = _take(values, positions)
+    for fields in ITEM_FIELDS.values():
+        for item in fields:
+            items.setdefault(item, np.full(len(keys), np.nan))
+    items[TYPE_COLUMN] = report_types
+    symbols = np.asarray(uniques, dtype=object)[keys >> 32]
+    dates = ((keys & _DAY_MASK) - _DAY_OFFSET).astype("datetime64[D]")
+    return keys, symbols, dates, items
+
+
+def compute_ratios(statements: Dict[str, pd.DataFrame], periods: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    计算财务比率
+
+    期末余额类项目在计算周转率、ROA、ROE时使用期初（上年末）与期末的平均值，上年末数据缺失时使用期末值；
+    周转天数按报告期内的实际天数折算，中报等非年度报告期的利润、现金流为期间累计值，未做年化
+
+    Args:
+        statements: 报表类型到报表数据的映射 ("balance_sheet", "income_statement", "cash_flow")，
+            需包含REPORT_DATE列，多家公司时以symbol列区分；计算期初值和同比需要包含上一年的报告期
+        periods: 只返回这些报告类型 (如: ["年报"])，为空时返回全部
+
+    Returns:
+        DataFrame: 每个报告期一行，包含symbol（多家公司时）、REPORT_DATE、REPORT_TYPE与 RATIO_COLUMNS 中的指标，
+            按报告期降序排列
+    """
+    keys, symbols, dates, items = _items(statements)
+    if not len(keys):
+        return pd.DataFrame(columns=[DATE_COLUMN, TYPE_COLUMN] + RATIO_COLUMNS)
+
+    # 期初余额取上年末报表，同比取上年同一报告期，两者都在编码上整列二分查找
+    codes = keys >> 32
+    year_start = dates.astype("datetime64[Y]").astype("datetime64[D]")
+    last_year = (pd.DatetimeIndex(dates) - pd.DateOffset(years=1)).to_numpy()
+    opening = _positions(keys, _key(codes, year_start - 1))
+    previous = _positions(keys, _key(codes, last_year))
+
+    def average(item: str) -> np.ndarray:
+        values = items[item]
+        begin = _take(values, opening)
+        return (values + np.where(np.isnan(begin), values, begin)) / 2
+
+    def growth(item: str) -> np.ndarray:
+        return _growth(items[item], _take(items[item], previous))
+
+    days = (dates - year_start).astype("float64") + 1
+    revenue, cost = items["revenue"], items["cost"]
+    inventory_turnover = _divide(cost, average("inventory"))
+    receivable_turnover = _divide(revenue, average("receivables"))
+    inventory_days = _divide(days, inventory_turnover)
+    receivable_days = _divide(days, receivable_turnover)
+    payable_days = _divide(days * average("payables"), cost)
+
+    ratios = {
+        "毛利率(%)": _divide(revenue - cost, revenue) * 100,
+        "营业利润率(%)": _divide(items["operate_profit"], revenue) * 100,
+        "净利率(%)": _divide(items["net_profit"], revenue) * 100,
+        "ROA(%)": _divide(items["net_profit"], average("total_assets")) * 100,
+        "ROE(%)": _divide(items["parent_net_profit"], average("parent_equity")) * 100,
+        "流动比率": _divide(items["current_assets"], items["current_liabilities"]),
+        "速动比率": _divide(items["current_assets"] - np.nan_to_num(items["inventory"]), items["current_liabilities"]),
+        "资产负债率(%)": _divide(items["total_liabilities"], items["total_assets"]) * 100,
+        "产权比率": _divide(items["total_liabilities"], items["equity"]),
+        "利息保障倍数": _divide(items["total_profit"] + items["interest_expense"], items["interest_expense"]),
+        "存货周转率": inventory_turnover,
+        "存货周转天数": inventory_days,
+        "应收账款周转率": receivable_turnover,
+        "应收账款周转天数": receivable_days,
+        "应付账款周转天数": payable_days,
+        "现金转换周期(天)": inventory_days + receivable_days - payable_days,
+        "总资产周转率": _divide(revenue, average("total_assets")),
+        "经营活动现金流净额(亿元)": items["operating_cash_flow"] / YI,
+        "投资活动现金流净额(亿元)": items["investing_cash_flow"] / YI,
+        "筹资活动现金流净额(亿元)": items["financing_cash_flow"] / YI,
+        "自由现金流(亿元)": (items["operating_cash_flow"] - items["capex"]) / YI,
+        "经营现金流/净利润": _divide(items["operating_cash_flow"], items["net_profit"]),
+        "购建长期资产支付(亿元)": items["capex"] / YI,
+        "投资支付(亿元)": items["invest_paid"] / YI,
+        "取得借款(亿元)": items["borrowing"] / YI,
+        "偿还债务(亿元)": items["debt_repaid"] / YI,
+        "分配股利及偿付利息(亿元)": items["dividend_interest_paid"] / YI,
+        "营业收入同比(%)": growth("revenue"),
+        "归母净利润同比(%)": growth("parent_net_profit"),
+        "经营现金流同比(%)": growth("operating_cash_flow"),
+        "总资产同比(%)": growth("total_assets"),
+    }
+    result = pd.DataFrame(
+        {
+            GROUP_COLUMN: symbols,
+            DATE_COLUMN: np.datetime_as_string(dates, unit="D"),
+            TYPE_COLUMN: items[TYPE_COLUMN],
+            **{name: np.round(values, 4) for name, values in ratios.items()},
+        }
+    )
+    # 编码按公司、报告期升序，同一公司内倒序即为报告期降序
+    result = result.iloc[np.lexsort((-np.arange(len(keys)), codes))]
+    if periods:
+        result = result[result[TYPE_COLUMN].isin(periods)]
+    if (result[GROUP_COLUMN] == "").all():
+        result = result.drop(columns=GROUP_COLUMN)
+    return result.reset_index(drop=True)
+
+
+def format_ratio_table(records: List[Dict], max_periods: int = 3, missing: float = -999) -> str:
+    """
+    将单家公司的比率记录整理为 指标 x 报告期 的Markdown表格，末列为所列报告期的平均值
+
+    Args:
+        records: compute_ratios 结果的记录列表（to_dict(orient="records")），按报告期降序
+        max_periods: 最多保留的报告期数
+        missing: 序列化时填充的缺失值标记，表格中显示为 "-"
+
+    Returns:
+        str: Markdown表格
+    """
+    records = records[:max_periods]
+    if not records:
+        return ""
+    frame = pd.DataFrame(records).replace(missing, np.nan)
+    dates = frame[DATE_COLUMN].astype(str).str[:10].tolist()
+    columns = [col for col in RATIO_COLUMNS if col in frame.columns]
+    values = frame[columns].apply(pd.to_numeric, errors="coerce").T
+    values["平均"] = values.mean(axis=1)
+
+    def cell(value: float) -> str:
+        return "-" if pd.isna(value) else f"{value:.2f}"
+
+    lines = ["| 指标 | " + " | ".join(dates + ["平均"]) + " |", "|" + " --- |" * (len(dates) + 2)]
+    for group, names in RATIO_GROUPS.items():
+        for name in names:
+            if name in values.index and values.loc[name].notna().any():
+                lines.append(f"| {group}-{name} | " + " | ".join(cell(v) for v in values.loc[name]) + " |")
+    return "\n".join(lines)
+
+
+def format_ratio_tables(data: Dict[str, List[Dict]], max_periods: int = 3) -> str:
+    """
+    将 get_all_financial_data(_batch) 序列化结果中的比率记录整理为Markdown表格，每个报告期类型、每家公司一张
+
+    Args:
+        data: 数据集名称到记录列表的映射
+        max_periods: 每张表最多保留的报告期数
+
+    Returns:
+        str: Markdown表格，数据中没有比率记录时为空字符串
+    """
+    sections = []
+    for key, records in data.items():
+        if not key.startswith(RATIO_KEY_PREFIX) or not records:
+            continue
+        period = key[len(RATIO_KEY_PREFIX) :].strip("_")
+        by_symbol: Dict[str, List[Dict]] = {}
+        for record in records:
+            by_symbol.setdefault(str(record.get(GROUP_COLUMN, "")), []).append(record)
+        for symbol, rows in by_symbol.items():
+            title = " ".join(part for part in (symbol, period) if part)
+            sections.append(f"### {title}\n{format_ratio_table(rows, max_periods)}")
+    return "\n\n".join(sections)
+
+
+def ratio_coverage(data: Dict[str, List[Dict]], missing: float = -999) -> Dict[str, float]:
+    """
+    各公司比率记录中有数值的指标占比
+
+    Args:
+        data: 数据集名称到记录列表的映射（get_all_financial_data(_batch) 的序列化结果）
+        missing: 序列化时填充的缺失值标记
+
+    Returns:
+        dict: 公司代码（单家公司的结果没有代码列，为空字符串）到占比的映射
+    """
+    filled: Dict[str, float] = {}
+    total: Dict[str, int] = {}
+    for key, records in data.items():
+        if not key.startswith(RATIO_KEY_PREFIX) or not records:
+            continue
+        frame = pd.DataFrame(records).replace(missing, np.nan)
+        columns = [col for col in RATIO_COLUMNS if col in frame.columns]
+        counts = frame[columns].apply(pd.to_numeric, errors="coerce").notna().sum(axis=1)
+        symbols = frame[GROUP_COLUMN].astype(str) if GROUP_COLUMN in frame.columns else pd.Series("", frame.index)
+        for symbol, count in counts.groupby(symbols):
+            filled[symbol] = filled.get(symbol, 0) + int(count.sum())
+            total[symbol] = total.get(symbol, 0) + len(count) * len(RATIO_COLUMNS)
+    return {symbol: filled[symbol] / total[symbol] for symbol in filled}
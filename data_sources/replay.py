@@ -0,0 +1,173 @@
+"""
+akshare录制/回放
+RecordingBackend 透传真实的akshare调用，并把每次调用的参数和返回的DataFrame保存到fixture目录
+（Parquet，混合类型无法转换时为JSON；不使用pickle，回放他人提供的fixture不会执行任意代码）；
+ReplayBackend 从fixture目录读取数据代替akshare，可注入延迟，用于离线测量和回归测试数据层性能
+
+通过环境变量可以让所有客户端默认使用录制/回放后端:
+    AKSHARE_RECORD_DIR=fixtures/akshare python mcp_server.py
+    AKSHARE_REPLAY_DIR=fixtures/akshare python -m benchmarks.bench_data_layer
+"""
+
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Tuple, Union
+
+import akshare as ak
+import pandas as pd
+from loguru import logger
+from pyarrow import ArrowException
+
+from .files import read_frame_json, write_frame_json
+
+
+def fixture_key(name: str, args: Tuple, kwargs: Dict) -> str:
+    """由接口名和参数计算fixture文件名"""
+    payload = json.dumps([name, list(args), sorted(kwargs.items())], ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class RecordingBackend:
+    """录制后端：调用真实接口并保存参数与结果"""
+
+    def __init__(self, fixture_dir: str, source: Any = ak):
+        """
+        Args:
+            fixture_dir: fixture保存目录
+            source: 被录制的接口来源，默认为akshare模块
+        """
+        self.fixture_dir = Path(fixture_dir)
+        self.source = source
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name: str) -> Callable[..., Any]:
+        func = getattr(self.source, name)
+
+        def record(*args, **kwargs):
+            key = fixture_key(name, args, kwargs)
+            directory = self.fixture_dir / name
+            directory.mkdir(parents=True, exist_ok=True)
+            meta = {"name": name, "args": list(args), "kwargs": kwargs}
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                meta.update(error=type(e).__name__, message=str(e), elapsed=time.perf_counter() - start)
+                self._write_meta(directory / f"{key}.json", meta)
+                raise
+            meta["elapsed"] = time.perf_counter() - start
+            meta["format"] = self._write_result(directory, key, result)
+            self._write_meta(directory / f"{key}.json", meta)
+            logger.debug(f"录制akshare调用: {name}, 参数: {args} {kwargs}")
+            return result
+
+        return record
+
+    def _write_meta(self, path: Path, meta: Dict) -> None:
+        with self._lock:
+            path.write_text(json.dumps(meta, ensure_ascii=False, default=str, indent=2), encoding="utf-8")
+
+    def _write_result(self, directory: Path, key: str, result: Any) -> str:
+        """保存调用结果，返回保存格式："parquet"、"frame"（JSON格式的DataFrame）或 "json"（其他结果）"""
+        if isinstance(result, pd.DataFrame):
+            try:
+                result.to_parquet(directory / f"{key}.parquet")
+                return "parquet"
+            except (TypeError, ValueError, ArrowException):
+                # 混合类型的object列无法转为Parquet，退回JSON保存
+                write_frame_json(result, directory / f"{key}.frame.json")
+                return "frame"
+        (directory / f"{key}.result.json").write_text(
+            json.dumps(result, ensure_ascii=False, default=str), encoding="utf-8"
+        )
+        return "json"
+
+
+class ReplayBackend:
+    """回放后端：从fixture目录读取录制的结果"""
+
+    def __init__(
+        self,
+        fixture_dir: str,
+        latency: Union[float, Dict[str, float]] = 0.0,
+        jitter: float = 0.0,
+        recorded_latency: bool = False,
+    ):
+        """
+        Args:
+            fixture_dir: fixture目录
+            latency: 每次调用注入的延迟（秒），可按接口名分别设置
+            jitter: 延迟的随机浮动比例 (如: 0.2 表示 ±20%)
+            recorded_latency: 是否按录制时的真实耗时注入延迟，优先于latency
+        """
+        self.fixture_dir = Path(fixture_dir)
+        self.latency = latency
+        self.jitter = jitter
+        self.recorded_latency = recorded_latency
+        self.calls: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _delay(self, name: str, meta: Dict) -> float:
+        if self.recorded_latency and "elapsed" in meta:
+            delay = meta["elapsed"]
+        elif isinstance(self.latency, dict):
+            delay = self.latency.get(name, self.latency.get("default", 0.0))
+        else:
+            delay = self.latency
+        if self.jitter:
+            delay *= 1 + random.uniform(-self.jitter, self.jitter)
+        return max(delay, 0.0)
+
+    def __getattr__(self, name: str) -> Callable[..., Any]:
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        def replay(*args, **kwargs):
+            key = fixture_key(name, args, kwargs)
+            directory = self.fixture_dir / name
+            meta_path = directory / f"{key}.json"
+            if not meta_path.exists():
+                raise LookupError(f"未找到录制数据: {name}, 参数: {args} {kwargs}")
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            with self._lock:
+                self.calls[name] = self.calls.get(name, 0) + 1
+            time.sleep(self._delay(name, meta))
+            if "error" in meta:
+                raise RuntimeError(f"{meta['error']}: {meta['message']}")
+            result_format = meta.get("format", "parquet")
+            if result_format == "parquet":
+                return pd.read_parquet(directory / f"{key}.parquet")
+            if result_format == "frame":
+                return read_frame_json(directory / f"{key}.frame.json")
+            return json.loads((directory / f"{key}.result.json").read_text(encoding="utf-8"))
+
+        return replay
+
+
+_backends: Dict[Tuple, Any] = {}
+_backend_lock = threading.Lock()
+
+
+def get_default_backend() -> Any:
+    """
+    获取进程内共享的默认akshare后端
+
+    设置 AKSHARE_REPLAY_DIR 时使用回放后端（AKSHARE_REPLAY_LATENCY 设置注入延迟），
+    设置 AKSHARE_RECORD_DIR 时使用录制后端，否则直接使用akshare。
+    相同配置下所有客户端共用同一个后端对象，调度器才能合并不同客户端的相同调用
+    """
+    replay_dir = os.getenv("AKSHARE_REPLAY_DIR")
+    record_dir = os.getenv("AKSHARE_RECORD_DIR")
+    if not replay_dir and not record_dir:
+        return ak
+    latency = float(os.getenv("AKSHARE_REPLAY_LATENCY", "0"))
+    key = ("replay", replay_dir, latency) if replay_dir else ("record", record_dir)
+    with _backend_lock:
+        if key not in _backends:
+            _backends[key] = ReplayBackend(replay_dir, latency=latency) if replay_dir else RecordingBackend(record_dir)
+        return _backends[key]
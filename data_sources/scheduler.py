@@ -0,0 +1,404 @@
+"""
+akshare调用调度
+akshare接口按上游站点（东方财富、新浪、同花顺）分组，每个站点使用令牌桶限速并限制同时在途的请求数，
+进程内所有客户端共享同一个调度器，多个会话并发取数时不会各自打满上游而被限流或封禁。
+并发的相同调用合并为一次上游请求，暂时性错误按指数退避重试（见 coalesce 模块）。
+AsyncClient 把客户端方法放入调度器的线程池执行，供异步调用方使用
+
+通过环境变量调整各站点的限速 (每秒请求数/突发量/最大在途数):
+    AKSHARE_HOST_LIMITS="eastmoney=10/20/8;ths=2/4/2" python mcp_server.py
+多个服务进程共用上游配额时设置 AKSHARE_PROCESSES 为进程数（或在进程启动后用 configure_scheduler 指定），
+每个进程按份额限速，合计不超过上述配置
+"""
+
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from loguru import logger
+
+from .coalesce import RetryPolicy, SingleFlight, call_key, retry
+
+# 接口名后缀到上游站点的映射
+HOST_SUFFIXES = {"_em": "eastmoney", "_sina": "sina", "_ths": "ths"}
+DEFAULT_HOST = "default"
+
+DEFAULT_MAX_WORKERS = int(os.getenv("AKSHARE_WORKERS", "16"))
+# 等待超过该时间（秒）时记录日志
+SLOW_WAIT = 1.0
+
+
+@dataclass(frozen=True)
+class HostLimit:
+    """单个上游站点的限速配置"""
+
+    rate: float
+    burst: int
+    max_in_flight: int
+
+
+DEFAULT_HOST_LIMITS: Dict[str, HostLimit] = {
+    "eastmoney": HostLimit(rate=5, burst=10, max_in_flight=6),
+    "sina": HostLimit(rate=2, burst=5, max_in_flight=2),
+    "ths": HostLimit(rate=1, burst=3, max_in_flight=2),
+    DEFAULT_HOST: HostLimit(rate=5, burst=10, max_in_flight=4),
+}
+
+
+def endpoint_host(endpoint: str) -> str:
+    """根据akshare接口名判断上游站点"""
+    for suffix, host in HOST_SUFFIXES.items():
+        if endpoint.endswith(suffix):
+            return host
+    return DEFAULT_HOST
+
+
+def parse_host_limits(text: str) -> Dict[str, HostLimit]:
+    """
+    解析站点限速配置
+
+    Args:
+        text: 形如 "eastmoney=10/20/8;ths=2/4/2" 的配置，依次为每秒请求数、突发量、最大在途数
+
+    Returns:
+        dict: 站点到限速配置的映射
+    """
+    limits = {}
+    for item in filter(None, (part.strip() for part in text.split(";"))):
+        host, _, value = item.partition("=")
+        rate, burst, max_in_flight = value.split("/")
+        limits[host.strip()] = HostLimit(rate=float(rate), burst=int(burst), max_in_flight=int(max_in_flight))
+    return limits
+
+
+def share_host_limits(limits: Dict[str, HostLimit], processes: int) -> Dict[str, HostLimit]:
+    """
+    多个进程共用上游配额时，计算每个进程的限速
+
+    Args:
+        limits: 站点到限速配置的映射
+        processes: 进程数
+
+    Returns:
+        dict: 每个进程的限速配置，突发量与最大在途数至少为1
+    """
+    if processes <= 1:
+        return limits
+    return {
+        host: HostLimit(
+            rate=limit.rate / processes,
+            burst=max(1, limit.burst // processes),
+            max_in_flight=max(1, limit.max_in_flight // processes),
+        )
+        for host, limit in limits.items()
+    }
+
+
+class TokenBucket:
+    """线程安全的令牌桶"""
+
+    def __init__(self, rate: float, burst: int):
+        """
+        Args:
+            rate: 每秒补充的令牌数
+            burst: 桶容量，即允许的突发请求数
+        """
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        预订一个令牌
+
+        令牌不足时允许余额为负，后来的请求依次排在更晚的时刻，保证先到先得
+
+        Returns:
+            float: 调用方需要等待的秒数
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+
+class HostLimiter:
+    """单个上游站点的限速器与排队统计"""
+
+    def __init__(self, host: str, limit: Optional[HostLimit]):
+        """
+        Args:
+            host: 站点名称
+            limit: 限速配置，为空时不限速，只做统计
+        """
+        self.host = host
+        self.limit = limit
+        self.bucket = TokenBucket(limit.rate, limit.burst) if limit else None
+        self._slots = threading.BoundedSemaphore(limit.max_in_flight) if limit else None
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.in_flight = 0
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.coalesced = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @contextmanager
+    def acquire(self) -> Iterator[float]:
+        """
+        等待在途名额和令牌，退出时释放名额
+
+        Yields:
+            float: 排队等待的秒数
+        """
+        start = time.monotonic()
+        with self._lock:
+            self.queued += 1
+        try:
+            if self._slots is not None:
+                self._slots.acquire()
+            try:
+                if self.bucket is not None:
+                    time.sleep(self.bucket.reserve())
+            except BaseException:
+                if self._slots is not None:
+                    self._slots.release()
+                raise
+        finally:
+            waited = time.monotonic() - start
+            with self._lock:
+                self.queued -= 1
+        with self._lock:
+            self.in_flight += 1
+            self.calls += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+        if waited >= SLOW_WAIT:
+            logger.info(f"akshare请求排队: {self.host}, 等待{waited:.2f}s, 排队{self.queued}个")
+        try:
+            yield waited
+        except Exception:
+            with self._lock:
+                self.errors += 1
+            raise
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+            if self._slots is not None:
+                self._slots.release()
+
+    def count(self, counter: str) -> None:
+        """累加重试 (retries) 或合并 (coalesced) 次数"""
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def stats(self) -> Dict[str, Any]:
+        """当前排队数、在途数与累计等待时间"""
+        with self._lock:
+            return {
+                "queued": self.queued,
+                "in_flight": self.in_flight,
+                "calls": self.calls,
+                "errors": self.errors,
+                "retries": self.retries,
+                "coalesced": self.coalesced,
+                "avg_wait": self.total_wait / self.calls if self.calls else 0.0,
+                "max_wait": self.max_wait,
+            }
+
+
+class ThrottledBackend:
+    """限速后端：akshare接口调用经过调度器合并、重试并按站点限速"""
+
+    def __init__(self, source: Any, scheduler: "AkShareScheduler"):
+        """
+        Args:
+            source: 被包装的接口来源（akshare模块、录制/回放后端等）
+            scheduler: 调度器
+        """
+        self.source = source
+        self.scheduler = scheduler
+
+    def __getattr__(self, name: str) -> Callable[..., Any]:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        func = getattr(self.source, name)
+
+        def call(*args, **kwargs):
+            # 同一接口来源上参数相同的并发调用共享一次请求
+            key = (id(self.source), call_key(name, args, kwargs))
+            result, shared = self.scheduler.flights.do(key, partial(self.scheduler.call, func, name, *args, **kwargs))
+            if shared:
+                self.scheduler.limiter(endpoint_host(name)).count("coalesced")
+            return result
+
+        return call
+
+
+class AkShareScheduler:
+    """akshare调用调度器"""
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, HostLimit]] = None,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        retry_policy: Optional[RetryPolicy] = None,
+        processes: Optional[int] = None,
+    ):
+        """
+        Args:
+            limits: 站点到限速配置的映射，未配置的站点使用 "default" 项，均未配置时不限速；
+                为空时使用 DEFAULT_HOST_LIMITS 并应用环境变量 AKSHARE_HOST_LIMITS，再按进程数均分
+            max_workers: 异步调用使用的线程池大小，默认读取环境变量 AKSHARE_WORKERS
+            retry_policy: 暂时性错误的重试策略，为空时使用默认策略（环境变量 AKSHARE_RETRY_ATTEMPTS 设置总尝试次数）
+            processes: 共用上游配额的进程数，limits为空时默认限速按进程数均分；为空时读取环境变量 AKSHARE_PROCESSES
+        """
+        if limits is None:
+            limits = {**DEFAULT_HOST_LIMITS, **parse_host_limits(os.getenv("AKSHARE_HOST_LIMITS", ""))}
+            if processes is None:
+                processes = int(os.getenv("AKSHARE_PROCESSES", "1"))
+            limits = share_host_limits(limits, processes)
+        self.limits = limits
+        self.max_workers = max_workers
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.flights = SingleFlight()
+        self._limiters: Dict[str, HostLimiter] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def limiter(self, host: str) -> HostLimiter:
+        """获取站点的限速器"""
+        with self._lock:
+            if host not in self._limiters:
+                self._limiters[host] = HostLimiter(host, self.limits.get(host, self.limits.get(DEFAULT_HOST)))
+            return self._limiters[host]
+
+    def call(self, func: Callable[..., Any], endpoint: str, *args, **kwargs) -> Any:
+        """
+        按站点限速后调用akshare接口，阻塞直到取得名额，暂时性错误重新排队重试
+
+        Args:
+            func: 接口函数
+            endpoint: akshare接口名，用于判断上游站点
+            *args: 透传给接口的参数
+            **kwargs: 透传给接口的参数
+
+        Returns:
+            Any: 接口返回值
+        """
+        limiter = self.limiter(endpoint_host(endpoint))
+
+        def attempt():
+            with limiter.acquire():
+                return func(*args, **kwargs)
+
+        return retry(attempt, self.retry_policy, name=endpoint, on_retry=lambda e: limiter.count("retries"))
+
+    def wrap(self, backend: Any) -> Any:
+        """用本调度器包装接口来源，已经包装过的直接返回"""
+        if isinstance(backend, ThrottledBackend) and backend.scheduler is self:
+            return backend
+        return ThrottledBackend(backend, self)
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="akshare")
+            return self._executor
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        在调度器的线程池中执行阻塞函数
+
+        Args:
+            func: 阻塞函数，通常为客户端方法
+            *args: 透传给函数的参数
+            **kwargs: 透传给函数的参数
+
+        Returns:
+            Any: 函数返回值
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, partial(func, *args, **kwargs))
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        各站点的排队与等待统计
+
+        Returns:
+            dict: 站点到统计的映射，包括排队数queued、在途数in_flight、调用数calls、失败数errors、重试数retries、
+                合并到其他请求的调用数coalesced、平均等待avg_wait与最长等待max_wait（秒）
+        """
+        with self._lock:
+            limiters = list(self._limiters.values())
+        return {limiter.host: limiter.stats() for limiter in limiters}
+
+    def shutdown(self) -> None:
+        """关闭线程池"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+class AsyncClient:
+    """数据客户端的异步包装，方法调用在调度器的线程池中执行"""
+
+    def __init__(self, client: Any, scheduler: Optional[AkShareScheduler] = None):
+        """
+        Args:
+            client: 数据客户端 (AkShareClient, HkAkShareClient)
+            scheduler: 调度器，为空时使用进程内共享的调度器
+        """
+        self.client = client
+        self.scheduler = scheduler or get_scheduler()
+
+    def __getattr__(self, name: str) -> Callable[..., Any]:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return partial(self.scheduler.run, getattr(self.client, name))
+
+
+_scheduler: Optional[AkShareScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> AkShareScheduler:
+    """获取进程内共享的调度器"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = AkShareScheduler()
+        return _scheduler
+
+
+def configure_scheduler(**kwargs) -> AkShareScheduler:
+    """
+    按给定配置重建进程内共享的调度器，在进程开始处理请求前调用（如多进程部署的工作进程启动时）
+
+    Args:
+        **kwargs: 透传给 AkShareScheduler 的参数 (如: processes)
+
+    Returns:
+        AkShareScheduler: 新的共享调度器
+    """
+    global _scheduler
+    with _scheduler_lock:
+        previous, _scheduler = _scheduler, AkShareScheduler(**kwargs)
+        scheduler = _scheduler
+    if previous is not None:
+        previous.shutdown()
+    return scheduler
@@ -0,0 +1,378 @@
+"""
+报表字段注册表
+以 column_descriptions/ 中分析师整理的字段清单为准，建立东方财富字段代码到中文名称的映射，
+并提供命名投影（core: 报表核心指标，full: 报表全部指标，或自定义字段列表），获取数据后立即只保留投影内的列
+"""
+
+import re
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import pandas as pd
+from loguru import logger
+
+DESCRIPTIONS_DIR = Path(__file__).resolve().parent.parent / "column_descriptions"
+
+# 数据集到字段清单文件的映射
+DESCRIPTION_FILES = {
+    "balance_sheet": "balance",
+    "income_statement": "income",
+    "cash_flow": "cash_flow",
+    "indicator": "indicator",
+}
+
+CORE_SECTION = "报表核心指标"
+FULL_SECTION = "报表全部指标"
+PERIOD_LABEL = "报告期"
+# 投影字段中有数据的比例低于该值时，认为报表模板与字段清单不同（如银行、保险、证券公司），不做投影
+MIN_PROJECTION_COVERAGE = 0.5
+
+# 字段清单中的序号与 其中/加/减 等前缀，匹配字段时忽略
+_LABEL_PREFIX = re.compile(r"^(\*|[一二三四五六七八九十]+、|（[一二三四五六七八九十]+）|\d+、|其中：|加：|减：)+")
+
+# 东方财富三大报表的字段代码 -> 字段清单中的名称（去掉前缀后），同一名称可对应新旧两个代码
+EM_FIELD_LABELS = {
+    "balance_sheet": {
+        "REPORT_DATE": "报告期",
+        "MONETARYFUNDS": "货币资金",
+        "TRADE_FINASSET_NOTFVTPL": "交易性金融资产",
+        "TRADE_FINASSET": "交易性金融资产",
+        "NOTE_ACCOUNTS_RECE": "应收票据及应收账款",
+        "NOTE_RECE": "应收票据",
+        "ACCOUNTS_RECE": "应收账款",
+        "PREPAYMENT": "预付款项",
+        "TOTAL_OTHER_RECE": "其他应收款合计",
+        "INTEREST_RECE": "应收利息",
+        "OTHER_RECE": "其他应收款",
+        "INVENTORY": "存货",
+        "HOLDSALE_ASSET": "划分为持有待售的资产",
+        "NONCURRENT_ASSET_1YEAR": "一年内到期的非流动资产",
+        "OTHER_CURRENT_ASSET": "其他流动资产",
+        "TOTAL_CURRENT_ASSETS": "流动资产合计",
+        "LONG_EQUITY_INVEST": "长期股权投资",
+        "INVEST_REALESTATE": "投资性房地产",
+        "FIXED_ASSET": "固定资产合计",
+        "FIXED_ASSET_DISPOSAL": "固定资产清理",
+        "CIP": "在建工程合计",
+        "PROJECT_MATERIAL": "工程物资",
+        "INTANGIBLE_ASSET": "无形资产",
+        "LONG_PREPAID_EXPENSE": "长期待摊费用",
+        "DEFER_TAX_ASSET": "递延所得税资产",
+        "OTHER_NONCURRENT_ASSET": "其他非流动资产",
+        "TOTAL_NONCURRENT_ASSETS": "非流动资产合计",
+        "TOTAL_ASSETS": "资产合计",
+        "SHORT_LOAN": "短期借款",
+        "NOTE_ACCOUNTS_PAYABLE": "应付票据及应付账款",
+        "NOTE_PAYABLE": "应付票据",
+        "ACCOUNTS_PAYABLE": "应付账款",
+        "ADVANCE_RECEIVABLES": "预收款项",
+        "CONTRACT_LIAB": "合同负债",
+        "STAFF_SALARY_PAYABLE": "应付职工薪酬",
+        "TAX_PAYABLE": "应交税费",
+        "TOTAL_OTHER_PAYABLE": "其他应付款合计",
+        "INTEREST_PAYABLE": "应付利息",
+        "DIVIDEND_PAYABLE": "应付股利",
+        "OTHER_PAYABLE": "其他应付款",
+        "NONCURRENT_LIAB_1YEAR": "一年内到期的非流动负债",
+        "OTHER_CURRENT_LIAB": "其他流动负债",
+        "TOTAL_CURRENT_LIAB": "流动负债合计",
+        "LONG_LOAN": "长期借款",
+        "LONG_PAYABLE": "长期应付款合计",
+        "SPECIAL_PAYABLE": "专项应付款",
+        "PREDICT_LIAB": "预计负债",
+        "DEFER_INCOME": "递延收益-非流动负债",
+        "OTHER_NONCURRENT_LIAB": "其他非流动负债",
+        "TOTAL_NONCURRENT_LIAB": "非流动负债合计",
+        "TOTAL_LIABILITIES": "负债合计",
+        "SHARE_CAPITAL": "实收资本（或股本）",
+        "CAPITAL_RESERVE": "资本公积",
+        "SURPLUS_RESERVE": "盈余公积",
+        "UNASSIGN_RPOFIT": "未分配利润",
+        "TOTAL_PARENT_EQUITY": "归属于母公司所有者权益合计",
+        "MINORITY_EQUITY": "少数股东权益",
+        "TOTAL_EQUITY": "所有者权益（或股东权益）合计",
+        "TOTAL_LIAB_EQUITY": "负债和所有者权益（或股东权益）合计",
+    },
+    "income_statement": {
+        "REPORT_DATE": "报告期",
+        "TOTAL_OPERATE_INCOME": "营业总收入",
+        "OPERATE_INCOME": "营业收入",
+        "TOTAL_OPERATE_COST": "营业总成本",
+        "OPERATE_COST": "营业成本",
+        "OPERATE_TAX_ADD": "营业税金及附加",
+        "SALE_EXPENSE": "销售费用",
+        "MANAGE_EXPENSE": "管理费用",
+        "RESEARCH_EXPENSE": "研发费用",
+        "FINANCE_EXPENSE": "财务费用",
+        "FE_INTEREST_EXPENSE": "利息费用",
+        "FE_INTEREST_INCOME": "利息收入",
+        "ASSET_IMPAIRMENT_INCOME": "资产减值损失",
+        "ASSET_IMPAIRMENT_LOSS": "资产减值损失",
+        "CREDIT_IMPAIRMENT_INCOME": "信用减值损失",
+        "CREDIT_IMPAIRMENT_LOSS": "信用减值损失",
+        "INVEST_INCOME": "投资收益",
+        "ASSET_DISPOSAL_INCOME": "资产处置收益",
+        "OTHER_INCOME": "其他收益",
+        "OPERATE_PROFIT": "营业利润",
+        "NONBUSINESS_INCOME": "营业外收入",
+        "NONCURRENT_DISPOSAL_INCOME": "非流动资产处置利得",
+        "NONBUSINESS_EXPENSE": "营业外支出",
+        "NONCURRENT_DISPOSAL_LOSS": "非流动资产处置损失",
+        "TOTAL_PROFIT": "利润总额",
+        "INCOME_TAX": "所得税费用",
+        "NETPROFIT": "净利润",
+        "CONTINUED_NETPROFIT": "持续经营净利润",
+        "PARENT_NETPROFIT": "归属于母公司所有者的净利润",
+        "MINORITY_INTEREST": "少数股东损益",
+        "DEDUCT_PARENT_NETPROFIT": "扣除非经常性损益后的净利润",
+        "BASIC_EPS": "基本每股收益",
+        "DILUTED_EPS": "稀释每股收益",
+        "OTHER_COMPRE_INCOME": "其他综合收益",
+        "TOTAL_COMPRE_INCOME": "综合收益总额",
+        "PARENT_TCI": "归属于母公司股东的综合收益总额",
+    },
+    "cash_flow": {
+        "REPORT_DATE": "报告期",
+        "SALES_SERVICES": "销售商品、提供劳务收到的现金",
+        "RECEIVE_TAX_REFUND": "收到的税费与返还",
+        "RECEIVE_OTHER_OPERATE": "收到其他与经营活动有关的现金",
+        "TOTAL_OPERATE_INFLOW": "经营活动现金流入小计",
+        "BUY_SERVICES": "购买商品、接受劳务支付的现金",
+        "PAY_STAFF_CASH": "支付给职工以及为职工支付的现金",
+        "PAY_ALL_TAX": "支付的各项税费",
+        "PAY_OTHER_OPERATE": "支付其他与经营活动有关的现金",
+        "TOTAL_OPERATE_OUTFLOW": "经营活动现金流出小计",
+        "NETCASH_OPERATE": "经营活动产生的现金流量净额",
+        "WITHDRAW_INVEST": "收回投资收到的现金",
+        "RECEIVE_INVEST_INCOME": "取得投资收益收到的现金",
+        "DISPOSAL_LONG_ASSET": "处置固定资产、无形资产和其他长期资产收回的现金净额",
+        "DISPOSAL_SUBSIDIARY_OTHER": "处置子公司及其他营业单位收到的现金净额",
+        "RECEIVE_OTHER_INVEST": "收到其他与投资活动有关的现金",
+        "TOTAL_INVEST_INFLOW": "投资活动现金流入小计",
+        "CONSTRUCT_LONG_ASSET": "购建固定资产、无形资产和其他长期资产支付的现金",
+        "INVEST_PAY_CASH": "投资支付的现金",
+        "OBTAIN_SUBSIDIARY_OTHER": "取得子公司及其他营业单位支付的现金净额",
+        "PAY_OTHER_INVEST": "支付其他与投资活动有关的现金",
+        "TOTAL_INVEST_OUTFLOW": "投资活动现金流出小计",
+        "NETCASH_INVEST": "投资活动产生的现金流量净额",
+        "ACCEPT_INVEST_CASH": "吸收投资收到的现金",
+        "RECEIVE_LOAN_CASH": "取得借款收到的现金",
+        "RECEIVE_OTHER_FINANCE": "收到其他与筹资活动有关的现金",
+        "TOTAL_FINANCE_INFLOW": "筹资活动现金流入小计",
+        "PAY_DEBT_CASH": "偿还债务支付的现金",
+        "ASSIGN_DIVIDEND_PORFIT": "分配股利、利润或偿付利息支付的现金",
+        "PAY_OTHER_FINANCE": "支付其他与筹资活动有关的现金",
+        "TOTAL_FINANCE_OUTFLOW": "筹资活动现金流出小计",
+        "NETCASH_FINANCE": "筹资活动产生的现金流量净额",
+        "RATE_CHANGE_EFFECT": "汇率变动对现金及现金等价物的影响",
+        "CCE_ADD": "现金及现金等价物净增加额",
+        "BEGIN_CCE": "期初现金及现金等价物余额",
+        "END_CCE": "期末现金及现金等价物余额",
+        "NETPROFIT": "净利润",
+        "ASSET_IMPAIRMENT": "资产减值准备",
+        "FA_IR_DEPR": "固定资产折旧、油气资产折耗、生产性生物资产折旧",
+        "IA_AMORTIZE": "无形资产摊销",
+        "LPE_AMORTIZE": "长期待摊费用摊销",
+        "DISPOSAL_LONGASSET_LOSS": "处置固定资产、无形资产和其他长期资产的损失",
+        "FA_SCRAP_LOSS": "固定资产报废损失",
+        "FINANCE_EXPENSE": "财务费用",
+        "INVEST_LOSS": "投资损失",
+        "DT_ASSET_REDUCE": "递延所得税资产减少",
+        "DT_LIAB_ADD": "递延所得税负债增加",
+        "INVENTORY_REDUCE": "存货的减少",
+        "OPERATE_RECE_REDUCE": "经营性应收项目的减少",
+        "OPERATE_PAYABLE_ADD": "经营性应付项目的增加",
+        "OTHER": "其他",
+        "NETCASH_OPERATENOTE": "间接法-经营活动产生的现金流量净额",
+        "END_CASH": "现金的期末余额",
+        "BEGIN_CASH": "现金的期初余额",
+        "END_CASH_EQUIVALENTS": "现金等价物的期末余额",
+        "BEGIN_CASH_EQUIVALENTS": "现金等价物的期初余额",
+        "CCE_ADDNOTE": "间接法-现金及现金等价物净增加额",
+    },
+}
+
+# 投影之外始终保留的标识列
+KEY_COLUMNS = {
+    "balance_sheet": ["SECUCODE", "SECURITY_CODE", "SECURITY_NAME_ABBR", "REPORT_TYPE"],
+    "income_statement": ["SECUCODE", "SECURITY_CODE", "SECURITY_NAME_ABBR", "REPORT_TYPE"],
+    "cash_flow": ["SECUCODE", "SECURITY_CODE", "SECURITY_NAME_ABBR", "REPORT_TYPE"],
+    "indicator": [],
+}
+
+Projection = Union[str, List[str]]
+
+
+def normalize_label(label: str) -> str:
+    """去掉字段名称前的核心指标标记、序号和 其中/加/减 前缀"""
+    return _LABEL_PREFIX.sub("", label.strip())
+
+
+def parse_descriptions(path: Path) -> Dict[str, List[str]]:
+    """
+    解析字段清单文件
+
+    Args:
+        path: 字段清单文件
+
+    Returns:
+        dict: {"core": 核心指标名称, "full": 全部指标名称}，名称均已去掉前缀；没有分段的文件两者相同
+    """
+    lines = [line.strip() for line in path.read_text(encoding="utf-8").splitlines() if line.strip()]
+    sections = {"core": [], "full": []}
+    section = None
+    for line in lines:
+        if line == CORE_SECTION:
+            section = "core"
+        elif line == FULL_SECTION:
+            section = "full"
+        elif line != PERIOD_LABEL:
+            sections[section or "full"].append(normalize_label(line))
+    if CORE_SECTION not in lines:
+        sections["core"] = list(sections["full"])
+    # 核心指标一定包含在全部指标中
+    sections["full"] = list(dict.fromkeys(sections["core"] + sections["full"]))
+    return sections
+
+
+class SchemaRegistry:
+    """报表字段注册表"""
+
+    def __init__(self, descriptions_dir: Optional[Path] = None):
+        """
+        Args:
+            descriptions_dir: 字段清单目录，默认为项目根目录下的 column_descriptions
+        """
+        self.descriptions_dir = Path(descriptions_dir or DESCRIPTIONS_DIR)
+        self._sections: Dict[str, Dict[str, List[str]]] = {}
+        self._custom: Dict[str, Dict[str, List[str]]] = {}
+        self._resolved: Dict[tuple, List[str]] = {}
+        self._lock = threading.Lock()
+
+    def _load(self, dataset: str) -> Dict[str, List[str]]:
+        with self._lock:
+            if dataset not in self._sections:
+                self._sections[dataset] = parse_descriptions(self.descriptions_dir / DESCRIPTION_FILES[dataset])
+            return self._sections[dataset]
+
+    def labels(self, dataset: str) -> Dict[str, str]:
+        """
+        字段代码到中文名称的映射
+
+        Args:
+            dataset: 数据集 ("balance_sheet", "income_statement", "cash_flow", "indicator")
+
+        Returns:
+            dict: 字段代码到中文名称的映射，同花顺财务指标的字段本身即为中文名称
+        """
+        if dataset in EM_FIELD_LABELS:
+            return dict(EM_FIELD_LABELS[dataset])
+        return {label: label for label in [PERIOD_LABEL] + self._load(dataset)["full"]}
+
+    def register(self, name: str, dataset: str, fields: List[str]) -> None:
+        """
+        注册自定义投影
+
+        Args:
+            name: 投影名称
+            dataset: 数据集
+            fields: 字段代码或中文名称
+        """
+        with self._lock:
+            self._custom.setdefault(name, {})[dataset] = list(fields)
+            self._resolved.pop((dataset, name), None)
+
+    def columns(self, dataset: str, projection: Projection = "full") -> List[str]:
+        """
+        投影包含的字段代码，按字段清单中的顺序排列
+
+        Args:
+            dataset: 数据集
+            projection: "core"、"full"、已注册的自定义投影名称，或字段代码/中文名称列表
+
+        Returns:
+            list: 字段代码（含报告期和标识列）
+        """
+        if isinstance(projection, str):
+            cached = self._resolved.get((dataset, projection))
+            if cached is not None:
+                return list(cached)
+            if projection in ("core", "full"):
+                fields = [PERIOD_LABEL] + self._load(dataset)[projection]
+            elif projection in self._custom and dataset in self._custom[projection]:
+                fields = [PERIOD_LABEL] + self._custom[projection][dataset]
+            else:
+                raise ValueError(f"未知的字段投影: {projection}, 数据集: {dataset}")
+        else:
+            fields = [PERIOD_LABEL] + list(projection)
+
+        labels = self.labels(dataset)
+        codes_by_label: Dict[str, List[str]] = {}
+        for code, label in labels.items():
+            codes_by_label.setdefault(label, []).append(code)
+        codes = list(KEY_COLUMNS.get(dataset, []))
+        for field in fields:
+            # 字段既可以是代码也可以是清单中的名称
+            codes.extend([field] if field in labels else codes_by_label.get(normalize_label(field), []))
+        codes = list(dict.fromkeys(codes))
+        if isinstance(projection, str):
+            with self._lock:
+                self._resolved[(dataset, projection)] = codes
+        return list(codes)
+
+    def project(
+        self,
+        df: Optional[pd.DataFrame],
+        dataset: str,
+        projection: Optional[Projection] = "full",
+        rename: bool = False,
+        keep: Optional[List[str]] = None,
+    ) -> Optional[pd.DataFrame]:
+        """
+        只保留投影内的列
+
+        字段清单按一般企业整理，银行、保险、证券公司的报表使用不同的模板，大部分字段不在清单中；
+        投影字段中有数据的比例低于 MIN_PROJECTION_COVERAGE 时保留全部列，不丢弃这些公司的报表项目
+
+        Args:
+            df: 接口返回的原始数据
+            dataset: 数据集
+            projection: 字段投影，为None时不做投影
+            rename: 是否将字段代码替换为中文名称
+            keep: 投影之外需要保留的列（如计算财务比率需要的字段）
+
+        Returns:
+            DataFrame: 投影后的数据，数据中不存在的字段会被忽略
+        """
+        if df is None or projection is None:
+            return df
+        wanted = self.columns(dataset, projection)
+        present = [col for col in wanted if col in df.columns]
+        # 按名称统计，同一名称的新旧代码只需有一个有数据
+        labels = self.labels(dataset)
+        keys = set(KEY_COLUMNS.get(dataset, []))
+        fields = {labels.get(col, col) for col in wanted if col not in keys}
+        filled = {labels.get(col, col) for col in present if col not in keys and df[col].notna().any()}
+        if fields and len(filled) < MIN_PROJECTION_COVERAGE * len(fields):
+            logger.debug(f"{dataset} 投影字段有数据的仅{len(filled)}/{len(fields)}个，保留全部列")
+            columns = list(df.columns)
+        else:
+            columns = present + [col for col in dict.fromkeys(keep or []) if col in df.columns and col not in present]
+        df = df[columns]
+        if rename:
+            df = df.rename(columns=self.labels(dataset))
+        return df
+
+
+_registry: Optional[SchemaRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_schema_registry() -> SchemaRegistry:
+    """获取进程内共享的字段注册表"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = SchemaRegistry()
+        return _registry
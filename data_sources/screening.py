@@ -0,0 +1,276 @@
+"""
+同业横向筛选
+对一组可比公司（自选代码列表或东方财富行业板块成分股）计算同一类报告期的财务比率，组成 公司×指标 矩阵，
+逐指标给出排名、百分位与z分数，一次调用完成同业对比。
+报表从本地仓库按列读取，只有需要刷新的公司才访问上游接口
+"""
+
+import warnings
+from dataclasses import dataclass
+from functools import partial
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from .akshare_client import STATEMENT_ENDPOINTS, AkShareClient
+from .executor import DEFAULT_MAX_WORKERS, DEFAULT_TIMEOUT, fan_out
+from .ratios import DATE_COLUMN, GROUP_COLUMN, ITEM_FIELDS, RATIO_COLUMNS, TYPE_COLUMN, compute_ratios
+
+# 数值越小越好的指标，排名和综合得分时反向处理
+LOWER_IS_BETTER = {"资产负债率(%)", "产权比率", "存货周转天数", "应收账款周转天数", "现金转换周期(天)"}
+# 默认参与对比的指标：金额类指标受公司规模影响，不做横向排名
+DEFAULT_METRICS = [name for name in RATIO_COLUMNS if "亿元" not in name]
+# 综合得分中单个指标z分数的截断值，避免个别极端值主导排名
+Z_CLIP = 3.0
+NAME_COLUMN = "SECURITY_NAME_ABBR"
+
+
+def exchange_symbol(code: str) -> str:
+    """
+    6位股票代码加上交易所前缀，已带前缀的原样返回
+
+    Args:
+        code: 股票代码 (如: 600000, SH600000)
+
+    Returns:
+        str: 带交易所前缀的股票代码 (如: SH600000)
+    """
+    code = str(code).strip().upper()
+    if code[:2] in ("SH", "SZ", "BJ"):
+        return code
+    if code.startswith(("6", "9")):
+        return f"SH{code}"
+    if code.startswith(("4", "8")):
+        return f"BJ{code}"
+    return f"SZ{code}"
+
+
+@dataclass
+class PeerScreen:
+    """同业对比结果，矩阵的行为公司、列为指标"""
+
+    symbols: List[str]
+    names: List[str]
+    report_dates: List[str]
+    metrics: List[str]
+    values: np.ndarray
+    # 排名，1为最好
+    ranks: np.ndarray
+    # 百分位，100为最好
+    percentiles: np.ndarray
+    # 原始方向的z分数
+    zscores: np.ndarray
+    # 综合得分：按指标好坏方向调整后的z分数均值
+    scores: np.ndarray
+
+    @classmethod
+    def from_values(
+        cls, symbols: List[str], names: List[str], report_dates: List[str], metrics: List[str], values: np.ndarray
+    ) -> "PeerScreen":
+        """
+        由 公司×指标 矩阵计算排名、百分位与z分数
+
+        Args:
+            symbols: 股票代码
+            names: 公司名称
+            report_dates: 各公司使用的报告期
+            metrics: 指标名称
+            values: 公司×指标 的比率矩阵，缺失值为NaN
+
+        Returns:
+            PeerScreen: 同业对比结果
+        """
+        values = np.asarray(values, dtype="float64")
+        # 数值越大越好的方向
+        direction = np.array([-1.0 if metric in LOWER_IS_BETTER else 1.0 for metric in metrics])
+        oriented = pd.DataFrame(values * direction)
+        ranks = oriented.rank(ascending=False, method="min").to_numpy()
+        percentiles = oriented.rank(pct=True, method="max").to_numpy() * 100
+
+        with warnings.catch_warnings():
+            # 全部缺失的指标或公司均值为NaN，不需要告警
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            mean = np.nanmean(values, axis=0)
+            std = np.nanstd(values, axis=0)
+            zscores = np.full(values.shape, np.nan)
+            np.divide(values - mean, std, out=zscores, where=std > 0)
+            scores = np.nanmean(np.clip(zscores * direction, -Z_CLIP, Z_CLIP), axis=1)
+        return cls(symbols, names, report_dates, metrics, values, ranks, percentiles, zscores, scores)
+
+    def frame(self, field: str = "values") -> pd.DataFrame:
+        """
+        以DataFrame形式返回一个矩阵
+
+        Args:
+            field: "values", "ranks", "percentiles" 或 "zscores"
+
+        Returns:
+            DataFrame: 行为股票代码、列为指标
+        """
+        return pd.DataFrame(getattr(self, field), index=self.symbols, columns=self.metrics)
+
+    def to_markdown(self, missing: str = "-") -> str:
+        """
+        输出给大模型阅读的对比表，公司按综合得分降序，单元格为 "数值 (百分位)"，末行为同业中位数
+
+        Args:
+            missing: 缺失值的占位符
+
+        Returns:
+            str: markdown表格
+        """
+        header = ["综合排名", "公司", "报告期", "综合得分"] + self.metrics
+        lines = ["| " + " | ".join(header) + " |", "|" + "---|" * len(header)]
+        order = np.argsort(-np.nan_to_num(self.scores, nan=-np.inf), kind="stable")
+        for position, i in enumerate(order, start=1):
+            cells = [
+                missing if np.isnan(value) else f"{value:.2f} (P{pct:.0f})"
+                for value, pct in zip(self.values[i], self.percentiles[i])
+            ]
+            score = missing if np.isnan(self.scores[i]) else f"{self.scores[i]:.2f}"
+            company = f"{self.names[i]}({self.symbols[i]})" if self.names[i] else self.symbols[i]
+            lines.append("| " + " | ".join([str(position), company, self.report_dates[i], score] + cells) + " |")
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            median = np.nanmedian(self.values, axis=0)
+        cells = [missing if np.isnan(value) else f"{value:.2f}" for value in median]
+        lines.append("| " + " | ".join(["", "同业中位数", "", ""] + cells) + " |")
+        lower = "、".join(metric for metric in self.metrics if metric in LOWER_IS_BETTER)
+        note = f"共{len(self.symbols)}家公司。百分位越高越好，{lower}按越低越好计算" if lower else ""
+        return "\n".join(lines + ([note] if note else []))
+
+
+class PeerScreener:
+    """同业横向筛选"""
+
+    def __init__(
+        self,
+        client: Optional[AkShareClient] = None,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        timeout: float = DEFAULT_TIMEOUT,
+    ):
+        """
+        Args:
+            client: A股数据客户端，为空时使用默认配置创建
+            max_workers: 刷新报表时的最大并发数
+            timeout: 刷新单张报表的超时时间（秒）
+        """
+        self.client = client or AkShareClient()
+        self.max_workers = max_workers
+        self.timeout = timeout
+
+    def industry_peers(self, industry: str) -> Dict[str, str]:
+        """
+        获取行业板块成分股
+
+        Args:
+            industry: 东方财富行业板块名称 (如: 银行)
+
+        Returns:
+            dict: 带交易所前缀的股票代码到公司名称的映射
+        """
+        df = self.client.get_industry_constituents(industry)
+        if df is None or df.empty:
+            return {}
+        return {exchange_symbol(code): name for code, name in zip(df["代码"], df["名称"])}
+
+    def load_statements(self, symbols: List[str]) -> Dict[str, pd.DataFrame]:
+        """
+        读取多家公司的三大报表，只保留计算比率需要的列
+
+        仓库中已是最新的公司直接按列读取，其余公司先并发刷新入库
+
+        Args:
+            symbols: 带交易所前缀的股票代码列表
+
+        Returns:
+            dict: 报表类型到多家公司报表拼接结果的映射，以symbol列区分公司
+        """
+        warehouse = self.client.warehouse
+        tasks = {
+            (symbol, statement): partial(self.client.load_dataset, statement, symbol)
+            for symbol in symbols
+            for statement in STATEMENT_ENDPOINTS
+            if warehouse is None or warehouse.needs_refresh("A", statement, symbol)
+        }
+        if tasks:
+            logger.info(f"同业对比刷新报表: {len(tasks)}张")
+        fetched = fan_out(tasks, max_workers=self.max_workers, timeout=self.timeout)
+
+        statements = {}
+        for statement in STATEMENT_ENDPOINTS:
+            columns = [DATE_COLUMN, TYPE_COLUMN, NAME_COLUMN]
+            columns += list(dict.fromkeys(col for cols in ITEM_FIELDS[statement].values() for col in cols))
+            if warehouse is not None:
+                df = warehouse.scan("A", statement, symbols, columns=columns)
+            else:
+                frames = [
+                    df[[col for col in columns if col in df.columns]].assign(**{GROUP_COLUMN: symbol})
+                    for symbol in symbols
+                    if (df := fetched.get((symbol, statement))) is not None and not df.empty
+                ]
+                df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+            if not df.empty and DATE_COLUMN in df.columns:
+                statements[statement] = df
+        return statements
+
+    def screen(
+        self,
+        symbols: Optional[List[str]] = None,
+        industry: Optional[str] = None,
+        period: str = "年报",
+        metrics: Optional[List[str]] = None,
+        report_date: Optional[str] = None,
+    ) -> Optional[PeerScreen]:
+        """
+        同业横向对比
+
+        Args:
+            symbols: 可比公司代码列表，与industry同时给出时合并
+            industry: 东方财富行业板块名称，使用板块全部成分股
+            period: 报告类型 (如: "年报", "中报")
+            metrics: 参与对比的指标，默认为 DEFAULT_METRICS
+            report_date: 指定报告期 (如: "2024-12-31")，为空时每家公司使用该报告类型的最新一期
+
+        Returns:
+            PeerScreen: 同业对比结果，没有可用数据时返回None
+        """
+        try:
+            names = self.industry_peers(industry) if industry else {}
+            for symbol in symbols or []:
+                names.setdefault(exchange_symbol(symbol), "")
+            if not names:
+                logger.warning(f"没有可比公司: {industry or symbols}")
+                return None
+            logger.info(f"同业对比: {industry or ''} {len(names)}家公司, 期间: {period}")
+
+            statements = self.load_statements(list(names))
+            ratios = compute_ratios(statements, [period])
+            if report_date:
+                ratios = ratios[ratios[DATE_COLUMN] == pd.Timestamp(report_date).strftime("%Y-%m-%d")]
+            if ratios.empty or GROUP_COLUMN not in ratios.columns:
+                logger.warning(f"未能计算同业财务比率: {industry or symbols}")
+                return None
+            # 比率表按公司升序、报告期降序排列，每家公司的第一行即最新一期
+            latest = ratios.drop_duplicates(GROUP_COLUMN, keep="first")
+
+            income = statements.get("income_statement", pd.DataFrame())
+            if NAME_COLUMN in income.columns:
+                abbr = income.dropna(subset=[NAME_COLUMN]).drop_duplicates(GROUP_COLUMN)
+                for symbol, name in zip(abbr[GROUP_COLUMN], abbr[NAME_COLUMN]):
+                    names[symbol] = names.get(symbol) or name
+
+            metrics = [metric for metric in (metrics or DEFAULT_METRICS) if metric in latest.columns]
+            symbols = latest[GROUP_COLUMN].tolist()
+            return PeerScreen.from_values(
+                symbols=symbols,
+                names=[names.get(symbol, "") for symbol in symbols],
+                report_dates=latest[DATE_COLUMN].tolist(),
+                metrics=metrics,
+                values=latest[metrics].to_numpy(dtype="float64"),
+            )
+        except Exception as e:
+            logger.error(f"同业对比失败: {industry or symbols}, 错误: {str(e)}")
+            return None
@@ -0,0 +1,270 @@
+"""
+个股估值时间序列
+按股票保存 stock_value_em 的完整日频估值历史（PE/PB/市值等），刷新时只追加新的交易日。
+日期轴为有序的整数日序号，时点查询、区间查询和历史分位数都通过二分查找定位
+"""
+
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from .files import atomic_write
+
+DEFAULT_VALUATION_DIR = os.getenv("VALUATION_STORE_DIR", "tmp/valuation")
+
+# 两次访问上游接口的最小间隔（秒），日频数据每天收盘后更新一次
+DEFAULT_REFRESH_INTERVAL = float(os.getenv("VALUATION_REFRESH_INTERVAL", str(12 * 3600)))
+
+DATE_COLUMN = "数据日期"
+PE_COLUMN = "PE(TTM)"
+PB_COLUMN = "市净率"
+
+DateLike = Union[str, pd.Timestamp, np.datetime64, None]
+
+
+def _day(date: DateLike) -> int:
+    """日期转为自1970-01-01起的天数，为空时为今天"""
+    return int(np.datetime64(pd.Timestamp(date if date is not None else "today").date(), "D").astype("int64"))
+
+
+@dataclass
+class ValuationSeries:
+    """单只股票的估值序列，days 与 frame 的行一一对应且升序排列"""
+
+    days: np.ndarray
+    frame: pd.DataFrame
+    checked_at: float
+
+    def locate(self, date: DateLike = None) -> int:
+        """date当天或之前最近一个交易日的行号，不存在时为-1"""
+        return int(np.searchsorted(self.days, _day(date), side="right")) - 1
+
+
+class ValuationStore:
+    """个股估值时间序列存储"""
+
+    def __init__(
+        self,
+        root: Optional[str] = None,
+        refresh_interval: float = DEFAULT_REFRESH_INTERVAL,
+        persist: bool = True,
+    ):
+        """
+        Args:
+            root: 存储目录，默认读取环境变量 VALUATION_STORE_DIR
+            refresh_interval: 两次访问上游接口的最小间隔（秒）
+            persist: 是否写入Parquet文件，为False时只保存在内存中
+        """
+        self.root = Path(root or DEFAULT_VALUATION_DIR)
+        self.refresh_interval = refresh_interval
+        self.persist = persist
+        self._series: Dict[str, ValuationSeries] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _path(self, symbol: str) -> Path:
+        return self.root / f"{symbol}.parquet"
+
+    def _lock(self, symbol: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(symbol, threading.Lock())
+
+    @staticmethod
+    def _build(frame: pd.DataFrame, checked_at: float) -> ValuationSeries:
+        frame = frame.sort_values(DATE_COLUMN, kind="stable").reset_index(drop=True)
+        days = frame[DATE_COLUMN].to_numpy(dtype="datetime64[D]").astype("int64")
+        return ValuationSeries(days=days, frame=frame, checked_at=checked_at)
+
+    def _read(self, symbol: str) -> Optional[ValuationSeries]:
+        path = self._path(symbol)
+        if not self.persist or not path.exists():
+            return None
+        try:
+            return self._build(pd.read_parquet(path), path.stat().st_mtime)
+        except Exception as e:
+            logger.warning(f"读取估值数据失败: {path}, 错误: {str(e)}")
+            return None
+
+    def _write(self, symbol: str, series: ValuationSeries) -> None:
+        if not self.persist:
+            return
+        atomic_write(self._path(symbol), lambda tmp_path: series.frame.to_parquet(tmp_path, index=False))
+
+    def append(self, symbol: str, df: pd.DataFrame) -> int:
+        """
+        追加比已存最新交易日更新的数据
+
+        Args:
+            symbol: 股票代码
+            df: stock_value_em 返回的原始数据
+
+        Returns:
+            int: 新增的交易日数
+        """
+        with self._lock(symbol):
+            return self._append(symbol, df)
+
+    def _append(self, symbol: str, df: pd.DataFrame) -> int:
+        series = self._series.get(symbol) or self._read(symbol)
+        df = df.assign(**{DATE_COLUMN: pd.to_datetime(df[DATE_COLUMN].astype(str), errors="coerce")})
+        df = df.dropna(subset=[DATE_COLUMN])
+        if series is not None and series.days.size:
+            df = df[df[DATE_COLUMN].to_numpy(dtype="datetime64[D]").astype("int64") > series.days[-1]]
+        now = time.time()
+        if df.empty:
+            if series is not None:
+                # 没有新数据也记录本次检查时间
+                series.checked_at = now
+                self._series[symbol] = series
+                if self.persist and self._path(symbol).exists():
+                    self._path(symbol).touch()
+            return 0
+
+        frame = df if series is None else pd.concat([series.frame, df], ignore_index=True)
+        series = self._build(frame, now)
+        self._series[symbol] = series
+        self._write(symbol, series)
+        logger.info(f"估值序列新增数据: {symbol}, 共{len(df)}个交易日")
+        return len(df)
+
+    def load(self, symbol: str, fetcher: Optional[Callable[[], pd.DataFrame]] = None) -> Optional[ValuationSeries]:
+        """
+        获取估值序列，超过刷新间隔时先从上游增量追加
+
+        Args:
+            symbol: 股票代码 (如: 600000)
+            fetcher: 获取 stock_value_em 原始数据的函数，为空时只读取已有数据
+
+        Returns:
+            ValuationSeries: 估值序列，不存在时返回None
+        """
+        with self._lock(symbol):
+            series = self._series.get(symbol)
+            if series is None:
+                series = self._read(symbol)
+                if series is not None:
+                    self._series[symbol] = series
+            stale = series is None or time.time() - series.checked_at >= self.refresh_interval
+            if fetcher is not None and stale:
+                try:
+                    self._append(symbol, fetcher())
+                except Exception as e:
+                    if series is None:
+                        raise
+                    # 刷新失败时仍使用已有数据
+                    logger.error(f"刷新估值数据失败: {symbol}, 错误: {str(e)}")
+            return self._series.get(symbol)
+
+    def as_of(self, symbol: str, date: DateLike = None) -> Optional[Dict]:
+        """
+        date当天或之前最近一个交易日的估值
+
+        Args:
+            symbol: 股票代码
+            date: 查询日期，为空时为今天
+
+        Returns:
+            dict: 该交易日的估值数据，不存在时返回None
+        """
+        series = self.load(symbol)
+        if series is None:
+            return None
+        position = series.locate(date)
+        return series.frame.iloc[position].to_dict() if position >= 0 else None
+
+    def range(self, symbol: str, start: DateLike = None, end: DateLike = None) -> pd.DataFrame:
+        """
+        区间内的估值数据
+
+        Args:
+            symbol: 股票代码
+            start: 起始日期（含），为空时从最早的数据开始
+            end: 结束日期（含），为空时到今天
+
+        Returns:
+            DataFrame: 按日期升序排列的估值数据
+        """
+        series = self.load(symbol)
+        if series is None:
+            return pd.DataFrame(columns=[DATE_COLUMN])
+        lo = 0 if start is None else int(np.searchsorted(series.days, _day(start), side="left"))
+        hi = series.locate(end) + 1
+        return series.frame.iloc[lo:hi].reset_index(drop=True)
+
+    def percentile(
+        self, symbol: str, column: str = PE_COLUMN, years: float = 5, date: DateLike = None
+    ) -> Optional[float]:
+        """
+        当前估值在过去N年中的历史分位数
+
+        Args:
+            symbol: 股票代码
+            column: 估值指标列 (如: "PE(TTM)", "市净率")
+            years: 回看年数
+            date: 当前日期，为空时为今天
+
+        Returns:
+            float: 0-100之间的分位数，小于等于当前值的交易日占比，数据不足时返回None
+        """
+        series = self.load(symbol)
+        if series is None or column not in series.frame.columns:
+            return None
+        end = series.locate(date)
+        if end < 0:
+            return None
+        start_day = series.days[end] - int(round(years * 365.25))
+        start = int(np.searchsorted(series.days, start_day, side="left"))
+        window = series.frame[column].to_numpy(dtype="float64")[start : end + 1]
+        current = window[-1]
+        window = window[~np.isnan(window)]
+        if np.isnan(current) or window.size == 0:
+            return None
+        return float((window <= current).mean() * 100)
+
+    def summary(
+        self,
+        symbol: str,
+        date: DateLike = None,
+        years: Optional[List[float]] = None,
+        columns: Optional[List[str]] = None,
+    ) -> Optional[Dict]:
+        """
+        估值概览：最新估值及其在不同回看期内的历史分位数
+
+        Args:
+            symbol: 股票代码
+            date: 查询日期，为空时为今天
+            years: 回看年数列表，默认为1、3、5年
+            columns: 计算分位数的估值指标，默认为PE(TTM)和市净率
+
+        Returns:
+            dict: {"latest": 最新估值, "percentiles": {指标: {"N年": 分位数}}}，不存在时返回None
+        """
+        latest = self.as_of(symbol, date)
+        if latest is None:
+            return None
+        percentiles = {
+            column: {f"{n}年": self.percentile(symbol, column, n, date) for n in (years or [1, 3, 5])}
+            for column in (columns or [PE_COLUMN, PB_COLUMN])
+        }
+        return {"latest": latest, "percentiles": percentiles}
+
+
+_store: Optional[ValuationStore] = None
+_store_lock = threading.Lock()
+
+
+def get_valuation_store() -> ValuationStore:
+    """获取进程内共享的估值序列存储"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ValuationStore()
+        return _store
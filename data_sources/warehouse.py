@@ -0,0 +1,388 @@
+"""
+本地财务数据仓库
+以 (market, symbol, report_date, report_type) 为键保存三大报表与财务指标，每只股票每个数据集一个Parquet文件。
+刷新时按 (report_date, report_type) 合并，新报告追加、已有报告期的更正或重述替换旧版本，
+且在下一个报告期结束前不会访问上游接口。同一股票的检查、下载与写入串行执行，多个工作进程之间以文件锁互斥
+
+用法:
+    python -m data_sources.warehouse  # 增量刷新仓库中已有的所有股票
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+import pyarrow.parquet as pq
+from loguru import logger
+from pyarrow import ArrowException
+
+from .files import atomic_write
+
+try:
+    import fcntl
+except ImportError:
+    # Windows下只在进程内加锁
+    fcntl = None
+
+DEFAULT_WAREHOUSE_DIR = os.getenv("FUNDAMENTALS_WAREHOUSE_DIR", "tmp/warehouse")
+
+# 下一个报告期结束后，每隔多久检查一次上游是否已发布新报告（秒）
+DEFAULT_CHECK_INTERVAL = 24 * 3600
+
+KEY_COLUMNS = ["market", "symbol", "report_date", "report_type"]
+# 同一只股票内唯一标识一份报告的列
+REPORT_KEY = ["report_date", "report_type"]
+
+# 内存中保留的按列读取结果数，文件修改后自动失效
+DEFAULT_COLUMN_CACHE_SIZE = int(os.getenv("WAREHOUSE_COLUMN_CACHE_SIZE", "2048"))
+
+
+class FundamentalsWarehouse:
+    """本地财务数据仓库"""
+
+    def __init__(
+        self,
+        root: Optional[str] = None,
+        check_interval: float = DEFAULT_CHECK_INTERVAL,
+        column_cache_size: int = DEFAULT_COLUMN_CACHE_SIZE,
+    ):
+        """
+        Args:
+            root: 仓库目录，默认读取环境变量 FUNDAMENTALS_WAREHOUSE_DIR
+            check_interval: 下一报告期结束后检查上游的最小间隔（秒）
+            column_cache_size: 内存中保留的按列读取结果数，为0时不缓存
+        """
+        self.root = Path(root or DEFAULT_WAREHOUSE_DIR)
+        self.check_interval = check_interval
+        self.column_cache_size = column_cache_size
+        self._locks: Dict[Path, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        # (文件, 列) -> (文件修改时间, 数据)
+        self._columns: "OrderedDict[Tuple[Path, Tuple[str, ...]], Tuple[int, pd.DataFrame]]" = OrderedDict()
+        self._columns_lock = threading.Lock()
+
+    def _path(self, market: str, dataset: str, symbol: str) -> Path:
+        return self.root / market / dataset / f"{symbol}.parquet"
+
+    def _lock(self, path: Path) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(path, threading.Lock())
+
+    @contextmanager
+    def _locked(self, path: Path):
+        """同一文件的读取-刷新-写入串行执行：进程内用线程锁，多个进程之间用文件锁"""
+        with self._lock(path):
+            if fcntl is None:
+                yield
+                return
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path.with_suffix(".lock"), "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_columns(self, path: Path, columns: List[str]) -> pd.DataFrame:
+        """
+        按列读取文件中存在的列，文件未修改时直接返回内存中的结果
+
+        宽表每次打开都要解析几百列的文件元数据，同业对比等批量读取的耗时主要在这里，
+        按列读取的结果很小，以文件修改时间校验后常驻内存。返回的数据与缓存共享，调用方不应原地修改
+        """
+        key = (path, tuple(columns))
+        mtime = path.stat().st_mtime_ns
+        with self._columns_lock:
+            cached = self._columns.get(key)
+            if cached is not None and cached[0] == mtime:
+                self._columns.move_to_end(key)
+                return cached[1]
+
+        parquet = pq.ParquetFile(path)
+        available = set(parquet.schema_arrow.names)
+        df = parquet.read(columns=[col for col in columns if col in available]).to_pandas()
+        if self.column_cache_size > 0:
+            with self._columns_lock:
+                self._columns[key] = (mtime, df)
+                self._columns.move_to_end(key)
+                while len(self._columns) > self.column_cache_size:
+                    self._columns.popitem(last=False)
+        return df
+
+    def symbols(self, market: str, dataset: str) -> List[str]:
+        """仓库中已有的股票代码"""
+        directory = self.root / market / dataset
+        return sorted(p.stem for p in directory.glob("*.parquet")) if directory.is_dir() else []
+
+    def read(self, market: str, dataset: str, symbol: str, raw: bool = False) -> Optional[pd.DataFrame]:
+        """
+        读取单只股票的数据
+
+        Args:
+            market: 市场 ("A", "HK")
+            dataset: 数据集 (如: "balance_sheet")
+            symbol: 股票代码
+            raw: 是否去掉仓库添加的键列，只保留接口返回的原始列
+
+        Returns:
+            DataFrame: 按report_date降序排列的数据，不存在时返回None
+        """
+        path = self._path(market, dataset, symbol)
+        if not path.exists():
+            return None
+        try:
+            df = pd.read_parquet(path)
+        except Exception as e:
+            logger.warning(f"读取仓库数据失败: {path}, 错误: {str(e)}")
+            return None
+        return df.drop(columns=KEY_COLUMNS) if raw else df
+
+    def scan(
+        self, market: str, dataset: str, symbols: Optional[List[str]] = None, columns: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """
+        跨股票按列读取数据，用于同业对比等批量分析
+
+        Args:
+            market: 市场
+            dataset: 数据集
+            symbols: 股票代码列表，为空时读取仓库中该数据集的所有股票
+            columns: 需要的列，键列总是包含在内
+
+        Returns:
+            DataFrame: 所有股票数据的拼接
+        """
+        frames = []
+        for symbol in symbols or self.symbols(market, dataset):
+            path = self._path(market, dataset, symbol)
+            if not path.exists():
+                continue
+            if columns is None:
+                frames.append(pd.read_parquet(path))
+                continue
+            # 不同股票的列可能不完全一致，只读取该文件中存在的列
+            frames.append(self._read_columns(path, KEY_COLUMNS + [col for col in columns if col not in KEY_COLUMNS]))
+        if not frames:
+            return pd.DataFrame(columns=KEY_COLUMNS + list(columns or []))
+        return pd.concat(frames, ignore_index=True)
+
+    def invalidate(self, market: str, datasets: Optional[List[str]] = None, symbol: Optional[str] = None) -> int:
+        """
+        删除仓库中的数据，下次读取时重新从上游下载
+
+        Args:
+            market: 市场
+            datasets: 数据集列表，为空时匹配该市场的所有数据集
+            symbol: 股票代码，为空时匹配所有股票；同时删除以 "代码_" 开头的文件，与DataCache.invalidate一致
+
+        Returns:
+            int: 删除的文件数
+        """
+        market_dir = self.root / market
+        if datasets is None:
+            datasets = [p.name for p in market_dir.iterdir() if p.is_dir()] if market_dir.is_dir() else []
+        removed = 0
+        for dataset in datasets:
+            for stored in self.symbols(market, dataset):
+                if symbol is not None and stored != symbol and not stored.startswith(f"{symbol}_"):
+                    continue
+                path = self._path(market, dataset, stored)
+                with self._locked(path):
+                    path.unlink(missing_ok=True)
+                removed += 1
+        logger.info(f"清除仓库数据: market={market}, datasets={datasets}, symbol={symbol}, 共{removed}个文件")
+        return removed
+
+    def latest_report_date(self, market: str, dataset: str, symbol: str) -> Optional[pd.Timestamp]:
+        """已存数据中最新的报告期"""
+        path = self._path(market, dataset, symbol)
+        if not path.exists():
+            return None
+        dates = self._read_columns(path, ["report_date"])["report_date"]
+        return dates.max() if not dates.empty else None
+
+    def needs_refresh(self, market: str, dataset: str, symbol: str, now: Optional[pd.Timestamp] = None) -> bool:
+        """
+        判断是否需要访问上游接口
+
+        下一个报告期尚未结束时不可能有新报告；结束后每隔check_interval检查一次，直到新报告入库
+        """
+        path = self._path(market, dataset, symbol)
+        latest = self.latest_report_date(market, dataset, symbol)
+        if latest is None or pd.isna(latest):
+            return True
+        now = now or pd.Timestamp.now()
+        next_period_end = latest + pd.offsets.QuarterEnd(1)
+        if now.normalize() <= next_period_end:
+            return False
+        return time.time() - path.stat().st_mtime >= self.check_interval
+
+    def upsert(
+        self,
+        market: str,
+        dataset: str,
+        symbol: str,
+        df: pd.DataFrame,
+        date_column: str = "REPORT_DATE",
+        type_column: Optional[str] = "REPORT_TYPE",
+    ) -> int:
+        """
+        按 (report_date, report_type) 合并写入：新报告追加，已有报告期以新数据为准（更正、重述）
+
+        Args:
+            market: 市场
+            dataset: 数据集
+            symbol: 股票代码
+            df: 接口返回的原始数据
+            date_column: 原始数据中的报告期列
+            type_column: 原始数据中的报告类型列，没有时为None
+
+        Returns:
+            int: 新增的报告数
+        """
+        with self._locked(self._path(market, dataset, symbol)):
+            return self._upsert(market, dataset, symbol, df, date_column, type_column)
+
+    def _upsert(
+        self,
+        market: str,
+        dataset: str,
+        symbol: str,
+        df: pd.DataFrame,
+        date_column: str,
+        type_column: Optional[str],
+    ) -> int:
+        """upsert的实现，调用方持有该文件的锁"""
+        path = self._path(market, dataset, symbol)
+        stored = self.read(market, dataset, symbol)
+        normalized = df.assign(
+            market=market,
+            symbol=symbol,
+            report_date=pd.to_datetime(df[date_column], errors="coerce"),
+            report_type=df[type_column].astype(str) if type_column in df.columns else "",
+        )
+        normalized = normalized.dropna(subset=["report_date"]).drop_duplicates(REPORT_KEY, keep="first")
+        if normalized.empty:
+            # 没有可入库的报告也更新文件时间，作为最近一次检查时间
+            if path.exists():
+                path.touch()
+            return 0
+
+        added = len(normalized)
+        merged = normalized
+        if stored is not None and not stored.empty:
+            stored_keys = pd.MultiIndex.from_frame(stored[REPORT_KEY])
+            added = int((~pd.MultiIndex.from_frame(normalized[REPORT_KEY]).isin(stored_keys)).sum())
+            # 同一报告期以最新下载的数据为准
+            merged = pd.concat([stored, normalized], ignore_index=True).drop_duplicates(REPORT_KEY, keep="last")
+        merged = merged.sort_values("report_date", ascending=False, kind="stable").reset_index(drop=True)
+        self._write(path, merged)
+        logger.info(f"仓库写入数据: {market}/{dataset}/{symbol}, 新增{added}条, 更新{len(normalized) - added}条")
+        return added
+
+    def _write(self, path: Path, df: pd.DataFrame) -> None:
+        def write(tmp_path: Path) -> None:
+            try:
+                df.to_parquet(tmp_path, index=False)
+            except (TypeError, ValueError, ArrowException):
+                # 混合类型的object列统一转为字符串后再写入
+                df.apply(lambda col: col.where(col.isna(), col.astype(str)) if col.dtype == object else col).to_parquet(
+                    tmp_path, index=False
+                )
+
+        atomic_write(path, write)
+
+    def get(
+        self,
+        market: str,
+        dataset: str,
+        symbol: str,
+        fetcher: Callable[[], Optional[pd.DataFrame]],
+        date_column: str = "REPORT_DATE",
+        type_column: Optional[str] = "REPORT_TYPE",
+    ) -> Optional[pd.DataFrame]:
+        """
+        读穿仓库：需要时先增量刷新，再返回仓库中的数据
+
+        Args:
+            market: 市场
+            dataset: 数据集
+            symbol: 股票代码
+            fetcher: 获取上游原始数据的函数
+            date_column: 原始数据中的报告期列
+            type_column: 原始数据中的报告类型列
+
+        Returns:
+            DataFrame: 接口返回格式的原始列数据，按报告期降序排列
+        """
+        path = self._path(market, dataset, symbol)
+        if self.needs_refresh(market, dataset, symbol):
+            # 持有锁后再检查一次：其他线程或进程可能刚刚完成刷新，不再重复下载
+            with self._locked(path):
+                if self.needs_refresh(market, dataset, symbol):
+                    try:
+                        df = fetcher()
+                    except Exception as e:
+                        if not path.exists():
+                            raise
+                        # 刷新失败时仍返回仓库中已有的数据
+                        logger.error(f"刷新仓库数据失败: {market}/{dataset}/{symbol}, 错误: {str(e)}")
+                        df = None
+                    if df is not None and not df.empty:
+                        try:
+                            self._upsert(market, dataset, symbol, df, date_column, type_column)
+                        except Exception as e:
+                            # 数据无法入库（如缺少报告期列）时直接返回上游数据
+                            logger.warning(f"数据无法写入仓库: {market}/{dataset}/{symbol}, 错误: {str(e)}")
+                            return df
+        return self.read(market, dataset, symbol, raw=True)
+
+
+_warehouse: Optional[FundamentalsWarehouse] = None
+_warehouse_lock = threading.Lock()
+
+
+def get_warehouse() -> FundamentalsWarehouse:
+    """获取进程内共享的数据仓库"""
+    global _warehouse
+    with _warehouse_lock:
+        if _warehouse is None:
+            _warehouse = FundamentalsWarehouse()
+        return _warehouse
+
+
+def run_incremental_refresh(warehouse: Optional[FundamentalsWarehouse] = None) -> Dict[str, int]:
+    """
+    增量刷新仓库中已有的所有股票，只有可能已发布新报告的股票才会访问上游
+
+    Returns:
+        dict: "market/dataset" 到刷新股票数的映射
+    """
+    from .akshare_client import AkShareClient
+    from .hk_akshare_client import HkAkShareClient
+
+    warehouse = warehouse or get_warehouse()
+    a_client = AkShareClient(warehouse=warehouse)
+    hk_client = HkAkShareClient(warehouse=warehouse)
+    refreshers = {("A", dataset): a_client.load_dataset for dataset in a_client.WAREHOUSE_DATASETS}
+    refreshers.update({("HK", dataset): hk_client.load_dataset for dataset in hk_client.WAREHOUSE_DATASETS})
+
+    summary = {}
+    for (market, dataset), load in refreshers.items():
+        refreshed = 0
+        for symbol in warehouse.symbols(market, dataset):
+            if warehouse.needs_refresh(market, dataset, symbol):
+                load(dataset, symbol)
+                refreshed += 1
+        summary[f"{market}/{dataset}"] = refreshed
+    logger.info(f"仓库增量刷新完成: {summary}")
+    return summary
+
+
+if __name__ == "__main__":
+    run_incremental_refresh()
@@ -1,114 +1,364 @@
+import argparse
+import asyncio
 import os
-import json
-from fastmcp import FastMCP
-from typing import Annotated, Literal
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+import pandas as pd
+from fastmcp import Context, FastMCP
+from fastmcp.server.dependencies import get_http_headers
+from typing import Annotated, List, Literal, Optional
 from pydantic import Field
-from openai import OpenAI
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
 from dotenv import load_dotenv
 
 # from template import CODER_PROMPT
 from template import VALUATION_PROMPT, ANALYSIS_PROMPT
-from data_sources import AkShareClient, HkAkShareClient
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from data_sources import AkShareClient, AsyncClient, HkAkShareClient, PeerScreener, expand_frame, get_scheduler
+from data_sources.artifacts import DEFAULT_SESSION, configure_artifact_store, get_artifact_store
+from data_sources.llm_cache import get_llm_cache, llm_cache_key
+from data_sources.prompt_data import format_prompt_data
+from data_sources.ratios import MIN_RATIO_COVERAGE, format_ratio_tables, ratio_coverage
+from data_sources.scheduler import configure_scheduler
 
 # from utils import parse_code
 from loguru import logger
 
 load_dotenv(override=True)
 
+MCP_HOST = os.getenv("MCP_HOST", "0.0.0.0")
+MCP_PORT = int(os.getenv("MCP_PORT", "8005"))
+MCP_PATH = "/mcp"
+# 工作进程数，大于1时以无状态的streamable-http多进程部署
+MCP_WORKERS = int(os.getenv("MCP_WORKERS", "1"))
+
 mcp = FastMCP()
-ai_client = OpenAI(
+# 所有会话共享一个异步客户端和连接池，一次较慢的模型调用不再阻塞其他会话的工具调用
+LLM_MODEL = "deepseek-chat"
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "180"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "64"))
+LLM_MAX_TOKENS = 4096
+LLM_TEMPERATURE = 0.5
+# 流式生成时两次进度通知的最小间隔（秒）
+PROGRESS_INTERVAL = float(os.getenv("LLM_PROGRESS_INTERVAL", "0.5"))
+ai_client = AsyncOpenAI(
     api_key=os.getenv("API_KEY", ""),
     base_url="https://api.deepseek.com",
+    http_client=DefaultAsyncHttpxClient(
+        limits=httpx.Limits(
+            max_connections=LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=LLM_MAX_CONNECTIONS,
+            keepalive_expiry=60,
+        ),
+        timeout=httpx.Timeout(LLM_TIMEOUT, connect=10),
+    ),
 )
+# 本地读写（中间结果、结果缓存）与提示词生成使用单独的小线程池，不与akshare取数排队，也不阻塞事件循环
+LOCAL_WORKERS = int(os.getenv("MCP_LOCAL_WORKERS", "4"))
+local_executor = ThreadPoolExecutor(max_workers=LOCAL_WORKERS, thread_name_prefix="mcp_local")
+# 工具之间按会话传递取数结果与分析结论（get_artifact_store），会话由调用方通过请求头传入（研究流程的thread_id）；
+# 输入完全相同的分析与估值直接返回缓存的回答（get_llm_cache）。两者在调用时获取，工作进程启动时可以重新配置
+SESSION_HEADER = "x-session-id"
+
+
+def current_session() -> str:
+    """当前工具调用所属的会话，未传入时使用默认会话"""
+    return get_http_headers().get(SESSION_HEADER) or DEFAULT_SESSION
+
+
+async def run_local(func, *args, **kwargs):
+    """在本地线程池中执行同步函数"""
+    return await asyncio.get_running_loop().run_in_executor(local_executor, partial(func, *args, **kwargs))
+
+
+async def save_artifact(session: str, name: str, value) -> None:
+    """保存中间结果，落盘在本地线程池中进行"""
+    await run_local(get_artifact_store().put, session, name, value)
+
+
+def analysis_inputs(data: dict) -> dict:
+    """
+    生成data_analysis提示词中的数据部分
+
+    Args:
+        data: 取数结果
+
+    Returns:
+        dict: ratios为财务比率表，data为其余数据的紧凑表格
+    """
+    data = {k: v.to_dict(orient="records") if isinstance(v, pd.DataFrame) else v for k, v in data.items()}
+    # 财务比率已在数据层算好，模型只需解读指标表，原始报表不再放入提示词；
+    # 银行、保险等公司的比率大多为空，仍保留这些公司（已按字段投影）的报表
+    ratios = format_ratio_tables(data)
+    if ratios:
+        sparse = {symbol for symbol, coverage in ratio_coverage(data).items() if coverage < MIN_RATIO_COVERAGE}
+        trimmed = {}
+        for k, v in data.items():
+            if k.startswith("financial_ratios"):
+                continue
+            if k.startswith(("balance_sheet", "income_statement", "cash_flow")):
+                v = [record for record in v or [] if str(record.get("symbol", "")) in sparse]
+                if not v:
+                    continue
+                logger.info(f"财务比率覆盖率低于{MIN_RATIO_COVERAGE:.0%}，提示词中保留报表: {k}")
+            trimmed[k] = v
+        data = trimmed
+    # 其余数据整理为紧凑表格，超出 PROMPT_TOKEN_BUDGET 时先裁剪新闻等次要数据
+    return {"ratios": ratios or "无", "data": format_prompt_data(data)}
+
+
+async def stream_completion(messages: List[dict], ctx: Optional[Context] = None) -> str:
+    """
+    流式调用大模型，生成过程中通过MCP进度通知发送新生成的文本
+
+    进度为已收到的片段数（约等于token数），总量为max_tokens；调用方取消工具调用时立即关闭上游连接，停止生成
+
+    Args:
+        messages: 对话消息
+        ctx: 工具调用上下文，为空时不发送进度通知
+
+    Returns:
+        str: 完整回答
+    """
+    parts: List[str] = []
+    sent = 0
+    last_report = time.monotonic()
+
+    async def report() -> None:
+        nonlocal sent, last_report
+        if ctx is not None and sent < len(parts):
+            await ctx.report_progress(progress=len(parts), total=LLM_MAX_TOKENS, message="".join(parts[sent:]))
+            sent, last_report = len(parts), time.monotonic()
+
+    stream = await ai_client.chat.completions.create(
+        model=LLM_MODEL,
+        messages=messages,
+        max_tokens=LLM_MAX_TOKENS,
+        temperature=LLM_TEMPERATURE,
+        stream=True,
+    )
+    try:
+        async with stream:
+            async for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    parts.append(delta)
+                    if time.monotonic() - last_report >= PROGRESS_INTERVAL:
+                        await report()
+            await report()
+    except asyncio.CancelledError:
+        logger.info(f"大模型调用已取消, 已生成{len(parts)}个片段")
+        raise
+    return "".join(parts)
+
+
+async def complete(system: str, template: str, idea: str, ctx: Optional[Context] = None, **data) -> str:
+    """
+    按模板生成提示词并流式调用大模型，模板、数据、idea与生成参数都相同时直接返回缓存的回答
+
+    Args:
+        system: 系统提示词
+        template: 提示词模板
+        idea: 填入模板的分析思路
+        ctx: 工具调用上下文，用于发送生成进度
+        **data: 填入模板的其他字段
+
+    Returns:
+        str: 模型回答
+    """
+    key = await run_local(
+        llm_cache_key, template, data, idea, LLM_MODEL, LLM_TEMPERATURE, system=system, max_tokens=LLM_MAX_TOKENS
+    )
+    cached = await run_local(get_llm_cache().get, key)
+    if cached is not None:
+        logger.info(f"大模型结果命中缓存: {key[:12]}")
+        if ctx is not None:
+            await ctx.report_progress(progress=LLM_MAX_TOKENS, total=LLM_MAX_TOKENS, message=cached)
+        return cached
+
+    messages = [
+        {"role": "system", "content": system},
+        {"role": "user", "content": template.format(idea=idea, **data)},
+    ]
+    answer = await stream_completion(messages, ctx)
+    # 只缓存完整生成的回答，取消时不会执行到这里
+    await run_local(get_llm_cache().put, key, answer, LLM_MODEL)
+    return answer
 
 
 @mcp.tool(description="输入A股上市公司股票代码，返回上市公司相关数据")
-def fetch_a_stock_data(
+async def fetch_a_stock_data(
     code: Annotated[str, Field(description="A股上市公司股票代码, 如: SH600000， SZ000001")],
 ) -> str:
     report_type = ["年报"]
-    client = AkShareClient()
-    result_dict = client.get_all_financial_data(code, report_type)
-    with open("tmp/data.json", "w", encoding="utf-8") as f:
-        json.dump(result_dict, f, ensure_ascii=False, indent=4)
-    return "数据获取成功， 保存至tmp/data.json"
+    client = AsyncClient(AkShareClient())
+    result_dict = await client.get_all_financial_data(code, report_type)
+    await save_artifact(current_session(), "data", result_dict)
+    return "数据获取成功"
+
+
+@mcp.tool(description="输入一组A股上市公司股票代码（如同行业可比公司），批量返回这些上市公司的相关数据")
+async def fetch_a_stock_data_batch(
+    codes: Annotated[List[str], Field(description="A股上市公司股票代码列表, 如: [SH600000, SZ000001]")],
+) -> str:
+    report_type = ["年报"]
+    client = AsyncClient(AkShareClient())
+    result = await client.get_all_financial_data_batch(codes, report_type)
+    # 每家公司保留最近3期，DataFrame直接交给data_analysis，生成提示词时再转为记录
+    result_dict = {}
+    for name, df in result.items():
+        df = expand_frame(df)
+        if "symbol" in df.columns:
+            df = df.groupby("symbol", sort=False).head(3)
+        result_dict[name] = df.dropna(axis=1, how="all").fillna(-999)
+    await save_artifact(current_session(), "data", result_dict)
+    return f"{len(codes)}家公司数据获取成功"
 
 
 @mcp.tool(description="输入港股上市公司股票代码，返回上市公司相关数据")
-def fetch_hk_stock_data(
+async def fetch_hk_stock_data(
     code: Annotated[str, Field(description="港股上市公司股票代码, 如: 00020")],
 ) -> str:
     try:
-        client = HkAkShareClient()
-        result_dict = client.get_fin_data(code)
-        with open("tmp/data.json", "w", encoding="utf-8") as f:
-            json.dump(result_dict, f, ensure_ascii=False, indent=4)
-        return "数据获取成功， 保存至tmp/data.json"
+        client = AsyncClient(HkAkShareClient())
+        result_dict = await client.get_fin_data(code)
+        await save_artifact(current_session(), "data", result_dict)
+        return "数据获取成功"
     except Exception as e:
         logger.error(f"Error fetching HK stock data: {code}")
         return "港股代码获取错误，重新输入正确的代码"
 
 
+@mcp.tool(
+    description="同业横向对比：输入一组A股可比公司代码或东方财富行业板块名称，"
+    "返回各公司财务比率在同业中的数值、排名百分位与综合得分"
+)
+async def peer_screening(
+    codes: Annotated[
+        Optional[List[str]], Field(description="A股可比公司股票代码列表, 如: [SH600000, SZ000001]")
+    ] = None,
+    industry: Annotated[Optional[str], Field(description="东方财富行业板块名称, 如: 银行、半导体")] = None,
+    period: Annotated[Literal["年报", "中报", "一季报", "三季报"], Field(description="报告类型")] = "年报",
+) -> str:
+    if not codes and not industry:
+        return "请提供可比公司股票代码或行业板块名称"
+    screen = await AsyncClient(PeerScreener()).screen(codes, industry, period)
+    if screen is None:
+        return "未获取到可比公司的财务数据，请检查股票代码或行业板块名称"
+    return screen.to_markdown()
+
+
 @mcp.tool(description="需要对整理后的上市公司数据进行分析")
-def data_analysis(idea: Annotated[str, Field(description="待分析企业的行业特性")]) -> str:
+async def data_analysis(idea: Annotated[str, Field(description="待分析企业的行业特性")], ctx: Context) -> str:
     logger.info("分析结果生成中")
-    data = {}
-    if os.path.exists("tmp/data.json"):
-        with open("tmp/data.json", "r", encoding="utf-8") as f1:
-            data = json.load(f1)
-    else:
+    session = current_session()
+    data = await run_local(get_artifact_store().get, session, "data")
+    if not data:
         return "没有需要分析的上市企业财务数据，请先尝试获取一些相关上市企业的财务数据"
     # data = {k: v[0] for k, v in data.items()}
     # with open("tmp/search_data.json", "r", encoding="utf-8") as f2:
     #     search_data = json.load(f2)
     # data.update({"search_results": search_data})
 
-    prompt = ANALYSIS_PROMPT.format(data=data, idea=idea)
-    analysis_result = (
-        ai_client.chat.completions.create(
-            model="deepseek-chat",
-            messages=[
-                {"role": "system", "content": "You are a senior data analyst."},
-                {"role": "user", "content": prompt},
-            ],
-            max_tokens=4096,
-            temperature=0.5,
-        )
-        .choices[0]
-        .message.content
-    )
-    with open("tmp/analysis_result.md", "w", encoding="utf-8") as f:
-        f.write(analysis_result)
+    # 比率表与紧凑表格的生成（含token计数）不在事件循环中执行
+    inputs = await run_local(analysis_inputs, data)
+    analysis_result = await complete("You are a senior data analyst.", ANALYSIS_PROMPT, idea, ctx=ctx, **inputs)
+    await save_artifact(session, "analysis_result", analysis_result)
     logger.info(f"数据分析结果\n {analysis_result}")
     return analysis_result
 
 
 @mcp.tool(description="对公司进行估值，生成投资建议")
-def corp_valuation(
+async def corp_valuation(
     idea: Annotated[str, Field(description="专业详细的估值模型构建")],
     code: Annotated[str, Field(description="上市公司股票代码, 如: SH600000， SZ000001")],
+    ctx: Context,
 ):
-    client = AkShareClient()
-    result_dict = client.get_stock_value(code)["stock_value"]
+    session = current_session()
+    stock_value = await AsyncClient(AkShareClient()).get_stock_value(code)
+    if stock_value is None:
+        return "估值数据获取失败，请检查股票代码"
+    # 最新估值及PE/PB在近1/3/5年中的历史分位数
+    result_dict = {"stock_value": stock_value["stock_value"], "percentiles": stock_value["percentiles"]}
     logger.info(f"成功获取估值数据: {result_dict}")
-    prompt = VALUATION_PROMPT.format(data=result_dict, idea=idea)
-    valuation_advice = (
-        ai_client.chat.completions.create(
-            model="deepseek-chat",
-            messages=[
-                {"role": "system", "content": "You are a senior investment bank’s analyst."},
-                {"role": "user", "content": prompt},
-            ],
-            max_tokens=4096,
-            temperature=0.5,
-        )
-        .choices[0]
-        .message.content
+    valuation_advice = await complete(
+        "You are a senior investment bank’s analyst.", VALUATION_PROMPT, idea, ctx=ctx, data=result_dict
     )
-    with open("tmp/valuation_data.md", "w", encoding="utf-8") as f:
-        f.write(valuation_advice)
-    return "数据获取成功， 保存至tmp/valuation_data.md"
+    await save_artifact(session, "valuation_result", valuation_advice)
+    return "估值建议生成成功"
+
+
+@mcp.custom_route("/stats", methods=["GET"])
+async def scheduler_stats(request: Request) -> JSONResponse:
+    # 各上游站点的排队数、在途数与等待时间
+    return JSONResponse(get_scheduler().stats())
+
+
+@mcp.custom_route("/stats/llm_cache", methods=["GET"])
+async def llm_cache_stats(request: Request) -> JSONResponse:
+    # 大模型结果缓存的命中数、未命中数与条目数
+    return JSONResponse(await run_local(get_llm_cache().stats))
+
+
+def configure_worker(workers: int) -> None:
+    """
+    按工作进程数配置本进程共享的调度器与中间结果存储，在进程开始处理请求前调用
+
+    上游限速按进程数均分（设置了环境变量 AKSHARE_PROCESSES 时以其为准）；多进程时默认不假定会话亲和
+    （设置了环境变量 SESSION_AFFINITY 时以其为准），读取中间结果前检查其他进程的落盘文件
+
+    Args:
+        workers: 工作进程数
+    """
+    processes = int(os.getenv("AKSHARE_PROCESSES", str(workers)))
+    affinity = os.getenv("SESSION_AFFINITY", "1" if workers <= 1 else "0") != "0"
+    configure_scheduler(processes=processes)
+    store = configure_artifact_store(affinity=affinity)
+    if workers > 1 and store.spill_dir is None:
+        logger.warning("SESSION_ARTIFACT_DIR 为空，中间结果只保存在各工作进程的内存中，无法跨进程读取")
+    logger.info(f"工作进程 {os.getpid()}: 上游限速按{processes}个进程均分, 会话亲和: {affinity}")
+
+
+def create_app():
+    """
+    多进程部署时每个工作进程的ASGI应用，由uvicorn在每个工作进程中调用
+
+    使用无状态的streamable-http：每次请求独立处理，不依赖进程内的MCP会话，任一工作进程都能处理任一请求。
+    取数缓存、报表仓库（Parquet）与大模型结果缓存（SQLite）由各进程共享，中间结果经 tmp/sessions 落盘文件共享
+    """
+    # 工作进程数由 run_workers 通过环境变量传入，在工作进程内读取并配置，不依赖模块导入的时机
+    configure_worker(int(os.getenv("MCP_WORKERS", "1")))
+    return mcp.http_app(path=MCP_PATH, transport="streamable-http", stateless_http=True)
+
+
+def run_workers(workers: int, host: str = MCP_HOST, port: int = MCP_PORT) -> None:
+    """
+    启动多个工作进程监听同一端口
+
+    Args:
+        workers: 工作进程数
+        host: 监听地址
+        port: 监听端口
+    """
+    import uvicorn
+
+    # uvicorn在新启动的工作进程中调用 create_app，工作进程继承这里设置的环境变量
+    os.environ["MCP_WORKERS"] = str(workers)
+    logger.info(f"启动 {workers} 个工作进程: http://{host}:{port}{MCP_PATH}")
+    uvicorn.run("mcp_server:create_app", factory=True, host=host, port=port, workers=workers)
 
 
 if __name__ == "__main__":
-    mcp.run(transport="sse", host="0.0.0.0", port=8005, path="/mcp")
+    parser = argparse.ArgumentParser(description="上市公司分析MCP服务")
+    parser.add_argument("--workers", type=int, default=MCP_WORKERS, help="工作进程数，大于1时使用streamable-http")
+    parser.add_argument("--host", default=MCP_HOST, help="监听地址")
+    parser.add_argument("--port", type=int, default=MCP_PORT, help="监听端口")
+    args = parser.parse_args()
+    if args.workers > 1:
+        run_workers(args.workers, args.host, args.port)
+    else:
+        configure_worker(1)
+        mcp.run(transport="sse", host=args.host, port=args.port, path=MCP_PATH)
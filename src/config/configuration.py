@@ -24,6 +24,7 @@ class Configuration:
     mcp_settings: dict = None  # MCP settings, including dynamic loaded tools
     report_style: str = ReportStyle.ACADEMIC.value  # Report style
     enable_deep_thinking: bool = False  # Whether to enable deep thinking
+    thread_id: str = "default"  # Conversation thread, also scopes MCP tool artifacts
 
     @classmethod
     def from_runnable_config(
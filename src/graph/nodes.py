@@ -6,13 +6,15 @@ import logging
 import os
 from typing import Annotated, Literal
 
-from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
 from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
 from langgraph.types import Command, interrupt
 from langchain_mcp_adapters.client import MultiServerMCPClient
 from langchain_mcp_adapters.tools import load_mcp_tools
 
+from data_sources.artifacts import ArtifactStore
+from data_sources.prompt_data import format_prompt_data
 from src.agents import create_agent
 from src.tools import (
     crawl_tool,
@@ -267,9 +269,17 @@ def reporter_node(state: State, config: RunnableConfig):
         )
     )
 
+    support_data = state["support_data"]
+    if isinstance(support_data, dict):
+        # 分析结论是完整的文字报告，按行裁剪会丢掉结尾的结论部分，这里只整理格式、不设token预算
+        support_data = format_prompt_data(
+            support_data,
+            budget=0,
+            titles={"support_content": "补充资料", "analysis_result": "财务分析结果"},
+        )
     invoke_messages.append(
         HumanMessage(
-            content=f"Here is some support data, FYI: {state['support_data']}",
+            content=f"Here is some support data, FYI:\n\n{support_data}",
             name="system",
         )
     )
@@ -516,8 +526,14 @@ async def support_data_node(
             mcp_servers[server_name] = {
                 k: v
                 for k, v in server_config.items()
-                if k in ("transport", "command", "args", "url", "env")
+                if k in ("transport", "command", "args", "url", "env", "headers")
             }
+            if mcp_servers[server_name].get("transport") in ("sse", "streamable_http"):
+                # Tools keep their artifacts (fetched data, analysis) per thread
+                mcp_servers[server_name]["headers"] = {
+                    **mcp_servers[server_name].get("headers", {}),
+                    "X-Session-Id": configurable.thread_id,
+                }
             for tool_name in server_config["enabled_tools"]:
                 enabled_tools[tool_name] = server_name
 
@@ -546,11 +562,21 @@ async def support_data_node(
 
                 # with open("tmp/valuation_data.json", "r", encoding="utf-8") as f:
                 #     fin_valuation_data = json.load(f)   
-                try:
-                    with open("tmp/analysis_result.md", "r", encoding="utf-8") as f:
-                        fin_analysis_result = f.read()
-                except:
-                    fin_analysis_result = ""
+                # The analysis comes back as the data_analysis tool result; fall back
+                # to the copy the MCP server spilled for this thread
+                fin_analysis_result = next(
+                    (
+                        message.content
+                        for message in reversed(agent_response["messages"])
+                        if isinstance(message, ToolMessage)
+                        and message.name == "data_analysis"
+                    ),
+                    None,
+                )
+                if fin_analysis_result is None:
+                    fin_analysis_result = ArtifactStore().get(
+                        configurable.thread_id, "analysis_result", ""
+                    )
 
                 last_response = agent_response["messages"][-1]
                 support_data = {
@@ -48,13 +48,15 @@ VALUATION_PROMPT = """# 任务
 # 分析思路
 {idea}
 
-# 数据样例（仅保留1行）
+# 数据样例（最新交易日估值，以及PE(TTM)、市净率在近1/3/5年中的历史分位数）
 {data}
 """
 
 ANALYSIS_PROMPT = """#### **角色与目标**
 
-你是一名资深的财务分析师。你的任务是基于传入的财务数据，对一家公司进行全面、深入的财务分析，并生成一份结构清晰、结论明确的专业分析报告。财务数据中包含了该公司过去3个财年的核心财务报表数据（利润表、资产负债表、现金流量表）。
+你是一名资深的财务分析师。你的任务是基于传入的财务数据，对一家公司进行全面、深入的财务分析，并生成一份结构清晰、结论明确的专业分析报告。财务数据中包含了由该公司过去3个财年核心财务报表（利润表、资产负债表、现金流量表）预先计算好的财务指标表，以及基本信息、估值与新闻等补充数据。
+
+指标表中的数值均由程序按下文公式精确计算，请直接引用这些数值进行解读，不要自行重新计算；指标表中标为“-”的数值表示数据缺失。
 
 #### **分析要求与步骤**
 
@@ -67,7 +69,7 @@ ANALYSIS_PROMPT = """#### **角色与目标**
 
 **## 2. 盈利能力分析 (Profitability Analysis)**
 
-  * 计算并分析以下关键盈利指标：
+  * 分析以下关键盈利指标：
       * **毛利率 (Gross Profit Margin):** `(销售收入 - 销售成本) / 销售收入`
       * **营业利润率 (Operating Profit Margin):** `营业利润 / 销售收入`
       * **净利率 (Net Profit Margin):** `净利润 / 销售收入`
@@ -95,12 +97,12 @@ ANALYSIS_PROMPT = """#### **角色与目标**
 **## 4. 运营效率分析 (Efficiency Analysis)**
 
   * 评估公司利用其资产创造收入的效率。
-  * 计算并分析以下周转率指标：
+  * 分析以下周转率指标：
       * **存货周转率 (Inventory Turnover):** `销售成本 / 平均存货`
       * **应收账款周转率 (Accounts Receivable Turnover):** `销售收入 / 平均应收账款`
       * **总资产周转率 (Total Asset Turnover):** `销售收入 / 平均总资产`
   * **要求：**
-      * 进行趋势分析，并计算相应的**周转天数**。
+      * 进行趋势分析，并结合相应的**周转天数**。
       * 解读周转率高低所反映的公司在存货管理、账款回收和资产利用方面的效率。
 
 **## 5. 现金流量分析 (Cash Flow Analysis)**
@@ -134,6 +136,9 @@ ANALYSIS_PROMPT = """#### **角色与目标**
 【行业特性】
 {idea}
 
-【财务数据】
+【财务指标表】
+{ratios}
+
+【其他数据】
 {data}
 """
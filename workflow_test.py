@@ -34,7 +34,14 @@ mcp_settings = {
         "corp_valuation": {
             "transport": "sse",
             "url": "http://localhost:8005/mcp",
-            "enabled_tools": ["corp_valuation", "fetch_a_stock_data", "fetch_hk_stock_data", "data_analysis"],
+            "enabled_tools": [
+                "corp_valuation",
+                "fetch_a_stock_data",
+                "fetch_a_stock_data_batch",
+                "fetch_hk_stock_data",
+                "peer_screening",
+                "data_analysis",
+            ],
             "add_to_agents": ["researcher"],
         }
     }